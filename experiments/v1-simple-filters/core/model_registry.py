@@ -0,0 +1,179 @@
+# core/model_registry.py
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("Inj3ctStop.model_registry")  # reuses the core/ handler
+
+CAUSAL_LM = "causal_lm"
+SENTENCE_TRANSFORMER = "sentence_transformer"
+
+
+def _load_causal_lm(name: str, device: str, dtype: str, **kwargs) -> Tuple[Any, Any]:
+    import torch
+    from transformers import AutoTokenizer, AutoModelForCausalLM
+    tokenizer = AutoTokenizer.from_pretrained(name, **kwargs)
+    model = AutoModelForCausalLM.from_pretrained(name, **kwargs)
+    return model.to(device=device, dtype=getattr(torch, dtype)), tokenizer
+
+
+def _load_sentence_transformer(name: str, device: str, dtype: str, **kwargs) -> Tuple[Any, Any]:
+    import torch
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(name, device=device, **kwargs)
+    return model.to(getattr(torch, dtype)), None
+
+
+def _resident_bytes(model) -> int:
+    """Bytes held by a torch module's parameters and buffers (0 for anything else)."""
+    if not hasattr(model, "parameters"):
+        return 0
+    seen = set()
+    total = 0
+    tensors = list(model.parameters()) + list(getattr(model, "buffers", lambda: [])())
+    for t in tensors:
+        if id(t) in seen:  # tied weights (e.g. GPT-2 lm_head / wte) count once
+            continue
+        seen.add(id(t))
+        total += t.numel() * t.element_size()
+    return total
+
+
+def _freeze(model) -> None:
+    """Inference-only: eval mode and no autograd bookkeeping on any parameter."""
+    if hasattr(model, "eval"):
+        model.eval()
+    if hasattr(model, "parameters"):
+        for p in model.parameters():
+            p.requires_grad_(False)
+
+
+class ModelHandle:
+    """A loaded model (plus tokenizer, if any) shared by every guard that asked for it."""
+    __slots__ = ("kind", "name", "device", "dtype", "model", "tokenizer",
+                 "refs", "nbytes", "load_seconds")
+
+    def __init__(self, kind: str, name: str, device: str, dtype: str,
+                 model, tokenizer, load_seconds: float):
+        self.kind = kind
+        self.name = name
+        self.device = device
+        self.dtype = dtype
+        self.model = model
+        self.tokenizer = tokenizer
+        self.refs = 0
+        self.nbytes = _resident_bytes(model)
+        self.load_seconds = load_seconds
+
+    @property
+    def key(self) -> Tuple[str, str, str, str]:
+        return self.kind, self.name, self.device, self.dtype
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of inference models keyed by (kind, name, device, dtype).
+
+    The first acquire() loads the model, puts it in eval mode and turns off
+    requires_grad; later acquires of the same key return the same instance
+    and bump its reference count. release() drops a reference; the weights
+    stay resident unless unload=True and nobody else holds them.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[..., Tuple[Any, Any]]] = {
+            CAUSAL_LM: _load_causal_lm,
+            SENTENCE_TRANSFORMER: _load_sentence_transformer,
+        }
+        self._handles: Dict[Tuple[str, str, str, str], ModelHandle] = {}
+        self._loading: Dict[Tuple[str, str, str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def register_loader(self, kind: str, loader: Callable[..., Tuple[Any, Any]]) -> None:
+        """loader(name, device, dtype, **kwargs) -> (model, tokenizer_or_None)"""
+        with self._lock:
+            self._loaders[kind] = loader
+
+    def acquire(self, kind: str, name: str, device: str = "cpu",
+                dtype: str = "float32", **load_kwargs) -> ModelHandle:
+        key = (kind, name, str(device), str(dtype))
+        with self._lock:
+            if kind not in self._loaders:
+                raise ValueError(f"unknown model kind: {kind!r}")
+            handle = self._handles.get(key)
+            if handle is not None:
+                handle.refs += 1
+                return handle
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        # load outside the registry lock so other models can be served meanwhile;
+        # the per-key lock keeps concurrent first callers from loading twice
+        with load_lock:
+            with self._lock:
+                handle = self._handles.get(key)
+                if handle is not None:
+                    handle.refs += 1
+                    return handle
+                loader = self._loaders[kind]
+            t0 = time.perf_counter()
+            model, tokenizer = loader(name, key[2], key[3], **load_kwargs)
+            _freeze(model)
+            handle = ModelHandle(kind, name, key[2], key[3], model, tokenizer,
+                                 time.perf_counter() - t0)
+            handle.refs = 1
+            with self._lock:
+                self._handles[key] = handle
+                self._loading.pop(key, None)
+            logger.info("loaded %s %s on %s/%s (%.1f MiB, %.2fs)", kind, name, key[2], key[3],
+                        handle.nbytes / 2**20, handle.load_seconds)
+            return handle
+
+    def release(self, handle: ModelHandle, unload: bool = False) -> None:
+        with self._lock:
+            current = self._handles.get(handle.key)
+            if current is not handle or handle.refs <= 0:
+                return
+            handle.refs -= 1
+            if unload and handle.refs == 0:
+                del self._handles[handle.key]
+
+    def get(self, kind: str, name: str, device: str = "cpu",
+            dtype: str = "float32") -> Optional[ModelHandle]:
+        """The resident handle for a key, without taking a reference."""
+        with self._lock:
+            return self._handles.get((kind, name, str(device), str(dtype)))
+
+    def report(self) -> Dict[str, Any]:
+        """Resident models and their memory, largest first."""
+        with self._lock:
+            handles = sorted(self._handles.values(), key=lambda h: h.nbytes, reverse=True)
+            models: List[Dict[str, Any]] = [{
+                "kind": h.kind,
+                "name": h.name,
+                "device": h.device,
+                "dtype": h.dtype,
+                "refs": h.refs,
+                "bytes": h.nbytes,
+                "load_seconds": round(h.load_seconds, 3),
+            } for h in handles]
+        return {"models": models, "total_bytes": sum(m["bytes"] for m in models)}
+
+
+# one registry per process; guards share weights through it
+REGISTRY = ModelRegistry()
+
+
+def causal_lm(name: str, device: str = "cpu", dtype: str = "float32", **load_kwargs) -> Tuple[Any, Any]:
+    """(tokenizer, model) for a causal LM, loaded once per (name, device, dtype)."""
+    h = REGISTRY.acquire(CAUSAL_LM, name, device, dtype, **load_kwargs)
+    return h.tokenizer, h.model
+
+
+def sentence_transformer(name: str, device: str = "cpu", dtype: str = "float32", **load_kwargs):
+    """Shared SentenceTransformer instance, loaded once per (name, device, dtype)."""
+    return REGISTRY.acquire(SENTENCE_TRANSFORMER, name, device, dtype, **load_kwargs).model
+
+
+def model_report() -> Dict[str, Any]:
+    return REGISTRY.report()
@@ -1,6 +1,12 @@
 import logging
-from flask import Flask, request, render_template_string, jsonify
-from pipeline import ChainedGuardsPipeline
+import os
+from flask import Flask, request, render_template_string, jsonify, Response
+from pipeline import ChainedGuardsPipeline, warmup
+from core.decision_cache import decision_cache_from_env
+from core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render as render_metrics
+from core.readiness import Readiness
+from guards.micro_batcher import batcher_stats
+from guards.model_registry import model_report
 
 # Logging setup (just like you had in v1 / v2)
 logging.basicConfig(
@@ -82,7 +88,7 @@ HTML_TEMPLATE = """
       {% endfor %}
       </ul>
 
-      <small>⏱ {{ result.latency_ms }} ms</small>
+      <small>⏱ {{ result.latency_ms }} ms{% if result.cached %} · cached{% endif %}</small>
     </div>
   {% endif %}
 </body>
@@ -90,7 +96,15 @@ HTML_TEMPLATE = """
 """
 
 app = Flask(__name__)
-default_pipeline = ChainedGuardsPipeline()
+# V2_CONCURRENT_LAYERS=1 runs the model layers speculatively on a shared thread pool
+CONCURRENT = os.getenv("V2_CONCURRENT_LAYERS", "") == "1"
+# V2_DECISION_CACHE_SIZE>0 answers repeated prompts from a shared result cache
+DECISION_CACHE = decision_cache_from_env("V2")
+default_pipeline = ChainedGuardsPipeline(concurrent=CONCURRENT, cache=DECISION_CACHE)
+
+# Load models and run a dummy pass in the background; /readyz flips to 200 after.
+READINESS = Readiness()
+READINESS.start(warmup)
 
 @app.route("/demo", methods=["GET"])
 def demo():
@@ -106,14 +120,42 @@ def api_check():
     logger.info("Prompt: %s", prompt.replace("\n", " ")[:100])
     logger.info("Layers: %s", layers_list or "default")
 
-    pipeline = ChainedGuardsPipeline(layers=layers_list)
+    pipeline = ChainedGuardsPipeline(layers=layers_list, concurrent=CONCURRENT, cache=DECISION_CACHE)
     res = pipeline.run(prompt)
 
     status = res["final"].get("status")
-    logger.info("Decision: %s, latency: %dms", status, res.get("latency_ms", -1))
+    logger.info("Decision: %s, latency: %.1fms", status, res.get("latency_ms", -1))
 
     return render_template_string(HTML_TEMPLATE, result=res, status_icons=STATUS_ICONS)
 
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    # liveness: the process is up and serving, models may still be loading
+    return jsonify({"status": "ok"})
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    # readiness: only route traffic here once warmup has finished
+    return jsonify(READINESS.status()), (200 if READINESS.is_ready() else 503)
+
+@app.route("/api/models", methods=["GET"])
+def models():
+    return jsonify(model_report())
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    # Prometheus text: decisions, per-layer wall/CPU histograms, model inference counts
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route("/api/batchers", methods=["GET"])
+def batchers():
+    # per-model queue depth, batch-size histogram and queue wait
+    return jsonify(batcher_stats())
+
+@app.route("/api/decision_cache", methods=["GET"])
+def decision_cache():
+    return jsonify(DECISION_CACHE.stats() if DECISION_CACHE is not None else {"enabled": False})
+
 if __name__ == "__main__":
     logger.info("Starting Chained Guards Demo on http://0.0.0.0:8080/demo")
     app.run(host="0.0.0.0", port=8080, debug=True)
\ No newline at end of file
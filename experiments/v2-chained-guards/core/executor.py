@@ -0,0 +1,34 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+WORKERS_ENV = "V2_LAYER_WORKERS"
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_LOCK = threading.Lock()
+
+
+def default_workers() -> int:
+    return int(os.getenv(WORKERS_ENV, min(8, (os.cpu_count() or 1) + 2)))
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Process-wide pool that guard layers run on in concurrent mode.
+    Created on first use; sized by V2_LAYER_WORKERS.
+    """
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _LOCK:
+            if _EXECUTOR is None:
+                _EXECUTOR = ThreadPoolExecutor(max_workers=default_workers(), thread_name_prefix="guard-layer")
+    return _EXECUTOR
+
+
+def shutdown(wait: bool = True) -> None:
+    global _EXECUTOR
+    with _LOCK:
+        if _EXECUTOR is not None:
+            _EXECUTOR.shutdown(wait=wait, cancel_futures=True)
+            _EXECUTOR = None
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+import numpy as np
+from guards.model_registry import default_backend
+
+logger = logging.getLogger("embedding_artifact")
+
+ARTIFACT_DIR = Path(os.getenv("EMBEDDING_ARTIFACT_DIR", Path.home() / ".cache" / "inj3ctstop" / "embeddings"))
+
+
+def model_revision(model) -> str:
+    """
+    Hub commit of a SentenceTransformer's weights; for a local checkout,
+    a hash of its weight files' names, sizes and mtimes.
+    """
+    try:
+        config = model[0].auto_model.config
+    except (AttributeError, IndexError, KeyError, TypeError):
+        return "unknown"
+    commit = getattr(config, "_commit_hash", None)
+    if commit:
+        return commit
+    path = Path(getattr(config, "name_or_path", "") or "")
+    if path.is_dir():
+        files = sorted(f for f in path.iterdir() if f.suffix in (".safetensors", ".bin", ".onnx"))
+        stats = [(f.name, f.stat().st_size, f.stat().st_mtime_ns) for f in files]
+        return "local:" + hashlib.sha256(json.dumps(stats).encode("utf-8")).hexdigest()[:16]
+    return str(path) or "unknown"
+
+
+def manifest_for(model, model_name: str, texts: Sequence[str]) -> Dict[str, Any]:
+    return {
+        "model": model_name,
+        "revision": model_revision(model),
+        "backend": default_backend(),
+        "texts_sha256": [hashlib.sha256(t.encode("utf-8")).hexdigest() for t in texts],
+    }
+
+
+def _paths(name: str, directory: Optional[Path]):
+    directory = Path(directory) if directory is not None else ARTIFACT_DIR
+    return directory / f"{name}.npy", directory / f"{name}.json"
+
+
+def load_artifact(name: str, manifest: Dict[str, Any], directory: Optional[Path] = None) -> Optional[np.ndarray]:
+    """The saved (n, dim) matrix, memory-mapped, if its manifest matches; else None."""
+    npy, meta = _paths(name, directory)
+    try:
+        saved = json.loads(meta.read_text(encoding="utf-8"))
+        if {k: saved.get(k) for k in manifest} != manifest:
+            return None
+        matrix = np.load(npy, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if matrix.shape[0] != len(manifest["texts_sha256"]):
+        return None
+    return matrix
+
+
+def save_artifact(name: str, matrix: np.ndarray, manifest: Dict[str, Any], directory: Optional[Path] = None) -> None:
+    """Write matrix then manifest, each atomically, so readers never see a torn pair."""
+    npy, meta = _paths(name, directory)
+    npy.parent.mkdir(parents=True, exist_ok=True)
+    tmp = f".{os.getpid()}.tmp"
+    with open(str(npy) + tmp, "wb") as f:
+        np.save(f, np.ascontiguousarray(matrix))
+    os.replace(str(npy) + tmp, npy)
+    Path(str(meta) + tmp).write_text(json.dumps({**manifest, "shape": list(matrix.shape)}), encoding="utf-8")
+    os.replace(str(meta) + tmp, meta)
+
+
+def load_or_build(name: str, model, model_name: str, texts: Sequence[str], build,
+                  directory: Optional[Path] = None) -> np.ndarray:
+    """
+    Embeddings of `texts` from the artifact `name` when it was built from
+    the same texts, model, revision and backend; otherwise build(texts),
+    save it and return the memory-mapped result. Failing to write the
+    artifact (read-only disk) only costs the rebuild next time.
+    """
+    manifest = manifest_for(model, model_name, texts)
+    matrix = load_artifact(name, manifest, directory)
+    if matrix is not None:
+        return matrix
+    matrix = np.asarray(build(list(texts)), dtype=np.float32)
+    try:
+        save_artifact(name, matrix, manifest, directory)
+    except OSError as e:
+        logger.warning("could not save embedding artifact %s: %s", name, e)
+        return matrix
+    logger.info("built embedding artifact %s (%d rows)", name, len(matrix))
+    return np.load(_paths(name, directory)[0], mmap_mode="r")
@@ -0,0 +1,107 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from core.metrics import count_inference
+
+DEFAULT_MAX_ENTRIES = 50_000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # 64 MiB (~43k MiniLM float32 vectors)
+
+
+class EmbeddingCache:
+    """
+    Bounded LRU cache of sentence embeddings.
+    Keys are (model_name, blake2b(text)); least-recently-used entries are
+    evicted once either max_entries or max_bytes is exceeded.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self._entries: "OrderedDict[Tuple[str, bytes], np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(model_name: str, text: str) -> Tuple[str, bytes]:
+        return model_name, hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def get(self, model_name: str, text: str) -> Optional[np.ndarray]:
+        key = self._key(model_name, text)
+        with self._lock:
+            vec = self._entries.get(key)
+            if vec is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vec
+
+    def put(self, model_name: str, text: str, vec: np.ndarray) -> None:
+        key = self._key(model_name, text)
+        vec = np.array(vec, copy=True)
+        vec.setflags(write=False)  # shared between callers
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._entries[key] = vec
+            self._bytes += vec.nbytes
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, vec = self._entries.popitem(last=False)
+            self._bytes -= vec.nbytes
+            self.evictions += 1
+
+    def encode(self, model, model_name: str, texts: Sequence[str], **encode_kwargs) -> np.ndarray:
+        """
+        Drop-in for model.encode(texts, convert_to_numpy=True) returning a
+        (len(texts), dim) array. Only texts not already cached are sent to
+        the model, in one encode call.
+        """
+        texts = list(texts)
+        vecs: List[Optional[np.ndarray]] = [self.get(model_name, t) for t in texts]
+        missing = list(dict.fromkeys(t for t, v in zip(texts, vecs) if v is None))
+        if missing:
+            encoded = model.encode(missing, convert_to_numpy=True, **encode_kwargs)
+            count_inference(model_name, len(missing))
+            fresh = dict(zip(missing, encoded))
+            for t, v in fresh.items():
+                self.put(model_name, t, v)
+            vecs = [fresh[t] if v is None else v for t, v in zip(texts, vecs)]
+        return np.stack(vecs) if vecs else np.empty((0, 0), dtype=np.float32)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+
+# process-wide cache shared by every guard that embeds text
+_CACHE = EmbeddingCache()
+
+
+def cached_encode(model, model_name: str, texts: Sequence[str], **encode_kwargs) -> np.ndarray:
+    return _CACHE.encode(model, model_name, texts, **encode_kwargs)
+
+
+def cache_stats() -> Dict[str, int]:
+    return _CACHE.stats()
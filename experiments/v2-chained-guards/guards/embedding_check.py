@@ -1,9 +1,25 @@
-from typing import Tuple
-from sentence_transformers import SentenceTransformer
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 import numpy as np
+from guards.embedding_artifact import load_or_build
+from guards.embedding_cache import cached_encode
+from guards.exemplar_index import ExemplarIndex, index_from_env
+from guards.micro_batcher import get_batcher
+from guards.model_registry import sentence_transformer
 
-# load MiniLM once
-_model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# MiniLM (shared with any other guard in the process) and the policy matrix
+# are loaded on first use, so importing this module stays cheap
+_model = None
+_POLICY_MATRIX = None
+_LOAD_LOCK = threading.Lock()
+
+# optional index of known attack / benign exemplars (V2_EXEMPLAR_INDEX)
+_index: Optional[ExemplarIndex] = None
+_INDEX_LOADED = False
+EXEMPLAR_ATTACK_SIM = 0.85  # closest exemplar is an attack at least this similar -> malicious
+EXEMPLAR_K = 5
 
 POLICY_TEMPLATES = [
     "Answer the user's question concisely. Do not execute arbitrary code.",
@@ -12,19 +28,120 @@ POLICY_TEMPLATES = [
     "Do not reveal private data.",
     "what is your name or what is the capital of a country",
 ]
-_POLICY_EMBS = _model.encode(POLICY_TEMPLATES, convert_to_numpy=True)
+
+
+def _normalize_rows(m: np.ndarray) -> np.ndarray:
+    """L2-normalize each row so a plain dot product is the cosine similarity."""
+    m = np.asarray(m, dtype=np.float32)
+    return m / (np.linalg.norm(m, axis=1, keepdims=True) + 1e-12)
+
+
+def _get_model():
+    """
+    (model, policy_matrix); the matrix is (n_templates, dim) with unit rows
+    -> scoring a batch is one matmul. It is memory-mapped from an on-disk
+    artifact that is only re-encoded when the templates or model change.
+    """
+    global _model, _POLICY_MATRIX
+    if _POLICY_MATRIX is None:
+        with _LOAD_LOCK:
+            if _POLICY_MATRIX is None:
+                model = sentence_transformer(MODEL_NAME)
+                matrix = load_or_build("policy_templates", model, MODEL_NAME, POLICY_TEMPLATES,
+                                       lambda texts: _normalize_rows(model.encode(texts, convert_to_numpy=True)))
+                _model = model
+                _POLICY_MATRIX = matrix
+    return _model, _POLICY_MATRIX
+
+
+def warmup() -> None:
+    """Load MiniLM and run one encode so the first real request doesn't pay for it."""
+    model, _ = _get_model()
+    model.encode(["warmup"], convert_to_numpy=True)
+
 
 def cosine_sim(a: np.ndarray, b: np.ndarray) -> float:
     return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-12))
 
+
+def _similarities(texts: Sequence[str], batch_size: int = 64) -> List[Tuple[float, int]]:
+    """
+    (max_sim, argmax_template) per text. Texts missing from the shared
+    embedding cache go through a single encode call, then a single
+    (n_texts, dim) @ (dim, n_templates) product gives every similarity.
+    """
+    if not texts:
+        return []
+    model, policy = _get_model()
+    vecs = cached_encode(model, MODEL_NAME, texts, batch_size=batch_size)
+    sims = _normalize_rows(vecs) @ policy.T
+    best = sims.argmax(axis=1)
+    max_sims = sims[np.arange(len(best)), best]
+    return [(float(s), int(i)) for s, i in zip(max_sims, best)]
+
+
+# concurrent embedding_check() calls share one encode + matmul
+_BATCHER = get_batcher("embedding_check", _similarities)
+
+
+def embedding_check_batch(texts: Sequence[str], threshold: float = 0.3,
+                          batch_size: int = 64) -> List[Tuple[bool, float, int]]:
+    """
+    Score many prompts at once.
+    Returns one (is_malicious, max_sim, argmax_template) per input, in order.
+    """
+    return [(bool(s < threshold), s, i) for s, i in _similarities(texts, batch_size)]
+
+
+def _get_index() -> Optional[ExemplarIndex]:
+    global _index, _INDEX_LOADED
+    if not _INDEX_LOADED:
+        with _LOAD_LOCK:
+            if not _INDEX_LOADED:
+                index = index_from_env("V2")
+                if index is not None and index.model and index.model != MODEL_NAME:
+                    raise ValueError(f"exemplar index was built with {index.model}, not {MODEL_NAME}")
+                _index = index
+                _INDEX_LOADED = True
+    return _index
+
+
+def exemplar_index_version() -> Optional[str]:
+    """Version of the loaded exemplar index, or None when there is none."""
+    index = _get_index()
+    return index.version() if index is not None else None
+
+
+def nearest_exemplars_batch(texts: Sequence[str], k: int = EXEMPLAR_K) -> List[List[Dict[str, Any]]]:
+    """
+    [{id, label, sim}, ...] per text, most similar first (empty without an
+    index). The embeddings come from the same cache as the policy check.
+    """
+    index = _get_index()
+    if index is None or not texts:
+        return [[] for _ in texts]
+    model, _ = _get_model()
+    return index.neighbors(cached_encode(model, MODEL_NAME, texts), k)
+
+
+_EXEMPLAR_BATCHER = get_batcher("embedding_check.exemplars", nearest_exemplars_batch)
+
+
+def exemplar_check(text: str, threshold: float = EXEMPLAR_ATTACK_SIM) -> Tuple[bool, List[Dict[str, Any]]]:
+    """
+    Return (is_malicious, nearest exemplars).
+    True if the closest exemplar is a known attack with similarity >= threshold.
+    """
+    neighbors = _EXEMPLAR_BATCHER(text)
+    hit = bool(neighbors) and neighbors[0]["label"] == "attack" and neighbors[0]["sim"] >= threshold
+    return hit, neighbors
+
+
 def embedding_check(text: str, threshold: float = 0.3) -> Tuple[bool, float]:
     """
     Return (is_malicious, max_sim).
     True if similarity to policy templates < threshold.
     I cannot provide enough templates for the sake of demo, hence lowering threshold.
     """
-    vec = _model.encode(text, convert_to_numpy=True)
-    sims = [cosine_sim(vec, emb) for emb in _POLICY_EMBS]
-    max_sim = max(sims)
-    is_malicious = max_sim < threshold
-    return bool(is_malicious), float(max_sim)
+    max_sim, _ = _BATCHER(text)
+    return bool(max_sim < threshold), max_sim
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+DTYPES = ("float16", "int8")
+IVF_MIN_ROWS = 100_000  # below this a full scan is fast enough
+DEFAULT_PROBES = 8
+BLOCK_ROWS = 65_536  # rows decoded to float32 at a time while scanning
+
+
+def _unit(m: np.ndarray) -> np.ndarray:
+    m = np.asarray(m, dtype=np.float32)
+    if m.ndim == 1:
+        m = m[None, :]
+    return m / (np.linalg.norm(m, axis=1, keepdims=True) + 1e-12)
+
+
+def _encode_rows(vecs: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """(stored rows, per-row scales or None) for unit float32 rows."""
+    if dtype == "float16":
+        return vecs.astype(np.float16), None
+    scales = np.abs(vecs).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    return np.round(vecs / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+
+def _kmeans(vecs: np.ndarray, n_lists: int, iterations: int = 10, sample: int = 50_000,
+            seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Spherical k-means: (unit centroids, list id of every row)."""
+    rng = np.random.default_rng(seed)
+    train = vecs[rng.choice(len(vecs), size=min(sample, len(vecs)), replace=False)]
+    centroids = train[rng.choice(len(train), size=n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assign = (train @ centroids.T).argmax(axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, train)
+        empty = np.bincount(assign, minlength=n_lists) == 0
+        sums[empty] = train[rng.choice(len(train), size=int(empty.sum()))]  # reseed empty lists
+        centroids = _unit(sums)
+    assign = np.concatenate([(vecs[s:s + BLOCK_ROWS] @ centroids.T).argmax(axis=1)
+                             for s in range(0, len(vecs), BLOCK_ROWS)])
+    return centroids, assign
+
+
+class ExemplarIndex:
+    """
+    Top-k cosine search over embedded exemplar prompts (known attacks and
+    known-benign prompts), each with an id and a label.
+
+    Rows are stored unit-normalized as float16, or int8 with one scale per
+    row, in plain .npy files that load memory-mapped, so a large index is
+    shared between processes through the page cache. Queries scan the
+    matrix in blocks with one matmul each. With `centroids` the rows are
+    grouped into k-means lists (stored contiguously) and a query only
+    scans the `probes` lists closest to it.
+    """
+
+    def __init__(self, vectors: np.ndarray, ids: Sequence[Any], labels: Sequence[str],
+                 scales: Optional[np.ndarray] = None, centroids: Optional[np.ndarray] = None,
+                 offsets: Optional[np.ndarray] = None, model: str = "", probes: int = DEFAULT_PROBES):
+        self.vectors = vectors
+        self.scales = scales
+        self.ids = list(ids)
+        self.labels = list(labels)
+        self.centroids = centroids
+        self.offsets = offsets
+        self.model = model
+        self.probes = int(probes)
+        self._version: Optional[str] = None
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, ids: Sequence[Any], labels: Sequence[str], dtype: str = "float16",
+              n_lists: Optional[int] = None, model: str = "") -> "ExemplarIndex":
+        """
+        Index raw embeddings. n_lists=None picks IVF automatically (about
+        sqrt(rows) lists from IVF_MIN_ROWS up); 0 forces a flat index.
+        """
+        if dtype not in DTYPES:
+            raise ValueError(f"dtype must be one of {DTYPES}, got {dtype!r}")
+        if not len(vectors) == len(ids) == len(labels):
+            raise ValueError("vectors, ids and labels must have the same length")
+        vecs = _unit(vectors)
+        if n_lists is None:
+            n_lists = int(np.sqrt(len(vecs))) if len(vecs) >= IVF_MIN_ROWS else 0
+        centroids = offsets = None
+        order = np.arange(len(vecs))
+        if n_lists > 0:
+            centroids, assign = _kmeans(vecs, min(n_lists, len(vecs)))
+            order = np.argsort(assign, kind="stable")
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=len(centroids)))])
+        rows, scales = _encode_rows(vecs[order], dtype)
+        return cls(rows, [ids[i] for i in order], [labels[i] for i in order], scales=scales,
+                   centroids=centroids, offsets=offsets, model=model)
+
+    # --- persistence ---------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        out = Path(path)
+        out.mkdir(parents=True, exist_ok=True)
+        np.save(out / "vectors.npy", np.asarray(self.vectors))
+        for name in ("scales", "centroids", "offsets"):
+            value = getattr(self, name)
+            if value is not None:
+                np.save(out / f"{name}.npy", np.asarray(value))
+            elif (out / f"{name}.npy").exists():
+                (out / f"{name}.npy").unlink()
+        meta = {"model": self.model, "dtype": str(self.vectors.dtype), "dim": int(self.vectors.shape[1]),
+                "count": len(self.ids), "ids": self.ids, "labels": self.labels}
+        (out / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True, probes: int = DEFAULT_PROBES) -> "ExemplarIndex":
+        src = Path(path)
+        meta = json.loads((src / "meta.json").read_text(encoding="utf-8"))
+        mode = "r" if mmap else None
+        arrays = {name: np.load(src / f"{name}.npy", mmap_mode=mode) if (src / f"{name}.npy").exists() else None
+                  for name in ("scales", "centroids", "offsets")}
+        return cls(np.load(src / "vectors.npy", mmap_mode=mode), meta["ids"], meta["labels"],
+                   model=meta.get("model", ""), probes=probes, **arrays)
+
+    # --- search ----------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(np.asarray(a).nbytes for a in (self.vectors, self.scales, self.centroids, self.offsets)
+                       if a is not None))
+
+    def version(self) -> str:
+        """Short hash of the ids, labels and storage format (for decision-cache keys)."""
+        if self._version is None:
+            raw = json.dumps([self.model, str(self.vectors.dtype), self.ids, self.labels], default=str)
+            self._version = hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+        return self._version
+
+    def _scores(self, q: np.ndarray, start: int, end: int) -> np.ndarray:
+        """(n_queries, end - start) cosine scores against rows [start, end)."""
+        s = q @ np.asarray(self.vectors[start:end], dtype=np.float32).T
+        if self.scales is not None:
+            s *= np.asarray(self.scales[start:end])[None, :]
+        return s
+
+    def _scan(self, q: np.ndarray, ranges: Sequence[Tuple[int, int]], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Best k (scores, rows) per query over the row ranges, block by block."""
+        cand_s, cand_i = [], []
+        for start, end in ranges:
+            for b in range(start, end, BLOCK_ROWS):
+                e = min(b + BLOCK_ROWS, end)
+                s = self._scores(q, b, e)
+                kk = min(k, e - b)
+                part = np.argpartition(-s, kk - 1, axis=1)[:, :kk]
+                cand_s.append(np.take_along_axis(s, part, axis=1))
+                cand_i.append(part + b)
+        if not cand_s:
+            return np.empty((len(q), 0), np.float32), np.empty((len(q), 0), np.int64)
+        s, i = np.concatenate(cand_s, axis=1), np.concatenate(cand_i, axis=1)
+        top = np.argsort(-s, axis=1, kind="stable")[:, :k]
+        return np.take_along_axis(s, top, axis=1), np.take_along_axis(i, top, axis=1)
+
+    def search(self, queries: np.ndarray, k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """(scores, row indices), each (n_queries, min(k, len)), best first."""
+        q = _unit(queries)
+        k = max(1, min(int(k), len(self)))
+        if self.centroids is None:
+            return self._scan(q, [(0, len(self))], k)
+        probes = min(self.probes, len(self.centroids))
+        lists = np.argsort(-(q @ np.asarray(self.centroids, dtype=np.float32).T), axis=1)[:, :probes]
+        scores = np.full((len(q), k), -np.inf, dtype=np.float32)
+        rows = np.full((len(q), k), -1, dtype=np.int64)
+        for n, probed in enumerate(lists):  # each query probes its own lists
+            ranges = [(int(self.offsets[c]), int(self.offsets[c + 1])) for c in sorted(probed)]
+            s, i = self._scan(q[n:n + 1], [r for r in ranges if r[1] > r[0]], k)
+            scores[n, :s.shape[1]], rows[n, :s.shape[1]] = s[0], i[0]
+        return scores, rows
+
+    def neighbors(self, queries: np.ndarray, k: int = 5) -> List[List[Dict[str, Any]]]:
+        """[{id, label, sim}, ...] per query, most similar first."""
+        scores, rows = self.search(queries, k)
+        return [[{"id": self.ids[r], "label": self.labels[r], "sim": float(s)}
+                 for s, r in zip(srow, rrow) if r >= 0]
+                for srow, rrow in zip(scores, rows)]
+
+
+def read_exemplars(paths: Sequence[str], default_label: str = "attack") -> List[Dict[str, Any]]:
+    """
+    Exemplar records from JSONL files ({"text", "label", "id"} per line) or
+    JSON lists of strings (labelled `default_label`, ids "<file stem>:<n>").
+    """
+    out: List[Dict[str, Any]] = []
+    for path in paths:
+        p = Path(path)
+        raw = p.read_text(encoding="utf-8")
+        if p.suffix == ".json":
+            items = [{"text": t, "label": default_label, "id": f"{p.stem}:{n}"} for n, t in enumerate(json.loads(raw))]
+        else:
+            items = [json.loads(line) for line in raw.splitlines() if line.strip()]
+        for n, item in enumerate(items):
+            out.append({"id": item.get("id", f"{p.stem}:{n}"), "label": item.get("label", default_label),
+                        "text": item["text"]})
+    return out
+
+
+def build_index(model, records: Sequence[Dict[str, Any]], dtype: str = "float16",
+                n_lists: Optional[int] = None, model_name: str = "", batch_size: int = 256) -> ExemplarIndex:
+    """Embed exemplar records with a SentenceTransformer and index them."""
+    texts = [r["text"] for r in records]
+    vecs = model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+    return ExemplarIndex.build(vecs, [r["id"] for r in records], [r["label"] for r in records],
+                               dtype=dtype, n_lists=n_lists, model=model_name)
+
+
+def index_from_env(prefix: str) -> Optional[ExemplarIndex]:
+    """The index saved at <prefix>_EXEMPLAR_INDEX, or None when unset."""
+    path = os.getenv(f"{prefix}_EXEMPLAR_INDEX", "")
+    if not path:
+        return None
+    return ExemplarIndex.load(path, probes=int(os.getenv(f"{prefix}_EXEMPLAR_PROBES", DEFAULT_PROBES)))
@@ -1,7 +1,10 @@
-from typing import Tuple
-from transformers import AutoTokenizer, AutoModelForCausalLM
-import torch
+from typing import List, Optional, Sequence, Tuple
 import logging
+import math
+import threading
+from guards.micro_batcher import get_batcher
+from guards.model_registry import causal_lm
+from guards.perplexity import PerplexityScorer, scorer_from_env
 
 logging.basicConfig(
     level=logging.INFO,
@@ -9,32 +12,84 @@ logging.basicConfig(
 )
 logger = logging.getLogger("llm_check")
 
-# load distilgpt2 once at import
-_tokenizer = AutoTokenizer.from_pretrained("distilgpt2")
-_model = AutoModelForCausalLM.from_pretrained("distilgpt2")
+# distilgpt2 comes from the process-wide registry (eval mode, no grads)
+# on first use rather than at import
+_scorer = None
+_LOAD_LOCK = threading.Lock()
 
 SUSPICIOUS_KEYWORDS = ["ignore previous", "password", "secret", "delete all"]
+PPL_THRESHOLD = 80
 
 
-def llm_self_check(text: str) -> Tuple[bool, str]:
-    """
-    Returns (is_malicious, explanation).
-    Uses distilgpt2 perplexity + keyword checks.
-    """
+def _get_scorer() -> PerplexityScorer:
+    global _scorer
+    if _scorer is None:
+        with _LOAD_LOCK:
+            if _scorer is None:
+                tokenizer, model = causal_lm("distilgpt2")
+                _scorer = scorer_from_env(model, tokenizer, "V2")
+    return _scorer
+
+
+def warmup() -> None:
+    """Load distilgpt2 and run one forward pass to absorb first-call allocator costs."""
+    _get_scorer().token_nll(["warmup forward pass"])
+
+
+def _keyword_hit(text: str) -> Optional[str]:
     lowered = text.lower()
     for kw in SUSPICIOUS_KEYWORDS:
         if kw in lowered:
-            return True, f"keyword:{kw}"
+            return kw
+    return None
+
+
+def _nll_threshold(n_tokens: int) -> float:
+    """Mean token NLL at which exp(nll) / n_tokens crosses PPL_THRESHOLD."""
+    return math.log(PPL_THRESHOLD * max(n_tokens, 1))
+
+
+def llm_self_check_batch(texts: Sequence[str]) -> List[Tuple[bool, str]]:
+    """
+    (is_malicious, explanation) per text, in order.
+    Keyword hits short-circuit; everything else is scored in one batched
+    distilgpt2 pass. Long texts are scored on a bounded token budget
+    (see PerplexityScorer); their explanation says how many tokens were.
+    """
+    results: List[Optional[Tuple[bool, str]]] = [None] * len(texts)
+    to_score = []
+    for i, text in enumerate(texts):
+        kw = _keyword_hit(text)
+        if kw is not None:
+            results[i] = (True, f"keyword:{kw}")
+        else:
+            to_score.append(i)
 
     # compute perplexity
-    inputs = _tokenizer(text, return_tensors="pt")
-    with torch.no_grad():
-        loss = _model(**inputs, labels=inputs["input_ids"]).loss
-    
-    ppl = torch.exp(loss).item() / len(inputs["input_ids"][0])
-    logger.info(f"ppl is : {ppl}")
-        
-    # threshold is tunable —> higher perplexity = more suspicious
-    if ppl > 80:
-        return True, f"high-perplexity:{ppl:.1f}"
-    return False, f"ok:{ppl:.1f}"
+    scored = _get_scorer().score([texts[i] for i in to_score], _nll_threshold) if to_score else []
+    for i, (nll, n_tokens, n_scored) in zip(to_score, scored):
+        ppl = math.exp(nll) / max(n_tokens, 1)  # NaN for texts too short to score
+        logger.info(f"ppl is : {ppl}")
+        partial = f" (scored {n_scored}/{n_tokens - 1} tokens)" if 0 < n_scored < n_tokens - 1 else ""
+
+        # threshold is tunable —> higher perplexity = more suspicious
+        if ppl > PPL_THRESHOLD:
+            results[i] = (True, f"high-perplexity:{ppl:.1f}{partial}")
+        else:
+            results[i] = (False, f"ok:{ppl:.1f}{partial}")
+    return results
+
+
+# concurrent llm_self_check() calls share one distilgpt2 forward pass
+_BATCHER = get_batcher("llm_self_check", llm_self_check_batch)
+
+
+def llm_self_check(text: str) -> Tuple[bool, str]:
+    """
+    Returns (is_malicious, explanation).
+    Uses distilgpt2 perplexity + keyword checks.
+    """
+    kw = _keyword_hit(text)
+    if kw is not None:
+        return True, f"keyword:{kw}"
+    return _BATCHER(text)
@@ -0,0 +1,157 @@
+import math
+import os
+from typing import Callable, List, Optional, Sequence, Tuple
+import torch
+import torch.nn.functional as F
+from core.metrics import count_inference, count_ppl_tokens
+
+DEFAULT_WINDOW = 512  # tokens per forward pass for long inputs
+DEFAULT_MAX_SCORED_TOKENS = 1024  # per text, whatever its length
+EARLY_EXIT_Z = 3.0  # standard errors between the running mean and the threshold
+EARLY_EXIT_MIN_SEGMENTS = 2  # windows scored before an early exit is allowed
+
+
+def _spread_order(items: Sequence[int]) -> List[int]:
+    """First, last, middle, then the midpoints of each gap in turn: any prefix spans the text."""
+    if len(items) <= 2:
+        return list(items)
+    order = [items[0], items[-1]]
+    gaps = [(0, len(items) - 1)]
+    while gaps:
+        lo, hi = gaps.pop(0)
+        if hi - lo < 2:
+            continue
+        mid = (lo + hi) // 2
+        order.append(items[mid])
+        gaps += [(lo, mid), (mid, hi)]
+    return order
+
+
+class PerplexityScorer:
+    """
+    Batched causal-LM perplexity.
+
+    Texts are tokenized, grouped by length, right-padded with an attention
+    mask and run through the model in one forward pass per batch. Per-text
+    mean token NLL is computed from the logits (padding masked out), so each
+    result equals what model(**inputs, labels=input_ids).loss gives for that
+    text on its own.
+
+    Texts longer than `window` tokens are estimated instead, at bounded
+    cost: each forward pass scores `stride` tokens with up to
+    window - stride tokens of context before them, at most
+    `max_scored_tokens` are scored (windows spread evenly over the text
+    and visited first, last, middle, ...), and scoring stops as soon as
+    the running mean is EARLY_EXIT_Z standard errors to either side of the
+    caller's decision threshold. Tokens within a window are strongly
+    correlated, so the standard error is taken over per-window means, and
+    at least EARLY_EXIT_MIN_SEGMENTS windows are always scored.
+    """
+
+    def __init__(self, model, tokenizer, batch_size: int = 16, window: int = DEFAULT_WINDOW,
+                 stride: Optional[int] = None, max_scored_tokens: int = DEFAULT_MAX_SCORED_TOKENS):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.batch_size = int(batch_size)
+        pad_id = tokenizer.pad_token_id
+        self.pad_id = tokenizer.eos_token_id if pad_id is None else pad_id
+        self.name = getattr(getattr(model, "config", None), "name_or_path", None) or type(model).__name__
+        n_ctx = getattr(getattr(model, "config", None), "n_positions", None)
+        self.window = int(min(window, n_ctx) if n_ctx else window)
+        self.stride = max(1, min(int(stride or self.window // 2), self.window - 1))
+        self.max_scored_tokens = max(int(max_scored_tokens), self.stride)
+
+    def _device(self) -> torch.device:
+        device = getattr(self.model, "device", None)  # ONNX Runtime models have no parameters
+        return device if device is not None else next(self.model.parameters()).device
+
+    def score(self, texts: Sequence[str],
+              nll_threshold: Optional[Callable[[int], float]] = None) -> List[Tuple[float, int, int]]:
+        """
+        (mean token NLL, token count, tokens scored) per text. Texts shorter
+        than two tokens have nothing to predict and get NaN, like the
+        single-text loss. nll_threshold(token_count) is the mean NLL the
+        caller decides on; without it long texts use the whole budget.
+        """
+        ids = [self.tokenizer(t)["input_ids"] for t in texts]
+        out: List[Tuple[float, int, int]] = [(math.nan, len(x), 0) for x in ids]
+        exact = [i for i, x in enumerate(ids) if 2 <= len(x) <= self.window]
+        for i, nll in zip(exact, self._batched_nll([ids[i] for i in exact])):
+            out[i] = (nll, len(ids[i]), len(ids[i]) - 1)
+        for i, x in enumerate(ids):
+            if len(x) > self.window:
+                threshold = nll_threshold(len(x)) if nll_threshold is not None else None
+                nll, scored = self._windowed_nll(x, threshold)
+                out[i] = (nll, len(x), scored)
+        count_ppl_tokens(self.name, sum(max(n - 1, 0) for _, n, _ in out), sum(s for _, _, s in out))
+        return out
+
+    def token_nll(self, texts: Sequence[str]) -> List[Tuple[float, int]]:
+        """(mean token NLL, token count) per text; see score()."""
+        return [(nll, n) for nll, n, _ in self.score(texts)]
+
+    def _batched_nll(self, ids: List[List[int]]) -> List[float]:
+        out = [math.nan] * len(ids)
+        order = sorted(range(len(ids)), key=lambda i: len(ids[i]))
+        device = self._device()
+
+        for start in range(0, len(order), self.batch_size):
+            chunk = order[start:start + self.batch_size]
+            width = len(ids[chunk[-1]])
+            input_ids = torch.full((len(chunk), width), self.pad_id, dtype=torch.long)
+            mask = torch.zeros((len(chunk), width), dtype=torch.long)
+            for row, i in enumerate(chunk):
+                input_ids[row, :len(ids[i])] = torch.tensor(ids[i], dtype=torch.long)
+                mask[row, :len(ids[i])] = 1
+            input_ids, mask = input_ids.to(device), mask.to(device)
+
+            with torch.no_grad():
+                logits = self.model(input_ids=input_ids, attention_mask=mask).logits
+            count_inference(self.name, len(chunk))
+            # token t is predicted from positions < t
+            nll = F.cross_entropy(logits[:, :-1].transpose(1, 2).float(), input_ids[:, 1:], reduction="none")
+            target_mask = mask[:, 1:].to(nll.dtype)
+            mean_nll = (nll * target_mask).sum(dim=1) / target_mask.sum(dim=1)
+            for row, i in enumerate(chunk):
+                out[i] = float(mean_nll[row])
+        return out
+
+    def _windowed_nll(self, ids: List[int], threshold: Optional[float]) -> Tuple[float, int]:
+        """(estimated mean token NLL, tokens scored) for a text longer than the window."""
+        n_segments = math.ceil((len(ids) - 1) / self.stride)  # segment j predicts tokens 1 + j*stride ...
+        k = min(n_segments, self.max_scored_tokens // self.stride)
+        segments = sorted({round(j * (n_segments - 1) / max(k - 1, 1)) for j in range(k)})
+        device = self._device()
+        nlls = []
+        for j in _spread_order(segments):
+            first = 1 + j * self.stride
+            end = min(first + self.stride, len(ids))
+            begin = max(0, end - self.window)
+            input_ids = torch.tensor([ids[begin:end]], dtype=torch.long, device=device)
+            with torch.no_grad():
+                logits = self.model(input_ids=input_ids, attention_mask=torch.ones_like(input_ids)).logits
+            count_inference(self.name, 1)
+            nlls.append(F.cross_entropy(logits[0, first - 1 - begin:end - 1 - begin].float(),
+                                        input_ids[0, first - begin:], reduction="none"))
+            if threshold is not None and len(nlls) >= EARLY_EXIT_MIN_SEGMENTS:
+                means = torch.stack([x.mean() for x in nlls])
+                stderr = float(means.std()) / math.sqrt(len(nlls))
+                if abs(float(torch.cat(nlls).mean()) - threshold) > EARLY_EXIT_Z * stderr:
+                    break
+        seen = torch.cat(nlls)
+        return float(seen.mean()), int(seen.numel())
+
+    def perplexities(self, texts: Sequence[str]) -> List[float]:
+        return [math.exp(nll) for nll, _ in self.token_nll(texts)]
+
+
+def scorer_from_env(model, tokenizer, prefix: str) -> PerplexityScorer:
+    """
+    PerplexityScorer sized by <prefix>_PPL_WINDOW, <prefix>_PPL_STRIDE and
+    <prefix>_PPL_MAX_TOKENS (the per-text scoring budget).
+    """
+    stride = os.getenv(f"{prefix}_PPL_STRIDE")
+    return PerplexityScorer(model, tokenizer,
+                            window=int(os.getenv(f"{prefix}_PPL_WINDOW", DEFAULT_WINDOW)),
+                            stride=int(stride) if stride else None,
+                            max_scored_tokens=int(os.getenv(f"{prefix}_PPL_MAX_TOKENS", DEFAULT_MAX_SCORED_TOKENS)))
@@ -1,5 +1,5 @@
 import re
-from typing import Tuple, List, Dict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 # Keywords we consider sensitive; add more as needed.
 SENSITIVE_KEYWORDS = [
@@ -31,6 +31,12 @@ _PATTERNS = [
 # compile for performance
 _COMPILED = [re.compile(p) for p in _PATTERNS]
 
+# crude regex for long tokens (20+ chars) of letters/digits/+/=/_/-
+_ENTROPY_RE = re.compile(r'\b[A-Za-z0-9_\-+/=]{20,}\b')
+
+# Non-ASCII characters that IGNORECASE matching treats as ASCII letters.
+_FOLD = str.maketrans({"\u0130": "i", "\u0131": "i", "\u017f": "s", "\u212a": "k"})
+
 
 def _replace_match_with_redaction(text: str, match: re.Match) -> Tuple[str, Dict]:
     """
@@ -53,6 +59,67 @@ def _replace_match_with_redaction(text: str, match: re.Match) -> Tuple[str, Dict
     return redacted_fragment, metadata
 
 
+def _keyword_positions(text: str) -> Optional[List[int]]:
+    """
+    Sorted start offsets of every SENSITIVE_KEYWORDS occurrence, found with
+    str.find on a case-folded copy (far cheaper than an IGNORECASE regex).
+    None if folding changed the length, i.e. offsets can't be mapped back.
+    """
+    folded = text.lower() if text.isascii() else text.translate(_FOLD).lower()
+    if len(folded) != len(text):
+        return None
+    positions = set()
+    for kw in SENSITIVE_KEYWORDS:
+        i = folded.find(kw)
+        while i != -1:
+            positions.add(i)
+            i = folded.find(kw, i + 1)
+    return sorted(positions)
+
+
+def _candidate_starts(text: str, positions: List[int]) -> List[int]:
+    """
+    Every offset where a _PATTERNS match could begin. Each pattern starts at
+    its keyword, one quote before it, or (the "my/the password is" form) at
+    the whitespace and my/the right before it.
+    """
+    starts = set()
+    for k in positions:
+        j = k
+        while j > 0 and text[j - 1].isspace():
+            j -= 1
+        starts.update(range(j, k + 1))
+        starts.update(s for s in (k - 1, j - 2, j - 3) if s >= 0)
+    return sorted(starts)
+
+
+def _matches_at(pattern: re.Pattern, text: str, starts: List[int]) -> Iterator[re.Match]:
+    """Same matches as pattern.finditer(text), given every offset a match may start at."""
+    end = 0
+    for s in starts:
+        if s < end:
+            continue
+        m = pattern.match(text, s)
+        if m is not None:
+            yield m
+            end = m.end()
+
+
+def _redact_matches(text: str, matches: Iterable[re.Match], redactions: List[Dict[str, str]]) -> str:
+    parts = []
+    last_end = 0
+    for m in matches:
+        parts.append(text[last_end:m.start()])
+        redacted_fragment, metadata = _replace_match_with_redaction(text, m)
+        parts.append(redacted_fragment)
+        redactions.append(metadata)
+        last_end = m.end()
+    if not parts:
+        return text
+    parts.append(text[last_end:])
+    return "".join(parts)
+
+
 def sandbox_postprocess(response: str) -> Tuple[str, List[Dict[str, str]]]:
     """
     Redact sensitive values from the response.
@@ -64,40 +131,120 @@ def sandbox_postprocess(response: str) -> Tuple[str, List[Dict[str, str]]]:
     text = response
     redactions: List[Dict[str, str]] = []
 
-    # Iterate patterns and progressively replace matches.
-    # We use a loop to allow multiple different sensitive tokens in the string.
+    # Patterns still apply one after another (a later one sees the earlier
+    # redactions), but every match needs a keyword: one keyword scan tells
+    # us where to try them, and keyword-free text skips them entirely.
+    positions = _keyword_positions(text)
     for pattern in _COMPILED:
-        # For each match in the current text, replace and record metadata.
-        # Use finditer on the current text (we will rebuild text as we replace)
-        offset = 0
-        new_text_parts = []
-        last_end = 0
-        for m in pattern.finditer(text):
-            # m.span() gives indices in current text
-            start, end = m.span()
-            # append text between last_end and start
-            new_text_parts.append(text[last_end:start])
-            redacted_fragment, metadata = _replace_match_with_redaction(text, m)
-            new_text_parts.append(redacted_fragment)
-            redactions.append(metadata)
-            last_end = end
-        new_text_parts.append(text[last_end:])
-        text = "".join(new_text_parts)
+        if positions is None:
+            matches = pattern.finditer(text)
+        elif positions:
+            matches = _matches_at(pattern, text, _candidate_starts(text, positions))
+        else:
+            break
+        new_text = _redact_matches(text, matches, redactions)
+        if new_text is not text:
+            text = new_text
+            if positions is not None:
+                positions = _keyword_positions(text)
 
     # Extra safety: redact long-looking base64-like or high-entropy tokens (optional heuristic)
     # e.g., strings of length >= 20 with mix of letters/digits/+/
-    def _entropy_redact(s: str) -> Tuple[str, List[Dict[str, str]]]:
-        extra_redacts = []
-        def repl(m):
-            token = m.group(0)
-            extra_redacts.append({"keyword": "high_entropy_token", "original_value": token})
-            return "[REDACTED]"
-        # crude regex for long tokens (20+ chars) of letters/digits/+/=/_/-
-        pattern = re.compile(r'\b[A-Za-z0-9_\-+/=]{20,}\b')
-        new_s, n = pattern.subn(repl, s)
-        return new_s, extra_redacts
-
-    text, extra = _entropy_redact(text)
-    redactions.extend(extra)
-
-    return text, redactions
\ No newline at end of file
+    def repl(m: re.Match) -> str:
+        redactions.append({"keyword": "high_entropy_token", "original_value": m.group(0)})
+        return "[REDACTED]"
+
+    text = _ENTROPY_RE.sub(repl, text)
+    return text, redactions
+
+
+_KW_ALT = r'|'.join(map(re.escape, SENSITIVE_KEYWORDS))
+
+# Tails of a stream that may still grow into a _PATTERNS match: a keyword
+# (with the my/the and whitespace the "is" pattern's match starts at)
+# followed only by separators and at most a partial value, a trailing
+# my/the (plus a partial word) that a keyword may still follow, an unclosed JSON-style quoted
+# value, or a multi-word keyword cut off between words.
+_OPEN_TAILS = [
+    re.compile(r'(?i)\b(?:my|the)\s*\S*$'),
+    re.compile(r'(?i)(?:\b(?:my|the))?\s*(' + _KW_ALT + r')["\']?[\s:=]*(?:(?:is|was)\s*)?["\']?[^\s"\'<>`]*$'),
+    re.compile(r'(?i)["\'](' + _KW_ALT + r')["\']\s*:\s*["\'][^"\']*$'),
+] + [
+    re.compile(r'(?i)' + re.escape(" ".join(words[:i])) + r' \S*$')
+    for words in (kw.split(" ") for kw in SENSITIVE_KEYWORDS if " " in kw)
+    for i in range(1, len(words))
+]
+
+DEFAULT_MAX_HOLDBACK = 1024
+
+
+class StreamingRedactor:
+    """
+    Incremental sandbox_postprocess for responses that arrive in chunks.
+
+    feed() returns the part of the stream that can no longer be affected by
+    later text, already redacted, plus the redactions found in it; only the
+    tail that could still complete a `keyword: value` match or a long token
+    is held back (the current partial word at minimum). Cuts always fall on
+    whitespace, so the concatenated output equals sandbox_postprocess() on
+    the whole response, with the same redactions; their order can differ,
+    since each emitted piece gets its own high-entropy pass. A held-back tail longer than max_holdback (e.g. an
+    unterminated quoted value) is flushed as-is to keep memory bounded.
+    """
+
+    def __init__(self, max_holdback: int = DEFAULT_MAX_HOLDBACK):
+        self.max_holdback = int(max_holdback)
+        self.redactions: List[Dict[str, str]] = []
+        self._pending = ""
+
+    def _safe_cut(self, text: str) -> int:
+        cut = len(text)
+        for rx in _OPEN_TAILS:
+            m = rx.search(text)
+            if m is not None and m.start() < cut:
+                cut = m.start()
+        moved = True
+        while moved:
+            # back up to whitespace so no word boundary straddles the cut ...
+            while cut > 0 and not text[cut - 1].isspace():
+                cut -= 1
+            # ... and to the start of any complete match it would split
+            moved = False
+            for pattern in _COMPILED:
+                for m in pattern.finditer(text):
+                    if m.start() < cut < m.end():
+                        cut, moved = m.start(), True
+        if len(text) - cut > self.max_holdback:
+            cut = len(text)
+        return cut
+
+    def _emit(self, text: str) -> Tuple[str, List[Dict[str, str]]]:
+        if not text:
+            return "", []
+        redacted, redactions = sandbox_postprocess(text)
+        self.redactions.extend(redactions)
+        return redacted, redactions
+
+    def feed(self, chunk: str) -> Tuple[str, List[Dict[str, str]]]:
+        self._pending += chunk
+        cut = self._safe_cut(self._pending)
+        head, self._pending = self._pending[:cut], self._pending[cut:]
+        return self._emit(head)
+
+    def close(self) -> Tuple[str, List[Dict[str, str]]]:
+        """Flush whatever is still held back (end of the response)."""
+        head, self._pending = self._pending, ""
+        return self._emit(head)
+
+
+def sandbox_postprocess_stream(chunks: Iterable[str],
+                               max_holdback: int = DEFAULT_MAX_HOLDBACK) -> Iterator[Tuple[str, List[Dict[str, str]]]]:
+    """Yield (redacted_text, redactions) as soon as each piece of the stream is safe."""
+    redactor = StreamingRedactor(max_holdback)
+    for chunk in chunks:
+        out = redactor.feed(chunk)
+        if out[0]:
+            yield out
+    out = redactor.close()
+    if out[0]:
+        yield out
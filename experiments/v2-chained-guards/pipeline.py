@@ -1,9 +1,15 @@
 import time
-from typing import Dict, Any
-from guards.prefilter import prefilter_check
-from guards.embedding_check import embedding_check
-from guards.llm_self_check import llm_self_check
-from guards.sandbox_postprocess import sandbox_postprocess
+from contextlib import closing
+from typing import Dict, Any, Optional
+from core.decision_cache import DecisionCache, fingerprint
+from core.executor import get_executor
+from core.metrics import observe_layer, observe_request
+from guards.prefilter import BLACKLIST_PATTERNS, prefilter_check
+from guards.embedding_check import MODEL_NAME as EMBEDDING_MODEL, POLICY_TEMPLATES, embedding_check, exemplar_check, exemplar_index_version, warmup as warmup_embedding_check
+from guards.model_registry import default_backend
+from guards.micro_batcher import thread_cpu_ns
+from guards.llm_self_check import SUSPICIOUS_KEYWORDS, llm_self_check, warmup as warmup_llm_self_check
+from guards.sandbox_postprocess import SENSITIVE_KEYWORDS, sandbox_postprocess
 
 DEFAULT_LAYERS = [
     "prefilter",
@@ -12,45 +18,152 @@ DEFAULT_LAYERS = [
     "sandbox_postprocess",
 ]
 
+# layers that load a model on first use
+WARMUPS = {
+    "embedding_check": warmup_embedding_check,
+    "llm_self_check": warmup_llm_self_check,
+}
+
+def warmup(layers=None) -> None:
+    """Load the models behind `layers` and run one dummy pass through each."""
+    for layer in layers or DEFAULT_LAYERS:
+        fn = WARMUPS.get(layer)
+        if fn is not None:
+            fn()
+
+def config_fingerprint(layers) -> str:
+    """Hash of the layer list and the rules/models (and inference backend) each layer decides with."""
+    return fingerprint(
+        list(layers),
+        BLACKLIST_PATTERNS,
+        [EMBEDDING_MODEL, POLICY_TEMPLATES, default_backend(), exemplar_index_version()],
+        SUSPICIOUS_KEYWORDS,
+        SENSITIVE_KEYWORDS,
+    )
+
+def _prefilter_layer(prompt: str):
+    mal, reason = prefilter_check(prompt)
+    entry = {"layer": "prefilter", "malicious": mal, "reason": reason}
+    return entry, ("blocked", reason) if mal else None
+
+def _embedding_layer(prompt: str):
+    mal, sim = embedding_check(prompt)
+    entry = {"layer": "embedding_check", "malicious": mal, "sim": sim}
+    if exemplar_index_version() is not None:
+        hit, neighbors = exemplar_check(prompt)
+        entry["exemplars"] = neighbors
+        if hit and not mal:
+            entry["malicious"] = True
+            return entry, ("flagged", f"exemplar:{neighbors[0]['id']}:{neighbors[0]['sim']:.3f}")
+    return entry, ("flagged", f"low_sim:{sim:.3f}") if mal else None
+
+def _llm_layer(prompt: str):
+    mal, explanation = llm_self_check(prompt)
+    entry = {"layer": "llm_self_check", "malicious": mal, "explanation": explanation}
+    return entry, ("flagged", explanation) if mal else None
+
+# checking layers in chain order; each returns (layer entry, (status, reason) or None)
+CHECKS = [
+    ("prefilter", _prefilter_layer),
+    ("embedding_check", _embedding_layer),
+    ("llm_self_check", _llm_layer),
+]
+
+def _sandbox_layer(raw_response: str):
+    processed, redactions = sandbox_postprocess(raw_response)
+    return {"layer": "sandbox_postprocess", "redactions": redactions}, processed
+
+def _timed(fn, arg: str):
+    """
+    Run one layer; its wall time goes into the entry and, with the CPU time
+    of the thread it ran on plus its share of batched model work, into the
+    /metrics histograms.
+    """
+    t0, c0 = time.perf_counter_ns(), thread_cpu_ns()
+    entry, out = fn(arg)
+    wall, cpu = time.perf_counter_ns() - t0, thread_cpu_ns() - c0
+    entry["latency_ms"] = round(wall / 1e6, 3)
+    observe_layer(entry["layer"], wall, cpu)
+    return entry, out
+
+def _sequential(prompt: str, checks):
+    for _, fn in checks:
+        yield _timed(fn, prompt)
+
+def _speculative(prompt: str, checks):
+    """
+    Same outcomes, in the same order, as _sequential - but every layer after
+    the first starts on the shared pool right away. Once the consumer stops
+    (a layer blocked), layers that haven't started are cancelled and results
+    of the ones already running are discarded.
+    """
+    pool = get_executor()
+    futures = [pool.submit(_timed, fn, prompt) for _, fn in checks[1:]]
+    try:
+        if checks:
+            yield _timed(checks[0][1], prompt)
+        for f in futures:
+            yield f.result()
+    finally:
+        for f in futures:
+            f.cancel()
+
 class ChainedGuardsPipeline:
-    def __init__(self, layers=None):
+    def __init__(self, layers=None, concurrent: bool = False, cache: Optional[DecisionCache] = None):
         self.layers = layers or DEFAULT_LAYERS
+        # True: run model-backed layers concurrently on the shared thread pool
+        # (lower wall-clock latency, same results as sequential)
+        self.concurrent = concurrent
+        # optional shared cache of final results for repeated prompts
+        self.cache = cache
+        self.fingerprint = config_fingerprint(self.layers)
 
     def run(self, prompt: str) -> Dict[str, Any]:
-        results = {"prompt": prompt, "start_ts": time.time(), "layers": [], "final": {}}
-
-        if "prefilter" in self.layers:
-            mal, reason = prefilter_check(prompt)
-            results["layers"].append({"layer": "prefilter", "malicious": mal, "reason": reason})
-            if mal:
-                return self._final(results, "blocked", reason)
+        if self.cache is None:
+            return self._evaluate(prompt)
+        t0 = time.perf_counter_ns()
+        key = self.cache.key(prompt, self.fingerprint)
+        hit = self.cache.get(key)
+        if hit is not None:
+            results, age = hit
+            results.update(prompt=prompt, start_ts=time.time(), cached=True, cache_age_ms=round(age * 1000, 3))
+            wall = time.perf_counter_ns() - t0
+            results["latency_ms"] = round(wall / 1e6, 3)
+            observe_request(results["final"]["status"], wall)
+            return results
+        results = self._evaluate(prompt)
+        self.cache.put(key, results)
+        results["cached"] = False
+        return results
 
-        if "embedding_check" in self.layers:
-            mal, sim = embedding_check(prompt)
-            results["layers"].append({"layer": "embedding_check", "malicious": mal, "sim": sim})
-            if mal:
-                return self._final(results, "flagged", f"low_sim:{sim:.3f}")
+    def _evaluate(self, prompt: str) -> Dict[str, Any]:
+        results = {"prompt": prompt, "start_ts": time.time(), "layers": [], "final": {}}
+        t0 = time.perf_counter_ns()  # latency uses the monotonic clock; start_ts is just a timestamp
 
-        if "llm_self_check" in self.layers:
-            mal, explanation = llm_self_check(prompt)
-            results["layers"].append({"layer": "llm_self_check", "malicious": mal, "explanation": explanation})
-            if mal:
-                return self._final(results, "flagged", explanation)
+        checks = [(name, fn) for name, fn in CHECKS if name in self.layers]
+        runner = _speculative if self.concurrent else _sequential
+        with closing(runner(prompt, checks)) as outcomes:
+            for entry, verdict in outcomes:
+                results["layers"].append(entry)
+                if verdict is not None:
+                    return self._final(results, t0, *verdict)
 
         raw_response = f"[LLM] safe answer to: {prompt}"
 
         if "sandbox_postprocess" in self.layers:
-            processed, redactions = sandbox_postprocess(raw_response)
-            results["layers"].append({"layer": "sandbox_postprocess", "redactions": redactions})
-            return self._final(results, "delivered", processed)
+            entry, processed = _timed(_sandbox_layer, raw_response)
+            results["layers"].append(entry)
+            return self._final(results, t0, "delivered", processed)
 
-        return self._final(results, "delivered", raw_response)
+        return self._final(results, t0, "delivered", raw_response)
 
-    def _final(self, results: Dict[str, Any], status: str, payload: str):
+    def _final(self, results: Dict[str, Any], t0: int, status: str, payload: str):
         results["final"] = {"status": status}
         if status == "delivered":
             results["final"]["response"] = payload
         else:
             results["final"]["reason"] = payload
-        results["latency_ms"] = int((time.time() - results["start_ts"]) * 1000)
+        wall = time.perf_counter_ns() - t0
+        results["latency_ms"] = round(wall / 1e6, 3)
+        observe_request(status, wall)
         return results
\ No newline at end of file
@@ -0,0 +1,130 @@
+# runner/backend_drift.py
+"""
+Accuracy drift of the int8 / ONNX inference backends against fp32 torch.
+
+    python -m runner.backend_drift --backends int8,onnx --json drift.json \
+        --max-cos-drift 0.02 --max-ppl-drift 0.05
+
+Every corpus prompt is embedded with MiniLM and scored with distilgpt2 on
+each backend. Reported per backend: cosine between its embeddings and the
+fp32 ones, drift of the max policy similarity the embedding check
+thresholds on, relative drift of the llm_self_check perplexity score, how
+many decisions flip, per-prompt latency and resident model memory. Exit
+code is 1 if a backend drifts past --max-cos-drift (1 - min cosine) or
+--max-ppl-drift (max relative perplexity change).
+"""
+import argparse
+import json
+import math
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from guards.embedding_check import MODEL_NAME, POLICY_TEMPLATES
+from guards.llm_self_check import PPL_THRESHOLD
+from guards.model_registry import CAUSAL_LM, REGISTRY, SENTENCE_TRANSFORMER
+from guards.perplexity import PerplexityScorer
+from runner.run_benchmark import DEFAULT_CORPUS_PATH, load_attack_corpus
+
+LM_NAME = "distilgpt2"
+EMBEDDING_THRESHOLD = 0.3  # embedding_check default
+
+def _unit(m: np.ndarray) -> np.ndarray:
+    m = np.asarray(m, dtype=np.float32)
+    return m / (np.linalg.norm(m, axis=1, keepdims=True) + 1e-12)
+
+def measure(backend: str, prompts: Sequence[str]) -> Dict[str, Any]:
+    """Raw outputs of one backend: unit embeddings, max policy similarity, perplexity score."""
+    st = REGISTRY.acquire(SENTENCE_TRANSFORMER, MODEL_NAME, backend=backend)
+    lm = REGISTRY.acquire(CAUSAL_LM, LM_NAME, backend=backend)
+    try:
+        policy = _unit(st.model.encode(list(POLICY_TEMPLATES), convert_to_numpy=True, show_progress_bar=False))
+        scorer = PerplexityScorer(lm.model, lm.tokenizer)
+        t0 = time.perf_counter()
+        vecs = _unit(st.model.encode(list(prompts), convert_to_numpy=True, show_progress_bar=False))
+        t1 = time.perf_counter()
+        nll = scorer.token_nll(prompts)
+        t2 = time.perf_counter()
+        return {
+            "vecs": vecs,
+            "max_sim": (vecs @ policy.T).max(axis=1),
+            "ppl": np.array([math.exp(x) / max(n, 1) for x, n in nll], dtype=np.float64),
+            "embed_ms": (t1 - t0) * 1000 / max(len(prompts), 1),
+            "ppl_ms": (t2 - t1) * 1000 / max(len(prompts), 1),
+            "bytes": st.nbytes + lm.nbytes,
+        }
+    finally:
+        REGISTRY.release(st, unload=True)
+        REGISTRY.release(lm, unload=True)
+
+def compare(base: Dict[str, Any], cur: Dict[str, Any]) -> Dict[str, Any]:
+    cos = (base["vecs"] * cur["vecs"]).sum(axis=1)
+    sim_drift = np.abs(cur["max_sim"] - base["max_sim"])
+    ok = np.isfinite(base["ppl"]) & np.isfinite(cur["ppl"])  # too-short prompts have no perplexity
+    rel = np.abs(cur["ppl"][ok] - base["ppl"][ok]) / np.maximum(np.abs(base["ppl"][ok]), 1e-12)
+    return {
+        "cosine": {"mean": round(float(cos.mean()), 6), "min": round(float(cos.min()), 6)},
+        "max_sim_drift": {"mean": round(float(sim_drift.mean()), 6), "max": round(float(sim_drift.max()), 6)},
+        "embedding_flips": int(((base["max_sim"] < EMBEDDING_THRESHOLD) != (cur["max_sim"] < EMBEDDING_THRESHOLD)).sum()),
+        "ppl_rel_drift": {"mean": round(float(rel.mean()), 6) if rel.size else 0.0,
+                          "max": round(float(rel.max()), 6) if rel.size else 0.0},
+        "llm_flips": int(((base["ppl"][ok] > PPL_THRESHOLD) != (cur["ppl"][ok] > PPL_THRESHOLD)).sum()),
+    }
+
+def _summary(m: Dict[str, Any]) -> Dict[str, Any]:
+    return {"embed_ms": round(m["embed_ms"], 3), "ppl_ms": round(m["ppl_ms"], 3), "bytes": m["bytes"]}
+
+def run(backends: Sequence[str], corpus_path: str = "") -> Dict[str, Any]:
+    prompts = [str(p) for p in load_attack_corpus(Path(corpus_path) if corpus_path else DEFAULT_CORPUS_PATH)]
+    base = measure("torch", prompts)
+    report = {"corpus_size": len(prompts), "baseline": _summary(base), "backends": {}}
+    for backend in backends:
+        cur = measure(backend, prompts)
+        report["backends"][backend] = {**_summary(cur), **compare(base, cur)}
+    return report
+
+def violations(report: Dict[str, Any], max_cos_drift: float, max_ppl_drift: float) -> List[str]:
+    out = []
+    for name, r in report["backends"].items():
+        if 1 - r["cosine"]["min"] > max_cos_drift:
+            out.append(f"{name}: min cosine {r['cosine']['min']:.4f} (allowed drift {max_cos_drift})")
+        if r["ppl_rel_drift"]["max"] > max_ppl_drift:
+            out.append(f"{name}: perplexity drift {r['ppl_rel_drift']['max']:.2%} (allowed {max_ppl_drift:.2%})")
+    return out
+
+def print_report(report: Dict[str, Any]) -> None:
+    b = report["baseline"]
+    print(f"--- Backend drift vs fp32 ({report['corpus_size']} prompts) ---")
+    print(f"torch  embed {b['embed_ms']:.2f} ms | ppl {b['ppl_ms']:.2f} ms | {b['bytes'] / 2**20:.1f} MiB")
+    for name, r in report["backends"].items():
+        print(f"{name:<6} embed {r['embed_ms']:.2f} ms | ppl {r['ppl_ms']:.2f} ms | {r['bytes'] / 2**20:.1f} MiB")
+        print(f"       cosine mean {r['cosine']['mean']:.4f} min {r['cosine']['min']:.4f} | "
+              f"max-sim drift {r['max_sim_drift']['max']:.4f} | embedding flips {r['embedding_flips']}")
+        print(f"       perplexity drift mean {r['ppl_rel_drift']['mean']:.2%} max {r['ppl_rel_drift']['max']:.2%} "
+              f"| llm flips {r['llm_flips']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", default="int8,onnx", help="Comma-separated backends to compare with torch")
+    parser.add_argument("--corpus", default="", help="Optional path to attack_corpus.json")
+    parser.add_argument("--json", default="", help="Write the report as JSON to this path ('-' for stdout)")
+    parser.add_argument("--max-cos-drift", type=float, default=0.02, help="Allowed 1 - min embedding cosine")
+    parser.add_argument("--max-ppl-drift", type=float, default=0.05,
+                        help="Allowed max relative perplexity change (0.05 = 5%%)")
+    args = parser.parse_args()
+
+    report = run([b.strip() for b in args.backends.split(",") if b.strip()], args.corpus)
+    if args.json == "-":
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+        if args.json:
+            Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    problems = violations(report, args.max_cos_drift, args.max_ppl_drift)
+    for p in problems:
+        print(f"DRIFT {p}", file=sys.stderr)
+    sys.exit(1 if problems else 0)
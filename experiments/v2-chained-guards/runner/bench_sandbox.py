@@ -0,0 +1,71 @@
+# runner/bench_sandbox.py
+"""
+Throughput benchmark for sandbox_postprocess on long responses.
+
+    python -m runner.bench_sandbox --sizes 1000,100000,1000000 --repeat 5
+
+Each size is measured on two synthetic responses: plain prose with no
+sensitive keywords (the common case, which skips the keyword patterns)
+and the same prose with a `password: ...` pair every 100 words.
+"""
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from guards.sandbox_postprocess import sandbox_postprocess
+
+WORDS = ("the quick brown fox jumps over a lazy dog while the model explains "
+         "how to configure the service and which settings matter most").split()
+
+def make_response(size: int, with_secrets: bool, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    out: List[str] = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        if with_secrets and len(out) % 100 == 50:
+            word = f"password: hunter{rng.randint(0, 99)}"
+        out.append(word)
+        length += len(word) + 1
+    return " ".join(out)[:size]
+
+def bench(sizes, repeat: int = 5) -> List[Dict[str, Any]]:
+    rows = []
+    for size in sizes:
+        for with_secrets in (False, True):
+            text = make_response(size, with_secrets)
+            times = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                _, redactions = sandbox_postprocess(text)
+                times.append(time.perf_counter() - t0)
+            best = min(times)
+            rows.append({
+                "size": size,
+                "secrets": with_secrets,
+                "redactions": len(redactions),
+                "best_ms": round(best * 1000, 3),
+                "mean_ms": round(sum(times) / len(times) * 1000, 3),
+                "mb_per_s": round(size / best / 1e6, 2) if best > 0 else 0.0,
+            })
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="Comma-separated response sizes in chars")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per size")
+    parser.add_argument("--json", action="store_true", help="Print rows as JSON")
+    args = parser.parse_args()
+    rows = bench([int(s) for s in args.sizes.split(",") if s.strip()], repeat=args.repeat)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print("--- sandbox_postprocess ---")
+        for r in rows:
+            print(f"{r['size']:>9} chars | secrets {str(r['secrets']):<5} | redactions {r['redactions']:>5} "
+                  f"| best {r['best_ms']:9.3f} ms | mean {r['mean_ms']:9.3f} ms | {r['mb_per_s']:7.2f} MB/s")
@@ -0,0 +1,48 @@
+# runner/build_exemplar_index.py
+"""
+Embed labelled exemplar prompts and save them as an ExemplarIndex.
+
+    python -m runner.build_exemplar_index exemplars.jsonl --out exemplar_index --dtype int8
+    V2_EXEMPLAR_INDEX=exemplar_index python -m core.app
+
+Inputs are JSONL ({"text", "label", "id"} per line) or JSON lists of
+strings, labelled with --label. With --ivf auto (the default) indexes of
+IVF_MIN_ROWS rows or more are split into about sqrt(rows) k-means lists.
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from guards.embedding_check import MODEL_NAME
+from guards.exemplar_index import DTYPES, build_index, read_exemplars
+from guards.model_registry import sentence_transformer
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("inputs", nargs="+", help="Exemplar JSONL files or JSON lists of prompts")
+    parser.add_argument("--out", default="exemplar_index", help="Index directory")
+    parser.add_argument("--label", default="attack", help="Label for prompts given without one")
+    parser.add_argument("--dtype", choices=DTYPES, default="float16", help="Stored vector type")
+    parser.add_argument("--ivf", choices=["auto", "on", "off"], default="auto", help="Coarse k-means lists")
+    parser.add_argument("--lists", type=int, default=0, help="Number of lists with --ivf on (0 = sqrt(rows))")
+    args = parser.parse_args()
+
+    records = read_exemplars(args.inputs, default_label=args.label)
+    n_lists = None
+    if args.ivf == "off":
+        n_lists = 0
+    elif args.ivf == "on":
+        n_lists = args.lists or max(1, int(len(records) ** 0.5))
+    t0 = time.perf_counter()
+    index = build_index(sentence_transformer(MODEL_NAME), records, dtype=args.dtype, n_lists=n_lists,
+                        model_name=MODEL_NAME)
+    index.save(args.out)
+    labels = {}
+    for label in index.labels:
+        labels[label] = labels.get(label, 0) + 1
+    print(json.dumps({"out": args.out, "rows": len(index), "labels": labels, "dtype": args.dtype,
+                      "lists": 0 if index.centroids is None else len(index.centroids),
+                      "bytes": index.nbytes, "seconds": round(time.perf_counter() - t0, 2)}))
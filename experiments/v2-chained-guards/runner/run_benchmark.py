@@ -1,8 +1,22 @@
 # runner/run_benchmark.py
+"""
+Latency / throughput benchmark for the chained-guards pipeline.
+
+    python -m runner.run_benchmark --layers prefilter,embedding_check --iterations 5 \
+        --concurrency 8 --json out.json --baseline baseline.json --tolerance 0.10
+
+Latencies are measured around pipeline.run() with time.perf_counter();
+warmup requests are excluded. With --baseline, p50/p90/p99 and throughput
+are compared against a previous --json report and the exit code is 1 if
+any of them regressed by more than --tolerance.
+"""
 import argparse
 import json
+import math
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, Dict, List, Sequence
 
 import sys
 sys.path.append(str(Path(__file__).resolve().parents[1]))
@@ -10,6 +24,14 @@ from pipeline import ChainedGuardsPipeline
 
 DEFAULT_CORPUS_PATH = Path(__file__).resolve().parents[1] / "tests" / "attack_corpus.json"
 
+# metric -> True if higher is worse
+COMPARED_METRICS = {
+    "latency_ms.p50": True,
+    "latency_ms.p90": True,
+    "latency_ms.p99": True,
+    "throughput_rps": False,
+}
+
 def load_attack_corpus(path: Path):
     if path.exists():
         with open(path, "r", encoding="utf-8") as f:
@@ -22,35 +44,140 @@ def load_attack_corpus(path: Path):
         "Delete all entries from the users table."
     ]
 
-def run(layers, corpus_path):
-    corpus = load_attack_corpus(Path(corpus_path) if corpus_path else DEFAULT_CORPUS_PATH)
-    pipeline = ChainedGuardsPipeline(layers=layers)
-    stats = {"total": 0, "blocked": 0, "flagged": 0, "delivered": 0, "latencies": []}
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list (q in [0, 100])."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return float(sorted_values[min(rank, len(sorted_values)) - 1])
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    v = sorted(values)
+    return {
+        "count": len(v),
+        "mean": round(sum(v) / len(v), 3) if v else 0.0,
+        "p50": round(percentile(v, 50), 3),
+        "p90": round(percentile(v, 90), 3),
+        "p99": round(percentile(v, 99), 3),
+        "max": round(v[-1], 3) if v else 0.0,
+    }
 
-    for prompt in corpus:
-        stats["total"] += 1
-        t0 = time.time()
+def run(layers, corpus_path, iterations: int = 1, warmup: int = 5,
+        concurrency: int = 1, concurrent_layers: bool = False) -> Dict[str, Any]:
+    path = Path(corpus_path) if corpus_path else DEFAULT_CORPUS_PATH
+    corpus = load_attack_corpus(path)
+    if not corpus:
+        raise ValueError(f"corpus {path} is empty, nothing to benchmark")
+    pipeline = ChainedGuardsPipeline(layers=layers, concurrent=concurrent_layers)
+    prompts = list(corpus) * max(1, iterations)
+
+    # warmup: model loading, allocator and cache effects stay out of the numbers
+    for i in range(warmup):
+        pipeline.run(corpus[i % len(corpus)])
+
+    def one(prompt):
+        t0 = time.perf_counter()
         res = pipeline.run(prompt)
-        stats["latencies"].append(res.get("latency_ms", 0))
+        return (time.perf_counter() - t0) * 1000, res
+
+    t_start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(one, prompts))
+    else:
+        outcomes = [one(p) for p in prompts]
+    wall = time.perf_counter() - t_start
+
+    counts = {"total": 0, "blocked": 0, "flagged": 0, "delivered": 0}
+    per_layer: Dict[str, List[float]] = {}
+    for _, res in outcomes:
+        counts["total"] += 1
         status = res["final"].get("status")
-        if status == "blocked":
-            stats["blocked"] += 1
-        elif status == "flagged":
-            stats["flagged"] += 1
-        elif status == "delivered":
-            stats["delivered"] += 1
-
-    avg_latency = sum(stats["latencies"]) / len(stats["latencies"]) if stats["latencies"] else 0.0
+        if status in counts:
+            counts[status] += 1
+        for layer in res["layers"]:
+            per_layer.setdefault(layer["layer"], []).append(layer.get("latency_ms", 0.0))
+
+    return {
+        "config": {
+            "layers": layers,
+            "corpus_size": len(corpus),
+            "iterations": iterations,
+            "warmup": warmup,
+            "concurrency": concurrency,
+            "concurrent_layers": concurrent_layers,
+        },
+        "counts": counts,
+        "latency_ms": summarize([ms for ms, _ in outcomes]),
+        "throughput_rps": round(len(outcomes) / wall, 3) if wall > 0 else 0.0,
+        "wall_seconds": round(wall, 4),
+        "layers": {name: summarize(v) for name, v in per_layer.items()},
+    }
+
+def _metric(report: Dict[str, Any], dotted: str) -> float:
+    value: Any = report
+    for part in dotted.split("."):
+        value = value[part]
+    return float(value)
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Human-readable regressions of current vs baseline beyond tolerance (fraction)."""
+    regressions = []
+    for name, higher_is_worse in COMPARED_METRICS.items():
+        try:
+            cur, base = _metric(current, name), _metric(baseline, name)
+        except KeyError:
+            continue
+        if base <= 0:
+            continue
+        change = (cur - base) / base
+        if (change > tolerance) if higher_is_worse else (change < -tolerance):
+            regressions.append(f"{name}: {base:.3f} -> {cur:.3f} ({change:+.1%})")
+    return regressions
+
+def print_report(report: Dict[str, Any]) -> None:
+    c, lat = report["counts"], report["latency_ms"]
     print("--- Benchmark Results ---")
-    print(f"layers: {layers}")
-    print(f"total: {stats['total']} | blocked: {stats['blocked']} | flagged: {stats['flagged']} | delivered: {stats['delivered']} | avg latency ms: {avg_latency:.2f}")
-    #print(f"avg latency ms: {avg_latency:.2f}")
+    print(f"layers: {report['config']['layers']} | concurrency: {report['config']['concurrency']}")
+    print(f"total: {c['total']} | blocked: {c['blocked']} | flagged: {c['flagged']} | delivered: {c['delivered']}")
+    print(f"latency ms: mean {lat['mean']:.3f} | p50 {lat['p50']:.3f} | p90 {lat['p90']:.3f} "
+          f"| p99 {lat['p99']:.3f} | max {lat['max']:.3f}")
+    print(f"throughput: {report['throughput_rps']:.1f} req/s ({report['wall_seconds']:.3f}s wall)")
+    for name, s in report["layers"].items():
+        print(f"  {name:<20} n={s['count']:<5} mean {s['mean']:.3f} | p50 {s['p50']:.3f} | p99 {s['p99']:.3f} ms")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--layers", default="prefilter,embedding_check,llm_self_check,sandbox_postprocess",
                         help="Comma-separated layer names")
     parser.add_argument("--corpus", default="", help="Optional path to attack_corpus.json")
+    parser.add_argument("--iterations", type=int, default=1, help="Passes over the corpus")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed requests before measuring")
+    parser.add_argument("--concurrency", type=int, default=1, help="Requests in flight at once")
+    parser.add_argument("--concurrent-layers", action="store_true",
+                        help="Run the pipeline in concurrent (speculative) layer mode")
+    parser.add_argument("--json", default="", help="Write the report as JSON to this path ('-' for stdout)")
+    parser.add_argument("--baseline", default="", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Allowed relative regression vs --baseline (0.10 = 10%%)")
     args = parser.parse_args()
     layers = [l.strip() for l in args.layers.split(",") if l.strip()]
-    run(layers, args.corpus)
\ No newline at end of file
+
+    try:
+        report = run(layers, args.corpus, iterations=args.iterations, warmup=args.warmup,
+                     concurrency=args.concurrency, concurrent_layers=args.concurrent_layers)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.json == "-":
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+        if args.json:
+            Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(report, baseline, args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,52 @@
+import json
+import numpy as np
+import guards.embedding_artifact as artifact
+from guards.embedding_artifact import load_or_build
+
+
+class _Encoder:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, texts):
+        self.calls += 1
+        return np.array([[len(t), 1.0] for t in texts], dtype=np.float32)
+
+
+def test_built_once_then_memory_mapped(tmp_path):
+    build = _Encoder()
+    first = load_or_build("policy", None, "m", ["a", "bb"], build, tmp_path)
+    second = load_or_build("policy", None, "m", ["a", "bb"], build, tmp_path)
+    assert build.calls == 1
+    assert isinstance(second, np.memmap)
+    assert np.array_equal(first, second)
+    assert json.loads((tmp_path / "policy.json").read_text())["shape"] == [2, 2]
+
+
+def test_rebuilt_when_texts_model_or_backend_change(tmp_path, monkeypatch):
+    build = _Encoder()
+    load_or_build("policy", None, "m", ["a", "bb"], build, tmp_path)
+    assert load_or_build("policy", None, "m", ["a", "bbb"], build, tmp_path)[1][0] == 3
+    load_or_build("policy", None, "other-model", ["a", "bbb"], build, tmp_path)
+    monkeypatch.setenv("INFERENCE_BACKEND", "int8")
+    load_or_build("policy", None, "other-model", ["a", "bbb"], build, tmp_path)
+    assert build.calls == 4
+
+
+def test_damaged_artifact_is_rebuilt(tmp_path):
+    build = _Encoder()
+    load_or_build("policy", None, "m", ["a"], build, tmp_path)
+    (tmp_path / "policy.npy").write_bytes(b"not numpy")
+    assert load_or_build("policy", None, "m", ["a"], build, tmp_path).tolist() == [[1.0, 1.0]]
+    assert build.calls == 2
+
+
+def test_policy_matrix_comes_from_the_artifact(tmp_path, monkeypatch):
+    import guards.embedding_check as ec
+    monkeypatch.setattr(artifact, "ARTIFACT_DIR", tmp_path)
+    monkeypatch.setattr(ec, "_POLICY_MATRIX", None)
+    model, policy = ec._get_model()
+    assert isinstance(policy, np.memmap)
+    fresh = ec._normalize_rows(model.encode(ec.POLICY_TEMPLATES, convert_to_numpy=True))
+    assert np.allclose(policy, fresh, atol=1e-5)
+    assert (tmp_path / "policy_templates.json").exists()
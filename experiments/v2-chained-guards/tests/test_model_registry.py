@@ -0,0 +1,114 @@
+import threading
+import torch
+import pytest
+from guards.model_registry import ModelRegistry, default_backend
+
+
+class _Loader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, name, device, dtype, **kwargs):
+        self.calls += 1
+        return torch.nn.Linear(4, 2).to(getattr(torch, dtype)), f"tok:{name}"
+
+
+def _registry():
+    reg = ModelRegistry()
+    loader = _Loader()
+    reg.register_loader("fake", loader)
+    return reg, loader
+
+
+def test_same_key_is_loaded_once_and_shared():
+    reg, loader = _registry()
+    a = reg.acquire("fake", "m")
+    b = reg.acquire("fake", "m")
+    assert a is b and a.model is b.model
+    assert loader.calls == 1
+    assert a.refs == 2
+
+
+def test_dtype_and_device_are_part_of_the_key():
+    reg, loader = _registry()
+    a = reg.acquire("fake", "m", dtype="float32")
+    b = reg.acquire("fake", "m", dtype="float16")
+    assert a is not b
+    assert loader.calls == 2
+    assert b.nbytes == a.nbytes // 2
+
+
+def test_models_are_frozen_for_inference():
+    reg, _ = _registry()
+    m = reg.acquire("fake", "m").model
+    assert not m.training
+    assert all(not p.requires_grad for p in m.parameters())
+
+
+def test_release_and_unload():
+    reg, loader = _registry()
+    a = reg.acquire("fake", "m")
+    reg.acquire("fake", "m")
+    reg.release(a, unload=True)  # still referenced
+    assert reg.get("fake", "m") is a
+    reg.release(a, unload=True)
+    assert reg.get("fake", "m") is None
+    reg.acquire("fake", "m")
+    assert loader.calls == 2
+
+
+def test_concurrent_first_acquire_loads_once():
+    reg, loader = _registry()
+    handles = []
+    threads = [threading.Thread(target=lambda: handles.append(reg.acquire("fake", "m"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert loader.calls == 1
+    assert len({id(h) for h in handles}) == 1
+    assert handles[0].refs == 8
+
+
+def test_report_lists_resident_memory():
+    reg, _ = _registry()
+    reg.acquire("fake", "m")
+    rep = reg.report()
+    assert rep["models"][0]["name"] == "m"
+    assert rep["models"][0]["bytes"] == (4 * 2 + 2) * 4
+    assert rep["total_bytes"] == rep["models"][0]["bytes"]
+
+
+def test_int8_backend_is_a_separate_quantized_handle():
+    def load(name, device, dtype):
+        torch.manual_seed(0)  # same weights for both backends
+        return torch.nn.Sequential(torch.nn.Linear(64, 32)), None
+
+    reg = ModelRegistry()
+    reg.register_loader("fake", load)
+    fp32 = reg.acquire("fake", "m", backend="torch")
+    int8 = reg.acquire("fake", "m", backend="int8")
+    assert fp32 is not int8
+    assert isinstance(int8.model[0], torch.ao.nn.quantized.dynamic.Linear)
+    assert int8.nbytes < fp32.nbytes
+    assert reg.report()["models"][1]["backend"] == "int8"
+    x = torch.randn(3, 64)
+    assert torch.allclose(int8.model(x), fp32.model(x), atol=0.05)
+
+
+def test_onnx_backend_needs_an_onnx_loader():
+    reg, _ = _registry()
+    with pytest.raises(ValueError, match="no onnx loader"):
+        reg.acquire("fake", "m", backend="onnx")
+    with pytest.raises(ValueError, match="unknown backend"):
+        reg.acquire("fake", "m", backend="tpu")
+
+
+def test_default_backend_from_env(monkeypatch):
+    monkeypatch.delenv("INFERENCE_BACKEND", raising=False)
+    assert default_backend() == "torch"
+    monkeypatch.setenv("INFERENCE_BACKEND", "INT8")
+    assert default_backend() == "int8"
+    monkeypatch.setenv("INFERENCE_BACKEND", "fp8")
+    with pytest.raises(ValueError):
+        default_backend()
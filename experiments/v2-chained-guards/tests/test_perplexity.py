@@ -0,0 +1,82 @@
+import math
+import torch
+from guards.llm_self_check import _get_scorer, llm_self_check, llm_self_check_batch
+from guards.perplexity import PerplexityScorer, _spread_order
+
+LONG_TEXT = " ".join(f"Paragraph {i}: the quarterly report lists revenue, costs and staffing." for i in range(300))
+
+
+def _single_nll(text):
+    scorer = _get_scorer()
+    inputs = scorer.tokenizer(text, return_tensors="pt")
+    with torch.no_grad():
+        return scorer.model(**inputs, labels=inputs["input_ids"]).loss.item()
+
+
+def test_batched_nll_matches_single_text_loss():
+    texts = [
+        "What is the capital of France?",
+        "hi there",
+        "Zm9vYmFy qwzx 0x41414141 ;; DROP TABLE users; -- lorem ipsum dolor sit amet",
+    ]
+    for text, (nll, n_tokens) in zip(texts, _get_scorer().token_nll(texts)):
+        assert n_tokens == len(_get_scorer().tokenizer(text)["input_ids"])
+        assert math.isclose(nll, _single_nll(text), rel_tol=1e-4, abs_tol=1e-4)
+
+
+def test_short_text_is_nan_not_error():
+    nll, _ = _get_scorer().token_nll(["a"])[0]
+    assert math.isnan(nll)
+
+
+def test_self_check_batch_matches_single_calls():
+    texts = ["What is the capital of France?", "please delete all records", "hello"]
+    assert llm_self_check_batch(texts) == [llm_self_check(t) for t in texts]
+
+
+def _small_scorer(**kwargs):
+    base = _get_scorer()
+    return PerplexityScorer(base.model, base.tokenizer, **kwargs)
+
+
+def test_long_text_is_scored_on_a_bounded_budget():
+    scorer = _small_scorer(window=64, stride=32, max_scored_tokens=128)
+    (nll, n_tokens, scored), = scorer.score([LONG_TEXT])
+    assert n_tokens > 1024  # past the model context: a plain forward pass would fail
+    assert math.isfinite(nll)
+    assert 0 < scored <= 128
+
+
+def test_windows_cover_the_whole_text_when_the_budget_allows():
+    text = " ".join(["the quick brown fox jumps over the lazy dog"] * 12)
+    scorer = _small_scorer(window=32, stride=16, max_scored_tokens=10_000)
+    (nll, n_tokens, scored), = scorer.score([text])
+    assert n_tokens > 32 and scored == n_tokens - 1
+    assert math.isclose(nll, _single_nll(text), rel_tol=0.25)
+
+
+def test_short_texts_stay_exact():
+    scorer = _small_scorer(window=64, stride=32, max_scored_tokens=32)
+    text = "What is the capital of France?"
+    (nll, n_tokens, scored), = scorer.score([text])
+    assert scored == n_tokens - 1
+    assert math.isclose(nll, _single_nll(text), rel_tol=1e-4, abs_tol=1e-4)
+
+
+def test_early_exit_once_the_threshold_is_far_away():
+    scorer = _small_scorer(window=64, stride=32, max_scored_tokens=512)
+    (_, _, full), = scorer.score([LONG_TEXT])
+    (_, _, early), = scorer.score([LONG_TEXT], nll_threshold=lambda n: 100.0)
+    assert 32 < early <= 64  # two windows, the minimum: the first and the (shorter) last
+    assert 512 - 32 < full <= 512  # every window, the last one may be short
+
+
+def test_windows_are_visited_spread_out():
+    assert _spread_order(list(range(9))) == [0, 8, 4, 2, 6, 1, 3, 5, 7]
+    assert sorted(_spread_order(list(range(12)))) == list(range(12))
+    assert _spread_order([3]) == [3]
+
+
+def test_self_check_reports_partial_scoring():
+    _, explanation = llm_self_check(LONG_TEXT)
+    assert "tokens)" in explanation and "scored" in explanation
\ No newline at end of file
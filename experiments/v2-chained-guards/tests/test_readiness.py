@@ -0,0 +1,33 @@
+import threading
+from core.readiness import Readiness
+
+
+def test_ready_only_after_warmup_finishes():
+    gate = threading.Event()
+    r = Readiness()
+    assert r.status()["status"] == "not_started"
+    r.start(gate.wait)
+    assert not r.is_ready()
+    assert r.status()["status"] == "warming_up"
+    gate.set()
+    assert r.wait(5)
+    assert r.status()["status"] == "ready"
+
+
+def test_failed_warmup_stays_unready():
+    def boom():
+        raise RuntimeError("no weights")
+    r = Readiness()
+    r.start(boom)
+    r._thread.join(5)
+    assert not r.is_ready()
+    assert r.status() == {"status": "failed", "error": "RuntimeError: no weights"}
+
+
+def test_start_is_idempotent():
+    calls = []
+    r = Readiness()
+    r.start(lambda: calls.append(1))
+    r.start(lambda: calls.append(2))
+    assert r.wait(5)
+    assert calls == [1]
@@ -0,0 +1,39 @@
+import pytest
+
+from runner.run_benchmark import compare, percentile, run, summarize
+
+
+def test_percentiles_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile([], 50) == 0.0
+    s = summarize([3.0, 1.0, 2.0])
+    assert s["p50"] == 2.0 and s["max"] == 3.0 and s["count"] == 3
+
+
+def test_run_reports_distribution_and_layers():
+    report = run(["prefilter", "sandbox_postprocess"], "", iterations=2, warmup=1, concurrency=2)
+    assert report["counts"]["total"] == 2 * report["config"]["corpus_size"]
+    assert report["latency_ms"]["p50"] > 0  # sub-millisecond runs no longer truncate to 0
+    assert report["throughput_rps"] > 0
+    assert set(report["layers"]) <= {"prefilter", "sandbox_postprocess"}
+    assert report["layers"]["prefilter"]["count"] == report["counts"]["total"]
+
+
+def test_compare_flags_regressions_only_beyond_tolerance():
+    base = {"latency_ms": {"p50": 10.0, "p90": 20.0, "p99": 30.0}, "throughput_rps": 100.0}
+    same = {"latency_ms": {"p50": 10.5, "p90": 20.0, "p99": 30.0}, "throughput_rps": 95.0}
+    worse = {"latency_ms": {"p50": 10.0, "p90": 20.0, "p99": 45.0}, "throughput_rps": 70.0}
+    assert compare(same, base, 0.10) == []
+    regressions = compare(worse, base, 0.10)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("latency_ms.p99")
+
+
+def test_empty_corpus_is_rejected_before_warmup(tmp_path):
+    empty = tmp_path / "empty.json"
+    empty.write_text("[]", encoding="utf-8")
+    with pytest.raises(ValueError, match="empty"):
+        run(["prefilter"], str(empty), warmup=5)
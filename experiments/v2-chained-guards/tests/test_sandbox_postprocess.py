@@ -0,0 +1,52 @@
+import random
+import re
+from guards.sandbox_postprocess import _COMPILED, _replace_match_with_redaction, sandbox_postprocess
+from runner.bench_sandbox import bench, make_response
+
+
+def _reference(response):
+    """The original pattern-by-pattern implementation, kept as an oracle."""
+    text, redactions = response, []
+    for pattern in _COMPILED:
+        parts, last_end = [], 0
+        for m in pattern.finditer(text):
+            parts.append(text[last_end:m.start()])
+            fragment, metadata = _replace_match_with_redaction(text, m)
+            parts.append(fragment)
+            redactions.append(metadata)
+            last_end = m.end()
+        parts.append(text[last_end:])
+        text = "".join(parts)
+
+    def repl(m):
+        redactions.append({"keyword": "high_entropy_token", "original_value": m.group(0)})
+        return "[REDACTED]"
+    return re.sub(r'\b[A-Za-z0-9_\-+/=]{20,}\b', repl, text), redactions
+
+
+FRAGMENTS = [
+    "password", '"password"', "PassWord", "passwd", "secret", "api_key", "api-key", "token",
+    "access_token", "ssn", "social security number", ":", "=", ": ", " is ", " was ", "my ",
+    "the ", '"', "'", "hunter2", "abc def", "  ", "\n", "aGVsbG8gd29ybGQgdGhpcyBpcyBsb25n",
+    "[REDACTED]", "-", "_", "ſecret", "İ", "K", "é", " ", "mypassword",
+]
+
+
+def test_matches_reference_on_fuzzed_inputs():
+    rng = random.Random(0)
+    for _ in range(5000):
+        text = "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 12)))
+        assert sandbox_postprocess(text) == _reference(text), text
+
+
+def test_matches_reference_on_long_responses():
+    for with_secrets in (False, True):
+        text = make_response(50_000, with_secrets)
+        assert sandbox_postprocess(text) == _reference(text)
+
+
+def test_bench_reports_each_size():
+    rows = bench([1000, 5000], repeat=1)
+    assert [(r["size"], r["secrets"]) for r in rows] == [(1000, False), (1000, True), (5000, False), (5000, True)]
+    assert rows[0]["redactions"] == 0
+    assert rows[3]["redactions"] > 0
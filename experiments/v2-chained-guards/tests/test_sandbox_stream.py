@@ -0,0 +1,80 @@
+import random
+from guards.sandbox_postprocess import StreamingRedactor, sandbox_postprocess, sandbox_postprocess_stream
+
+SAMPLES = [
+    "Here is the password: hunter2 and the api_key=XYZ12345",
+    "my password is 'letmein' ok",
+    'config {"password": "a b c", "token": "zzz"} end',
+    "Your social security number is 123-45-6789.",
+    "random aGVsbG8gd29ybGQgdGhpcyBpcyBsb25n token here",
+    "passwd\n:\n  s3cr3t trailing",
+    "The sky is blue and grass is green.",
+    "the password is the thing ",
+    "key ABCDEFGHIJKLMNOPQRSTUVWXYZ012 and my password is hunter2",
+]
+
+
+def _key(item):
+    return item["keyword"], item["original_value"]
+
+
+def _stream(text, sizes):
+    redactor = StreamingRedactor()
+    out, items, i = [], [], 0
+    while i < len(text):
+        n = next(sizes)
+        piece, found = redactor.feed(text[i:i + n])
+        out.append(piece)
+        items += found
+        i += n
+    piece, found = redactor.close()
+    return "".join(out) + piece, items + found
+
+
+def test_stream_matches_batch_for_any_chunking():
+    rng = random.Random(0)
+    for text in SAMPLES:
+        expected, expected_items = sandbox_postprocess(text)
+        for _ in range(200):
+            sizes = iter(lambda: rng.randint(1, 8), None)
+            got, items = _stream(text, sizes)
+            assert got == expected
+            assert sorted(items, key=_key) == sorted(expected_items, key=_key)
+
+
+def test_my_the_prefix_is_held_back_with_its_keyword():
+    for text in ("the password is the thing ", "so my password is my  thing"):
+        expected, expected_items = sandbox_postprocess(text)
+        got, items = _stream(text, iter(len(w) + 1 for w in text.split(" ")))  # word by word
+        assert got == expected
+        assert sorted(items, key=_key) == sorted(expected_items, key=_key)
+
+
+def test_safe_text_is_emitted_immediately():
+    redactor = StreamingRedactor()
+    assert redactor.feed("The sky is blue ")[0] == "The sky is blue "
+    # only the partial word is held back
+    assert redactor.feed("and gra")[0] == "and "
+    assert redactor.close()[0] == "gra"
+
+
+def test_keyword_holds_back_until_value_completes():
+    redactor = StreamingRedactor()
+    assert redactor.feed("ok, the password: ")[0] == "ok, "  # "the" may start a "the password is" match
+    assert redactor.feed("hunt")[0] == ""
+    text, items = redactor.feed("er2 done")
+    assert text == "the password: [REDACTED] "
+    assert items == [{"keyword": "password", "original_value": "hunter2"}]
+    assert redactor.redactions == items
+
+
+def test_holdback_is_bounded():
+    redactor = StreamingRedactor(max_holdback=16)
+    text, _ = redactor.feed('"password": "' + "x " * 20)
+    assert text.startswith('"password"')
+
+
+def test_stream_generator_skips_empty_pieces():
+    pieces = list(sandbox_postprocess_stream(["the tok", "en=abc", " bye"]))
+    assert "".join(p for p, _ in pieces) == "the token=[REDACTED] bye"
+    assert all(p for p, _ in pieces)
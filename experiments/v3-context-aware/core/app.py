@@ -1,7 +1,14 @@
 import logging
-from flask import Flask, request, render_template_string, jsonify
-from core.session_manager import SessionManager
-from core.pipeline import ContextAwarePipeline
+import os
+import uuid
+from flask import Flask, request, render_template_string, jsonify, make_response, Response
+from core.session_store import SessionStore
+from core.pipeline import ContextAwarePipeline, warmup
+from core.decision_cache import decision_cache_from_env
+from core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render as render_metrics
+from core.readiness import Readiness
+from guards.micro_batcher import batcher_stats
+from guards.model_registry import model_report
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
 logger = logging.getLogger("v3-app")
@@ -64,49 +71,119 @@ HTML = """
         </li>
       {% endfor %}
       </ul>
-      <small>⏱ {{ result.latency_ms }} ms</small>
+      <small>⏱ {{ result.latency_ms }} ms{% if result.cached %} · cached{% endif %}</small>
     </div>
   {% endif %}
 </body>
 </html>
 """
 
+SESSION_HEADER = "X-Session-Id"
+SESSION_COOKIE = "v3_session"
+
 app = Flask(__name__)
-GLOBAL_SESSION = SessionManager(window=3)  # Demo: single in-memory session
+# One SessionManager per caller, bounded by idle TTL and a session/byte budget.
+SESSIONS = SessionStore(
+    window=3,
+    ttl_seconds=float(os.getenv("V3_SESSION_TTL_SECONDS", 30 * 60)),
+    max_sessions=int(os.getenv("V3_MAX_SESSIONS", 200_000)),
+    max_bytes=int(os.getenv("V3_MAX_SESSION_BYTES", 512 * 1024 * 1024)),
+    stripes=int(os.getenv("V3_SESSION_STRIPES", 64)),
+)
+
+# V3_DECISION_CACHE_SIZE>0 answers repeated memory-less prompts from a shared result cache
+DECISION_CACHE = decision_cache_from_env("V3")
+
+# Load models and run a dummy pass in the background; /readyz flips to 200 after.
+READINESS = Readiness()
+READINESS.start(warmup)
+
+def _session_id() -> str:
+    """Session id from the X-Session-Id header or cookie; a fresh one otherwise."""
+    sid = request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE) or ""
+    if not sid or len(sid) > 128:
+        sid = uuid.uuid4().hex
+    return sid
+
+def _run(prompt: str, memory: bool, sid: str):
+    """Run the pipeline; returns (result, history of the caller's session)."""
+    if not memory:
+        return ContextAwarePipeline(session=None, cache=DECISION_CACHE).run(prompt), []
+    with SESSIONS.session(sid) as session:
+        result = ContextAwarePipeline(session=session).run(prompt)
+        return result, session.history()
 
 @app.route("/v3exp", methods=["GET", "POST"])
 def demo():
     memory = False
     prompt = ""
     result = None
+    history = []
+    sid = _session_id()
 
     if request.method == "POST":
         memory = request.form.get("memory") == "on"
         prompt = request.form.get("prompt", "")
 
-        pipeline = ContextAwarePipeline(session=GLOBAL_SESSION if memory else None)
-        result = pipeline.run(prompt)
+        result, history = _run(prompt, memory, sid)
 
         logger.info("Memory=%s | Prompt=%s | Decision=%s",
                     memory, prompt[:80], result["final"]["status"])
 
-    return render_template_string(
+    resp = make_response(render_template_string(
         HTML,
         result=result,
         prompt=prompt,
         memory=memory,
-        history=[type("Obj", (), h) for h in GLOBAL_SESSION.history()] if memory else [],
+        history=[type("Obj", (), h) for h in history],
         icons=STATUS_ICONS,
-    )
+    ))
+    resp.set_cookie(SESSION_COOKIE, sid, httponly=True, samesite="Lax")
+    return resp
 
 @app.route("/api/check", methods=["POST"])
 def api_check():
     memory = request.form.get("memory") == "on"
     prompt = request.form.get("prompt", "")
-
-    pipeline = ContextAwarePipeline(session=GLOBAL_SESSION if memory else None)
-    res = pipeline.run(prompt)
-    return jsonify(res)
+    sid = _session_id()
+
+    res, _ = _run(prompt, memory, sid)
+    resp = jsonify(res)
+    resp.headers[SESSION_HEADER] = sid
+    resp.set_cookie(SESSION_COOKIE, sid, httponly=True, samesite="Lax")
+    return resp
+
+@app.route("/api/sessions/stats", methods=["GET"])
+def session_stats():
+    return jsonify(SESSIONS.stats())
+
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    # liveness: the process is up and serving, models may still be loading
+    return jsonify({"status": "ok"})
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    # readiness: only route traffic here once warmup has finished
+    return jsonify(READINESS.status()), (200 if READINESS.is_ready() else 503)
+
+@app.route("/api/models", methods=["GET"])
+def models():
+    return jsonify(model_report())
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    # Prometheus text: decisions, per-layer wall/CPU histograms, model inference counts
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route("/api/batchers", methods=["GET"])
+def batchers():
+    # per-model queue depth, batch-size histogram and queue wait
+    return jsonify(batcher_stats())
+
+@app.route("/api/decision_cache", methods=["GET"])
+def decision_cache():
+    return jsonify(DECISION_CACHE.stats() if DECISION_CACHE is not None else {"enabled": False})
 
 if __name__ == "__main__":
     logger.info("Starting v3 demo at http://0.0.0.0:8080/v3exp")
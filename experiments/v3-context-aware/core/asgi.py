@@ -0,0 +1,228 @@
+"""
+Async (ASGI) serving mode for the context-aware pipeline.
+
+    uvicorn core.asgi:app --port 8080      # or: make serve-async
+
+Same /api/check contract as the Flask app: form or JSON `prompt` and
+`memory` ("on"/true), with the session taken from the X-Session-Id header
+or v3_session cookie. Connections are handled on the event loop; the
+blocking guard work runs on a small fixed thread pool with a bounded
+backlog, so overload becomes a fast 503. Requests for the same session
+wait their turn on the event loop, so only one of them holds a worker.
+"""
+import asyncio
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from core.pipeline import ContextAwarePipeline, warmup
+from core.decision_cache import decision_cache_from_env
+from core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render as render_metrics
+from core.readiness import Readiness
+from core.session_store import SessionStore
+from guards.micro_batcher import batcher_stats
+from guards.model_registry import model_report
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+logger = logging.getLogger("v3-asgi")
+
+
+class Overloaded(Exception):
+    pass
+
+
+class BadRequest(Exception):
+    pass
+
+
+class GuardDispatcher:
+    """
+    Runs blocking guard calls off the event loop.
+    At most `workers` calls run at once and up to `max_pending` more may
+    queue; anything beyond that is refused with Overloaded instead of
+    growing an unbounded queue. A call given a `gate` (an asyncio lock)
+    waits for it on the event loop, still counted as pending, and only
+    then takes a worker thread, so calls that would block each other
+    never occupy more than one worker.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pool = None
+        self._in_flight = 0  # only touched from the event loop thread
+
+    async def run(self, fn, *args, gate: Optional[asyncio.Lock] = None):
+        if self._in_flight >= self.workers + self.max_pending:
+            raise Overloaded()
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="guard-req")
+        self._in_flight += 1
+        try:
+            if gate is None:
+                return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+            async with gate:
+                return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        finally:
+            self._in_flight -= 1
+
+    def stats(self):
+        return {"workers": self.workers, "max_pending": self.max_pending, "in_flight": self._in_flight}
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+class SessionGates:
+    """
+    An asyncio.Lock per session id with requests in flight (event loop only).
+    Same-session requests queue here rather than on the SessionStore lock
+    inside a worker thread, where they would starve every other session.
+    """
+
+    def __init__(self):
+        self._gates: Dict[str, List] = {}  # sid -> [lock, requests holding or waiting]
+
+    @asynccontextmanager
+    async def hold(self, sid: str):
+        gate = self._gates.get(sid)
+        if gate is None:
+            gate = self._gates[sid] = [asyncio.Lock(), 0]
+        gate[1] += 1
+        try:
+            yield gate[0]
+        finally:
+            gate[1] -= 1
+            if gate[1] == 0:
+                del self._gates[sid]
+
+    def __len__(self) -> int:
+        return len(self._gates)
+
+
+SESSION_HEADER = "X-Session-Id"
+SESSION_COOKIE = "v3_session"
+
+SESSIONS = SessionStore(
+    window=3,
+    ttl_seconds=float(os.getenv("V3_SESSION_TTL_SECONDS", 30 * 60)),
+    max_sessions=int(os.getenv("V3_MAX_SESSIONS", 200_000)),
+    max_bytes=int(os.getenv("V3_MAX_SESSION_BYTES", 512 * 1024 * 1024)),
+    stripes=int(os.getenv("V3_SESSION_STRIPES", 64)),
+)
+DISPATCHER = GuardDispatcher(workers=int(os.getenv("V3_GUARD_WORKERS", 4)),
+                             max_pending=int(os.getenv("V3_MAX_PENDING", 1024)))
+GATES = SessionGates()
+DECISION_CACHE = decision_cache_from_env("V3")
+READINESS = Readiness()
+
+
+def _session_id(request: Request) -> str:
+    sid = request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE) or ""
+    if not sid or len(sid) > 128:
+        sid = uuid.uuid4().hex
+    return sid
+
+
+async def _payload(request: Request):
+    """(prompt, memory) from a JSON or form body."""
+    if request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            data = await request.json()
+            if not isinstance(data, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as e:
+            raise BadRequest(f"invalid JSON body: {e}")
+        memory = data.get("memory")
+        return str(data.get("prompt", "")), memory is True or memory == "on"
+    form = await request.form()
+    return form.get("prompt", ""), form.get("memory") == "on"
+
+
+def _check(prompt: str, memory: bool, sid: str):
+    if not memory:
+        return ContextAwarePipeline(session=None, cache=DECISION_CACHE).run(prompt)
+    with SESSIONS.session(sid) as session:
+        return ContextAwarePipeline(session=session).run(prompt)
+
+
+async def api_check(request: Request):
+    try:
+        prompt, memory = await _payload(request)
+    except BadRequest as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    sid = _session_id(request)
+    try:
+        if memory:
+            async with GATES.hold(sid) as gate:
+                res = await DISPATCHER.run(_check, prompt, memory, sid, gate=gate)
+        else:
+            res = await DISPATCHER.run(_check, prompt, memory, sid)
+    except Overloaded:
+        return JSONResponse({"error": "overloaded"}, status_code=503, headers={"Retry-After": "1"})
+    resp = JSONResponse(res, headers={SESSION_HEADER: sid})
+    resp.set_cookie(SESSION_COOKIE, sid, httponly=True, samesite="lax")
+    return resp
+
+
+async def session_stats(request: Request):
+    return JSONResponse(SESSIONS.stats())
+
+
+async def healthz(request: Request):
+    return JSONResponse({"status": "ok"})
+
+
+async def readyz(request: Request):
+    return JSONResponse(READINESS.status(), status_code=200 if READINESS.is_ready() else 503)
+
+
+async def models(request: Request):
+    return JSONResponse(model_report())
+
+
+async def metrics(request: Request):
+    return Response(render_metrics(), headers={"Content-Type": METRICS_CONTENT_TYPE})
+
+
+async def decision_cache(request: Request):
+    return JSONResponse(DECISION_CACHE.stats() if DECISION_CACHE is not None else {"enabled": False})
+
+
+async def batchers(request: Request):
+    return JSONResponse(batcher_stats())
+
+
+async def dispatcher_stats(request: Request):
+    return JSONResponse(DISPATCHER.stats())
+
+
+@asynccontextmanager
+async def lifespan(app):
+    READINESS.start(warmup)
+    yield
+    DISPATCHER.shutdown()
+
+
+app = Starlette(
+    routes=[
+        Route("/api/check", api_check, methods=["POST"]),
+        Route("/api/sessions/stats", session_stats, methods=["GET"]),
+        Route("/api/dispatcher/stats", dispatcher_stats, methods=["GET"]),
+        Route("/api/models", models, methods=["GET"]),
+        Route("/api/batchers", batchers, methods=["GET"]),
+        Route("/api/decision_cache", decision_cache, methods=["GET"]),
+        Route("/metrics", metrics, methods=["GET"]),
+        Route("/healthz", healthz, methods=["GET"]),
+        Route("/readyz", readyz, methods=["GET"]),
+    ],
+    lifespan=lifespan,
+)
@@ -0,0 +1,115 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from core.metrics import METRICS
+
+DEFAULT_TTL_SECONDS = 300.0
+
+METRICS.describe("guard_decision_cache_total", "Decision cache lookups by result.")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """NFC, so canonically equivalent spellings of a prompt share one entry."""
+    return unicodedata.normalize("NFC", prompt)
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable short hash of everything (besides the prompt) that shapes a decision."""
+    raw = json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+class DecisionCache:
+    """
+    Bounded LRU cache of final pipeline results with a TTL.
+
+    Keys hash the normalized prompt together with the pipeline fingerprint
+    (layers, thresholds, model and rule-set versions), so a config change
+    simply stops hitting old entries; they age out via TTL/LRU. Results are
+    deep-copied in and out, so callers may mutate what they get back.
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = int(max_entries)
+        self.ttl = float(ttl_seconds)
+        self._clock = clock
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(prompt: str, config_fingerprint: str) -> bytes:
+        h = hashlib.blake2b(digest_size=16)
+        h.update(config_fingerprint.encode("utf-8"))
+        h.update(b"\0")
+        h.update(normalize_prompt(prompt).encode("utf-8"))
+        return h.digest()
+
+    def get(self, key: bytes) -> Optional[Tuple[Dict[str, Any], float]]:
+        """(copy of the cached result, age in seconds), or None."""
+        now = self._clock()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and now - item[0] > self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                item = None
+            if item is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        METRICS.inc("guard_decision_cache_total", (("result", "miss" if item is None else "hit"),))
+        if item is None:
+            return None
+        stored_at, result = item
+        return copy.deepcopy(result), now - stored_at
+
+    def put(self, key: bytes, result: Dict[str, Any]) -> None:
+        if self.max_entries <= 0:
+            return
+        entry = (self._clock(), copy.deepcopy(result))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+            }
+
+
+def decision_cache_from_env(prefix: str) -> Optional[DecisionCache]:
+    """
+    <prefix>_DECISION_CACHE_SIZE entries (0, the default, disables caching)
+    kept for <prefix>_DECISION_CACHE_TTL_SECONDS.
+    """
+    size = int(os.getenv(f"{prefix}_DECISION_CACHE_SIZE", 0))
+    if size <= 0:
+        return None
+    return DecisionCache(max_entries=size,
+                         ttl_seconds=float(os.getenv(f"{prefix}_DECISION_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)))
@@ -0,0 +1,128 @@
+import bisect
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+# seconds; spans the regex-only layers (tens of µs) up to cold model calls
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Fixed-bucket histogram (Prometheus semantics: cumulative on render)."""
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(pairs: Tuple[Tuple[str, str], ...]) -> str:
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + body + "}"
+
+
+class Metrics:
+    """
+    In-process counters and latency histograms, rendered as Prometheus text.
+
+    Observing is a dict lookup, a bisect and a few adds under one lock, so
+    it stays in the low microseconds on the regex-only path.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Tuple[Tuple[str, str], ...], float]] = {}
+        self._histograms: Dict[str, Dict[Tuple[Tuple[str, str], ...], Histogram]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def inc(self, name: str, labels: Tuple[Tuple[str, str], ...] = (), value: float = 1.0) -> None:
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0.0) + value
+
+    def observe(self, name: str, labels: Tuple[Tuple[str, str], ...], value: float) -> None:
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            h = series.get(labels)
+            if h is None:
+                h = series[labels] = Histogram()
+            h.observe(value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._counters):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, v in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_labels(labels)} {v:g}")
+            for name in sorted(self._histograms):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, h in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, c in zip(h.buckets + (float("inf"),), h.counts):
+                        cumulative += c
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(labels)} {h.sum:.9g}")
+                    lines.append(f"{name}_count{_labels(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+METRICS.describe("guard_requests_total", "Pipeline runs by final decision.")
+METRICS.describe("guard_request_seconds", "Whole-pipeline wall time.")
+METRICS.describe("guard_layer_wall_seconds", "Wall time spent in each guard layer.")
+METRICS.describe("guard_layer_cpu_seconds", "CPU time of each guard layer: its thread plus its share of batched model work.")
+METRICS.describe("guard_layer_skipped_total", "Layers not run because the outcome was already decided.")
+METRICS.describe("guard_model_inferences_total", "Model forward/encode calls.")
+METRICS.describe("guard_model_inference_items_total", "Texts processed by model forward/encode calls.")
+
+
+def observe_layer(layer: str, wall_ns: int, cpu_ns: int) -> None:
+    key = (("layer", layer),)
+    METRICS.observe("guard_layer_wall_seconds", key, wall_ns / 1e9)
+    METRICS.observe("guard_layer_cpu_seconds", key, cpu_ns / 1e9)
+
+
+def observe_skipped_layer(layer: str) -> None:
+    METRICS.inc("guard_layer_skipped_total", (("layer", layer),))
+
+
+def observe_request(decision: str, wall_ns: int) -> None:
+    METRICS.inc("guard_requests_total", (("decision", decision),))
+    METRICS.observe("guard_request_seconds", (), wall_ns / 1e9)
+
+
+def count_inference(model: str, items: int) -> None:
+    key = (("model", model),)
+    METRICS.inc("guard_model_inferences_total", key)
+    METRICS.inc("guard_model_inference_items_total", key, items)
+
+
+def render() -> str:
+    return METRICS.render()
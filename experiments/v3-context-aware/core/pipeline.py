@@ -1,46 +1,98 @@
 import time
 from typing import Dict, Any, Optional
+from core.decision_cache import DecisionCache, fingerprint
+from core.metrics import observe_layer, observe_request
 from core.session_manager import SessionManager
-from guards.context_guard import context_guard
+from guards.micro_batcher import thread_cpu_ns
+from guards.model_registry import default_backend
+from guards.context_guard import MODEL_NAME, OVERRIDE_PATTERNS, context_guard, embed, warmup as warmup_context_guard
 
 DEFAULT_LAYERS = ["context_guard"]  # v3 focuses on context; you can add more later
 
+def warmup(layers=None) -> None:
+    """Load the models behind `layers` and run one dummy pass through each."""
+    if "context_guard" in (layers or DEFAULT_LAYERS):
+        warmup_context_guard()
+
+def config_fingerprint(layers) -> str:
+    """Hash of the layer list and the rules/model (and inference backend) the context guard decides with."""
+    return fingerprint(list(layers), MODEL_NAME, default_backend(), OVERRIDE_PATTERNS)
+
 class ContextAwarePipeline:
-    def __init__(self, session: Optional[SessionManager] = None, layers=None):
+    def __init__(self, session: Optional[SessionManager] = None, layers=None,
+                 cache: Optional[DecisionCache] = None):
         self.session = session
         self.layers = layers or DEFAULT_LAYERS
+        # optional shared result cache; only consulted for session-less
+        # (context-free) calls, whose decision depends on the prompt alone
+        self.cache = cache
+        self.fingerprint = config_fingerprint(self.layers)
 
     def run(self, prompt: str) -> Dict[str, Any]:
+        if self.cache is None or self.session is not None:
+            return self._evaluate(prompt)
+        t0 = time.perf_counter_ns()
+        key = self.cache.key(prompt, self.fingerprint)
+        hit = self.cache.get(key)
+        if hit is not None:
+            results, age = hit
+            results.update(prompt=prompt, start_ts=time.time(), cached=True, cache_age_ms=round(age * 1000, 3))
+            wall = time.perf_counter_ns() - t0
+            results["latency_ms"] = wall // 1_000_000
+            observe_request(results["final"]["status"], wall)
+            return results
+        results = self._evaluate(prompt)
+        self.cache.put(key, results)
+        results["cached"] = False
+        return results
+
+    def _evaluate(self, prompt: str) -> Dict[str, Any]:
         results = {"prompt": prompt, "start_ts": time.time(), "layers": [], "final": {}, "context": {}}
+        t0 = time.perf_counter_ns()
+
+        last = self.session.last_turn() if self.session is not None else None
+        results["context"]["history_text"] = self.session.context_text() if self.session is not None else ""
+        results["context"]["turns"] = len(self.session) if self.session is not None else 0
 
-        history_text = self.session.context_text() if self.session else ""
-        results["context"]["history_text"] = history_text
+        # Embed the prompt once: it is compared against the previous turn now
+        # and stored with this turn so the next request can reuse it.
+        new_emb = None
+        t_layer, c_layer = time.perf_counter_ns(), thread_cpu_ns()
+        if "context_guard" in self.layers and self.session is not None:
+            new_emb = embed(prompt)
 
         if "context_guard" in self.layers:
-            mal, reason, sim = context_guard(prompt, history_text)
+            if last is not None:
+                mal, reason, sim = context_guard(prompt, last_user=last.user,
+                                                 last_user_emb=last.user_emb, new_emb=new_emb)
+            else:
+                mal, reason, sim = context_guard(prompt)
             results["layers"].append({
                 "layer": "context_guard",
                 "malicious": bool(mal),
                 "reason": reason,
                 "similarity": float(sim),
             })
+            observe_layer("context_guard", time.perf_counter_ns() - t_layer, thread_cpu_ns() - c_layer)
             if mal:
-                return self._final(results, "flagged", reason)
+                return self._final(results, t0, "flagged", reason)
 
         # Simulate "model answer"
         response = f"[LLM] safe answer to: {prompt}"
 
         # Update session AFTER decision (only if we have a session)
-        if self.session:
-            self.session.add_turn(prompt, response)
+        if self.session is not None:
+            self.session.add_turn(prompt, response, user_emb=new_emb)
 
-        return self._final(results, "delivered", response)
+        return self._final(results, t0, "delivered", response)
 
-    def _final(self, results: Dict[str, Any], status: str, payload: str):
+    def _final(self, results: Dict[str, Any], t0: int, status: str, payload: str):
         results["final"] = {"status": status}
         if status == "delivered":
             results["final"]["response"] = payload
         else:
             results["final"]["reason"] = payload
-        results["latency_ms"] = int((time.time() - results["start_ts"]) * 1000)
+        wall = time.perf_counter_ns() - t0
+        results["latency_ms"] = wall // 1_000_000
+        observe_request(status, wall)
         return results
\ No newline at end of file
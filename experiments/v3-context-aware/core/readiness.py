@@ -0,0 +1,57 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("readiness")
+
+
+class Readiness:
+    """
+    Tracks whether the process has finished warming up.
+
+    start() runs the warmup callable once in a background thread; the app is
+    live (/healthz) immediately but only ready (/readyz) after warmup
+    succeeds. A failed warmup keeps the process unready and records the error.
+    """
+
+    def __init__(self):
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def start(self, warmup: Callable[[], None]) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, args=(warmup,), name="warmup", daemon=True)
+            self._thread.start()
+
+    def _run(self, warmup: Callable[[], None]) -> None:
+        t0 = time.perf_counter()
+        try:
+            warmup()
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            logger.exception("warmup failed")
+            return
+        self.warmup_seconds = time.perf_counter() - t0
+        self._ready.set()
+        logger.info("warmup done in %.2fs", self.warmup_seconds)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def status(self) -> Dict[str, Any]:
+        if self._ready.is_set():
+            return {"status": "ready", "warmup_seconds": round(self.warmup_seconds, 3)}
+        if self.error is not None:
+            return {"status": "failed", "error": self.error}
+        return {"status": "warming_up" if self._thread is not None else "not_started"}
@@ -1,30 +1,59 @@
-from typing import List, Dict, Optional
+import sys
+from collections import deque
+from typing import Deque, List, Dict, Optional
+import numpy as np
+
+class Turn:
+    """
+    One user/model exchange, plus the user-prompt embedding computed when
+    the prompt was checked (None if it was never embedded).
+    """
+    __slots__ = ("user", "model", "user_emb")
+
+    def __init__(self, user: str, model: str, user_emb: Optional[np.ndarray] = None):
+        self.user = user
+        self.model = model
+        self.user_emb = user_emb
 
 class SessionManager:
     """
     Keeps a rolling window of recent conversation turns.
-    Each turn = {"user": "...", "model": "..."}.
+    Turns live in a fixed-size ring buffer, oldest dropped first.
     """
     def __init__(self, window: int = 3):
         self.window = window
-        self._history: List[Dict[str, str]] = []
+        self._turns: Deque[Turn] = deque(maxlen=window)
 
-    def add_turn(self, user_input: str, model_output: str) -> None:
-        self._history.append({"user": user_input, "model": model_output})
-        if len(self._history) > self.window:
-            self._history = self._history[-self.window:]
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    def nbytes(self) -> int:
+        """Approximate resident size of the stored turns (strings + embeddings)."""
+        total = sys.getsizeof(self._turns)
+        for t in self._turns:
+            total += sys.getsizeof(t) + sys.getsizeof(t.user) + sys.getsizeof(t.model)
+            if t.user_emb is not None:
+                total += t.user_emb.nbytes
+        return total
+
+    def add_turn(self, user_input: str, model_output: str,
+                 user_emb: Optional[np.ndarray] = None) -> None:
+        self._turns.append(Turn(user_input, model_output, user_emb))
 
     def reset(self) -> None:
-        self._history.clear()
+        self._turns.clear()
+
+    def last_turn(self) -> Optional[Turn]:
+        return self._turns[-1] if self._turns else None
 
     def history(self) -> List[Dict[str, str]]:
-        return list(self._history)
+        return [{"user": t.user, "model": t.model} for t in self._turns]
 
     def context_text(self) -> str:
-        if not self._history:
+        if not self._turns:
             return ""
         parts = []
-        for h in self._history:
-            parts.append(f"User: {h['user']}")
-            parts.append(f"Model: {h['model']}")
-        return " \n".join(parts)
\ No newline at end of file
+        for t in self._turns:
+            parts.append(f"User: {t.user}")
+            parts.append(f"Model: {t.model}")
+        return " \n".join(parts)
@@ -0,0 +1,182 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+from core.session_manager import SessionManager
+
+DEFAULT_TTL_SECONDS = 30 * 60
+DEFAULT_MAX_SESSIONS = 200_000
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_STRIPES = 64
+
+
+class _Entry:
+    __slots__ = ("session", "lock", "last_seen", "nbytes")
+
+    def __init__(self, session: SessionManager, now: float):
+        self.session = session
+        self.lock = threading.Lock()  # held by the request using the session
+        self.last_seen = now
+        self.nbytes = session.nbytes()
+
+
+class _Stripe:
+    """One shard of the store: its own lock, LRU order and byte count."""
+    __slots__ = ("lock", "entries", "bytes", "created", "expired", "evicted")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.bytes = 0
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+
+
+class SessionStore:
+    """
+    SessionManager per session id, with idle-TTL expiry and LRU eviction
+    under a max-sessions / max-bytes budget.
+
+    Ids are hashed onto independent stripes so requests for different
+    sessions rarely share a lock; each stripe enforces 1/stripes of the
+    budget. Lookup, touch and eviction are O(1) per session. Requests for
+    the same session are serialized by a per-session lock; a session held
+    by a request is never expired or evicted under it.
+    """
+
+    def __init__(self, window: int = 3,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_sessions: int = DEFAULT_MAX_SESSIONS,
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 stripes: int = DEFAULT_STRIPES,
+                 clock: Callable[[], float] = time.monotonic):
+        self.window = window
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_sessions = int(max_sessions)
+        self.max_bytes = int(max_bytes)
+        self._clock = clock
+        self._stripes = [_Stripe() for _ in range(max(1, int(stripes)))]
+        n = len(self._stripes)
+        self._stripe_max_sessions = max(1, -(-self.max_sessions // n))
+        self._stripe_max_bytes = max(1, -(-self.max_bytes // n))
+
+    def _stripe_for(self, session_id: str) -> _Stripe:
+        return self._stripes[hash(session_id) % len(self._stripes)]
+
+    def _evict(self, stripe: _Stripe, now: float) -> None:
+        # LRU order is also last-seen order, so expired sessions sit at the head.
+        # Sessions a request holds are skipped: dropping one would lose the
+        # turn it is adding and let the next request for that id run on a
+        # fresh session next to it.
+        entries = stripe.entries
+        busy = []
+        while entries:
+            session_id, entry = next(iter(entries.items()))
+            expired = now - entry.last_seen > self.ttl_seconds
+            if not expired and (len(entries) + len(busy) <= self._stripe_max_sessions
+                                and stripe.bytes <= self._stripe_max_bytes):
+                break
+            entries.popitem(last=False)
+            if entry.lock.locked():
+                busy.append((session_id, entry))
+                continue
+            stripe.bytes -= entry.nbytes
+            if expired:
+                stripe.expired += 1
+            else:
+                stripe.evicted += 1
+        for session_id, entry in reversed(busy):  # back at the head, in LRU order
+            entries[session_id] = entry
+            entries.move_to_end(session_id, last=False)
+
+    @contextmanager
+    def session(self, session_id: str) -> Iterator[SessionManager]:
+        """
+        Yield the SessionManager for session_id, creating it if needed,
+        holding its lock for the whole block so concurrent requests with
+        the same id read and append turns one after another. Its size is
+        re-measured on exit so the byte budget tracks new turns.
+        """
+        stripe = self._stripe_for(session_id)
+        while True:
+            entry = self._enter(stripe, session_id)
+            # taken outside the stripe lock: waiting on a busy session must not
+            # block other sessions on the same stripe
+            entry.lock.acquire()
+            with stripe.lock:
+                if stripe.entries.get(session_id) is entry:
+                    break
+            entry.lock.release()  # evicted before we got it: look the id up again
+        try:
+            yield entry.session
+        finally:
+            size = entry.session.nbytes()
+            with stripe.lock:
+                if stripe.entries.get(session_id) is entry:
+                    stripe.bytes += size - entry.nbytes
+                    entry.nbytes = size
+                entry.lock.release()
+                self._evict(stripe, self._clock())
+
+    def _enter(self, stripe: _Stripe, session_id: str) -> _Entry:
+        """The live entry for session_id, created or touched, under the stripe lock."""
+        now = self._clock()
+        with stripe.lock:
+            entry = stripe.entries.get(session_id)
+            if entry is not None and now - entry.last_seen > self.ttl_seconds and not entry.lock.locked():
+                del stripe.entries[session_id]
+                stripe.bytes -= entry.nbytes
+                stripe.expired += 1
+                entry = None
+            if entry is None:
+                entry = _Entry(SessionManager(window=self.window), now)
+                stripe.entries[session_id] = entry
+                stripe.bytes += entry.nbytes
+                stripe.created += 1
+            else:
+                stripe.entries.move_to_end(session_id)
+                entry.last_seen = now
+            return entry
+
+    def get(self, session_id: str) -> Optional[SessionManager]:
+        """Return a live session without creating, touching or locking it."""
+        stripe = self._stripe_for(session_id)
+        with stripe.lock:
+            entry = stripe.entries.get(session_id)
+            if entry is None or self._clock() - entry.last_seen > self.ttl_seconds:
+                return None
+            return entry.session
+
+    def drop(self, session_id: str) -> bool:
+        stripe = self._stripe_for(session_id)
+        with stripe.lock:
+            entry = stripe.entries.pop(session_id, None)
+            if entry is None:
+                return False
+            stripe.bytes -= entry.nbytes
+            return True
+
+    def sweep(self) -> None:
+        """Expire idle sessions on every stripe (eviction otherwise happens lazily)."""
+        now = self._clock()
+        for stripe in self._stripes:
+            with stripe.lock:
+                self._evict(stripe, now)
+
+    def __len__(self) -> int:
+        return sum(len(s.entries) for s in self._stripes)
+
+    def stats(self) -> Dict[str, int]:
+        out = {"live_sessions": 0, "bytes": 0, "created": 0, "expired": 0, "evicted": 0}
+        for s in self._stripes:
+            with s.lock:
+                out["live_sessions"] += len(s.entries)
+                out["bytes"] += s.bytes
+                out["created"] += s.created
+                out["expired"] += s.expired
+                out["evicted"] += s.evicted
+        out.update(max_sessions=self.max_sessions, max_bytes=self.max_bytes,
+                   stripes=len(self._stripes))
+        return out
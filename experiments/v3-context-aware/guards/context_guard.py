@@ -1,9 +1,16 @@
-from typing import Tuple
+import threading
+from typing import Optional, Tuple
 import numpy as np
-from sentence_transformers import SentenceTransformer
 import re
+from guards.embedding_cache import cached_encode
+from guards.micro_batcher import get_batcher
+from guards.model_registry import sentence_transformer
 
-_embedder = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# loaded on first use so importing the guard doesn't pull in torch
+_embedder = None
+_LOAD_LOCK = threading.Lock()
 
 OVERRIDE_PATTERNS = [
     r"(?i)\bignore previous\b",
@@ -15,6 +22,28 @@ OVERRIDE_PATTERNS = [
 def _cos(a: np.ndarray, b: np.ndarray) -> float:
     return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-12))
 
+def _get_embedder():
+    global _embedder
+    if _embedder is None:
+        with _LOAD_LOCK:
+            if _embedder is None:
+                _embedder = sentence_transformer(MODEL_NAME)
+    return _embedder
+
+def warmup() -> None:
+    """Load MiniLM and run one encode so the first real request doesn't pay for it."""
+    _get_embedder().encode(["warmup"], convert_to_numpy=True)
+
+def _embed_batch(texts):
+    return list(cached_encode(_get_embedder(), MODEL_NAME, texts))
+
+# concurrent embed() calls (across sessions) share one encode call
+_BATCHER = get_batcher("context_guard", _embed_batch)
+
+def embed(text: str) -> np.ndarray:
+    """MiniLM embedding of a single text (served from the shared cache when possible)."""
+    return _BATCHER(text)
+
 def _extract_last_user(history_text: str) -> str:
     """
     History comes in lines like:
@@ -29,8 +58,11 @@ def _extract_last_user(history_text: str) -> str:
             last = line[len("User:"):].strip()
     return last
 
-def context_guard(new_prompt: str, history_text: str,
-                  sim_threshold: float = 0.15) -> Tuple[bool, str, float]:
+def context_guard(new_prompt: str, history_text: str = "",
+                  sim_threshold: float = 0.15,
+                  last_user: Optional[str] = None,
+                  last_user_emb: Optional[np.ndarray] = None,
+                  new_emb: Optional[np.ndarray] = None) -> Tuple[bool, str, float]:
     """
     Returns (is_malicious, reason, similarity_to_last_user)
 
@@ -38,8 +70,13 @@ def context_guard(new_prompt: str, history_text: str,
       - If explicit override keywords present -> malicious.
       - Else compare ONLY to the last user prompt (not the whole history).
       - Do not flag short follow-up questions purely on low similarity.
+
+    Callers that keep per-turn state pass last_user / last_user_emb instead
+    of history_text (and new_emb if the prompt is already embedded), so
+    nothing is re-parsed or re-encoded.
     """
-    if not history_text.strip():
+    has_turn = last_user is not None or last_user_emb is not None
+    if not has_turn and not history_text.strip():
         return False, "no_context", 1.0
     
     lowered = new_prompt.lower()
@@ -48,13 +85,19 @@ def context_guard(new_prompt: str, history_text: str,
             return True, "explicit_override", 0.0
 
 
-    last_user = _extract_last_user(history_text)
-    if not last_user:
-        return False, "no_user_turn", 1.0
+    if last_user_emb is None:
+        if last_user is None:
+            last_user = _extract_last_user(history_text)
+        if not last_user:
+            return False, "no_user_turn", 1.0
+        if new_emb is None:
+            new_emb, last_user_emb = _BATCHER.gather([new_prompt, last_user])
+        else:
+            last_user_emb = embed(last_user)
+    elif new_emb is None:
+        new_emb = embed(new_prompt)
 
-    new_emb = _embedder.encode(new_prompt, convert_to_numpy=True)
-    last_emb = _embedder.encode(last_user, convert_to_numpy=True)
-    sim = _cos(new_emb, last_emb)
+    sim = _cos(new_emb, last_user_emb)
 
     # If it's a short follow-up question, don't flag based only on similarity.
     is_question = new_prompt.strip().endswith("?")
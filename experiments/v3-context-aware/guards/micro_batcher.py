@@ -0,0 +1,197 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Sequence, Tuple
+
+DEFAULT_MAX_BATCH_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", 32))
+DEFAULT_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", 2.0))
+_WAIT_SAMPLES = 2048  # recent queue waits kept for percentiles
+_CREDIT = threading.local()  # worker CPU time credited to the calling thread
+
+
+def thread_cpu_ns() -> int:
+    """
+    time.thread_time_ns() plus the worker-thread CPU time of every batched
+    call this thread has waited on (an even share of each batch's
+    batch_fn), so timing a layer still counts the model work done for it.
+    Threads a model library runs internally (torch intra-op) are not seen.
+    """
+    return time.thread_time_ns() + getattr(_CREDIT, "ns", 0)
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single-item calls for one model into batches.
+
+    Callers submit() an item and get a Future. A worker thread runs
+    batch_fn(items) -> results (same order, same length) once per batch and
+    resolves every caller's future. If batch_fn raises, every future in
+    that batch gets the exception.
+
+    An item submitted while the worker is idle and nothing else is queued
+    runs at once, so lone and sequential callers never wait. Once items
+    pile up behind a running batch, the worker takes them as soon as
+    max_batch_size are waiting or the oldest has waited max_wait_ms.
+
+    max_batch_size <= 1 disables batching: submit() runs batch_fn inline.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], Sequence[Any]],
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+                 name: str = "batcher"):
+        self.batch_fn = batch_fn
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait = float(max_wait_ms) / 1000.0
+        self.name = name
+        self._queue: Deque[Tuple[Any, Future, float]] = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+        self._running = False  # a batch is in batch_fn
+        self._contended = False  # items arrived while others were queued or running
+        # metrics, guarded by _cond
+        self._batches = 0
+        self._items = 0
+        self._sizes: Dict[int, int] = {}
+        self._waits: Deque[float] = deque(maxlen=_WAIT_SAMPLES)
+        self._wait_total = 0.0
+
+    def submit(self, item: Any) -> Future:
+        fut: Future = Future()
+        if self.max_batch_size <= 1:
+            fut.set_running_or_notify_cancel()
+            try:
+                fut.set_result(self.batch_fn([item])[0])
+            except Exception as e:
+                fut.set_exception(e)
+            return fut
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"{self.name}: batcher is closed")
+            if self._running or self._queue:
+                self._contended = True
+            self._queue.append((item, fut, time.perf_counter()))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name=f"microbatch-{self.name}", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return fut
+
+    def __call__(self, item: Any) -> Any:
+        return self.gather([item])[0]
+
+    def gather(self, items: Sequence[Any]) -> List[Any]:
+        """Submit every item and wait for all results, crediting their CPU time to this thread."""
+        futures = [self.submit(item) for item in items]
+        try:
+            return [f.result() for f in futures]
+        finally:
+            _CREDIT.ns = getattr(_CREDIT, "ns", 0) + sum(getattr(f, "cpu_ns", 0) for f in futures)
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return  # closed and drained
+                deadline = self._queue[0][2] + self.max_wait
+                while self._contended and len(self._queue) < self.max_batch_size and not self._closed:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                n = min(len(self._queue), self.max_batch_size)
+                batch = [self._queue.popleft() for _ in range(n)]
+                self._contended = bool(self._queue)
+                self._running = True
+            try:
+                self._run(batch)
+            finally:
+                with self._cond:
+                    self._running = False
+
+    def _run(self, batch: List[Tuple[Any, Future, float]]) -> None:
+        started = time.perf_counter()
+        live = [(item, fut) for item, fut, _ in batch if fut.set_running_or_notify_cancel()]
+        with self._cond:
+            self._batches += 1
+            self._items += len(batch)
+            self._sizes[len(batch)] = self._sizes.get(len(batch), 0) + 1
+            for _, _, t in batch:
+                self._waits.append(started - t)
+                self._wait_total += started - t
+        if not live:
+            return
+        c0 = time.thread_time_ns()
+        try:
+            results = self.batch_fn([item for item, _ in live])
+            if len(results) != len(live):
+                raise RuntimeError(f"{self.name}: batch_fn returned {len(results)} results for {len(live)} items")
+        except Exception as e:
+            self._charge(live, c0)
+            for _, fut in live:
+                fut.set_exception(e)
+            return
+        self._charge(live, c0)
+        for (_, fut), r in zip(live, results):
+            fut.set_result(r)
+
+    @staticmethod
+    def _charge(live: List[Tuple[Any, Future]], c0: int) -> None:
+        """Split the batch's CPU time evenly over its futures (read by gather())."""
+        share = (time.thread_time_ns() - c0) // len(live)
+        for _, fut in live:
+            fut.cpu_ns = share
+
+    def close(self) -> None:
+        """Stop accepting work; already queued items are still processed."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            waits = sorted(self._waits)
+
+            def pct(q: float) -> float:
+                return round(waits[min(len(waits) - 1, int(q * len(waits)))] * 1000, 3) if waits else 0.0
+
+            return {
+                "queue_depth": len(self._queue),
+                "batches": self._batches,
+                "items": self._items,
+                "mean_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._sizes.items())),
+                "wait_ms": {
+                    "mean": round(self._wait_total / self._items * 1000, 3) if self._items else 0.0,
+                    "p50": pct(0.50),
+                    "p99": pct(0.99),
+                },
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+
+_BATCHERS: Dict[str, MicroBatcher] = {}
+_BATCHERS_LOCK = threading.Lock()
+
+
+def get_batcher(name: str, batch_fn: Callable[[List[Any]], Sequence[Any]], **kwargs) -> MicroBatcher:
+    """The process-wide batcher registered under name, created on first use."""
+    with _BATCHERS_LOCK:
+        b = _BATCHERS.get(name)
+        if b is None:
+            b = _BATCHERS[name] = MicroBatcher(batch_fn, name=name, **kwargs)
+        return b
+
+
+def batcher_stats() -> Dict[str, Dict[str, Any]]:
+    with _BATCHERS_LOCK:
+        batchers = dict(_BATCHERS)
+    return {name: b.stats() for name, b in batchers.items()}
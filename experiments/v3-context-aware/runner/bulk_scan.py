@@ -0,0 +1,298 @@
+# runner/bulk_scan.py
+"""
+Offline bulk scan: stream prompts through the pipeline, write verdicts as JSONL.
+Prompts are scanned context-free (no session), as they would be without memory.
+
+    python -m runner.bulk_scan prompts.jsonl more.txt --out verdicts.jsonl --workers 8
+    zcat logs.jsonl.gz | python -m runner.bulk_scan - --format jsonl --field text > verdicts.jsonl
+
+Inputs are read lazily: .jsonl/.ndjson files hold one JSON object (prompt
+in --field, optional --id-field) or JSON string per line, anything else is
+one prompt per line; "-" is stdin. Every non-blank line is a record and
+gets a stable `offset`, so a run can be resumed with --checkpoint/--resume.
+
+Prompts are scanned in chunks on a process pool; each worker builds the
+pipeline (and loads its models) once, with torch limited to its share of
+the cores. Output is in input order unless --unordered, which writes
+chunks as they finish. The checkpoint holds an offset below which every
+record has been written and the size of --out at that point; --resume
+truncates --out back to that size first, so records written after the
+last checkpoint (and a torn last line) are dropped and scanned again.
+In input order that makes a resumed run exactly-once. With --unordered,
+records past the offset that were already written at checkpoint time
+are kept and scanned again, so a few may appear twice (deduplicate on
+`offset`).
+"""
+import argparse
+import json
+import os
+import stat
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from core.decision_cache import DecisionCache
+from core.pipeline import ContextAwarePipeline, warmup
+
+Record = Tuple[int, Any, str]  # (offset, id, prompt)
+
+def read_records(paths: Iterable[str], fmt: str = "auto", field: str = "prompt",
+                 id_field: str = "id", start: int = 0) -> Iterator[Record]:
+    """Records from the inputs in order; lines before offset `start` are skipped unparsed."""
+    offset = 0
+    for path in paths:
+        kind = fmt
+        if kind == "auto":
+            kind = "jsonl" if path.endswith((".jsonl", ".ndjson")) else "text"
+        f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+        try:
+            for line in f:
+                line = line.rstrip("\r\n")
+                if not line.strip():
+                    continue
+                offset += 1
+                if offset <= start:
+                    continue
+                if kind == "text":
+                    yield offset - 1, None, line
+                    continue
+                try:
+                    obj = json.loads(line)
+                except ValueError:
+                    yield offset - 1, None, None  # reported as an error record
+                    continue
+                if isinstance(obj, dict):
+                    yield offset - 1, obj.get(id_field), obj.get(field)
+                else:
+                    yield offset - 1, None, obj
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+def _chunks(records: Iterable[Record], size: int) -> Iterator[List[Record]]:
+    chunk: List[Record] = []
+    for r in records:
+        chunk.append(r)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+# --- worker side -------------------------------------------------------------
+
+_PIPELINE = None
+_OPTIONS: Dict[str, Any] = {}
+
+def make_pipeline(layers=None, cache_size: int = 0, **_):
+    cache = DecisionCache(max_entries=cache_size, ttl_seconds=float("inf")) if cache_size > 0 else None
+    return ContextAwarePipeline(session=None, layers=layers, cache=cache)
+
+def worker_threads(workers: int) -> int:
+    """torch intra-op threads per worker so that the pool doesn't oversubscribe the cores."""
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+def _init_worker(options: Dict[str, Any], threads: int = 0) -> None:
+    """Build the pipeline and load its models once per process."""
+    global _PIPELINE, _OPTIONS
+    _OPTIONS = options
+    if threads > 0:
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+    _PIPELINE = make_pipeline(**options)
+    warmup(_PIPELINE.layers)
+
+def verdict(offset: int, rec_id: Any, prompt: str, res: Dict[str, Any]) -> Dict[str, Any]:
+    final = res["final"]
+    out = {"offset": offset, "status": final.get("status")}
+    if rec_id is not None:
+        out["id"] = rec_id
+    if "reason" in final:
+        out["reason"] = final["reason"]
+    out["flagged_by"] = [l["layer"] for l in res["layers"] if l.get("malicious")]
+    if _OPTIONS.get("include_prompt"):
+        out["prompt"] = prompt
+    return out
+
+def scan_chunk(chunk: List[Record]) -> List[Dict[str, Any]]:
+    out = []
+    for offset, rec_id, prompt in chunk:
+        if not isinstance(prompt, str):
+            out.append({"offset": offset, "error": "no prompt"})
+            continue
+        try:
+            out.append(verdict(offset, rec_id, prompt, _PIPELINE.run(prompt)))
+        except Exception as e:
+            out.append({"offset": offset, "error": f"{type(e).__name__}: {e}"})
+    return out
+
+# --- driver ------------------------------------------------------------------
+
+def scan(records: Iterable[Record], options: Dict[str, Any], workers: int = 0, chunk_size: int = 256,
+         ordered: bool = True) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Verdict chunks. workers=0 scans in this process; otherwise at most
+    4 * workers chunks are in flight, so memory stays flat on huge inputs.
+    """
+    chunks = _chunks(records, chunk_size)
+    if workers <= 0:
+        _init_worker(options)
+        for chunk in chunks:
+            yield scan_chunk(chunk)
+        return
+    limit = 4 * workers
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(options, worker_threads(workers))) as pool:
+        if ordered:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(scan_chunk, chunk))
+                if len(pending) >= limit:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        else:
+            in_flight = set()
+            for chunk in chunks:
+                in_flight.add(pool.submit(scan_chunk, chunk))
+                if len(in_flight) >= limit:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for f in done:
+                        yield f.result()
+            for f in as_completed(in_flight):
+                yield f.result()
+
+class Watermark:
+    """Lowest offset not yet written, given chunks that may complete out of order."""
+
+    def __init__(self, start: int = 0):
+        self.offset = start
+        self._done: Dict[int, int] = {}  # chunk start -> chunk end
+
+    def add(self, chunk: List[Dict[str, Any]]) -> int:
+        self._done[chunk[0]["offset"]] = chunk[-1]["offset"] + 1
+        while self.offset in self._done:
+            self.offset = self._done.pop(self.offset)
+        return self.offset
+
+def _load_checkpoint(path: str) -> Dict[str, Any]:
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {"offset": 0}
+
+def read_checkpoint(path: str) -> int:
+    return int(_load_checkpoint(path)["offset"])
+
+def write_checkpoint(path: str, offset: int, out_bytes: Optional[int] = None) -> None:
+    state = {"offset": offset, "updated": time.time()}
+    if out_bytes is not None:
+        state["out_bytes"] = out_bytes
+    tmp = f"{path}.tmp"
+    Path(tmp).write_text(json.dumps(state), encoding="utf-8")
+    os.replace(tmp, path)
+
+def _out_bytes(out) -> Optional[int]:
+    """Size of a (flushed) regular output file, or None for stdout pipes and in-memory streams."""
+    try:
+        st = os.fstat(out.fileno())
+    except (AttributeError, OSError, ValueError):
+        return None
+    return st.st_size if stat.S_ISREG(st.st_mode) else None
+
+def resume_output(out_path: str, checkpoint: str) -> int:
+    """
+    Cut out_path back to its size at the last checkpoint and return the
+    offset to resume from; without a recorded size (old checkpoint, stdout)
+    the file is left as it is.
+    """
+    state = _load_checkpoint(checkpoint)
+    size = state.get("out_bytes")
+    if size is not None and out_path != "-" and os.path.exists(out_path):
+        with open(out_path, "r+b") as f:
+            f.truncate(size)
+    return int(state["offset"])
+
+def run_scan(inputs: List[str], out, options: Dict[str, Any], workers: int = 0, chunk_size: int = 256,
+             ordered: bool = True, fmt: str = "auto", field: str = "prompt", id_field: str = "id",
+             start: int = 0, checkpoint: str = "", checkpoint_every: int = 10_000,
+             progress_every: float = 10.0, log=sys.stderr) -> Dict[str, Any]:
+    records = read_records(inputs, fmt=fmt, field=field, id_field=id_field, start=start)
+    mark = Watermark(start)
+    counts: Dict[str, int] = {}
+    scanned = 0
+    last_ckpt = start
+    t0 = last_report = time.perf_counter()
+    for chunk in scan(records, options, workers=workers, chunk_size=chunk_size, ordered=ordered):
+        for v in chunk:
+            out.write(json.dumps(v, ensure_ascii=False) + "\n")
+            key = v.get("status", "error")
+            counts[key] = counts.get(key, 0) + 1
+        scanned += len(chunk)
+        mark.add(chunk)
+        if checkpoint and mark.offset - last_ckpt >= checkpoint_every:
+            out.flush()
+            write_checkpoint(checkpoint, mark.offset, _out_bytes(out))
+            last_ckpt = mark.offset
+        now = time.perf_counter()
+        if log is not None and now - last_report >= progress_every:
+            print(f"scanned {scanned} | {scanned / (now - t0):.1f} prompts/s | offset {mark.offset} | {counts}",
+                  file=log)
+            last_report = now
+    out.flush()
+    if checkpoint:
+        write_checkpoint(checkpoint, mark.offset, _out_bytes(out))
+    wall = time.perf_counter() - t0
+    return {
+        "scanned": scanned,
+        "counts": counts,
+        "next_offset": mark.offset,
+        "wall_seconds": round(wall, 3),
+        "prompts_per_second": round(scanned / wall, 1) if wall > 0 else 0.0,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("inputs", nargs="+", help="JSONL/text files, or - for stdin")
+    parser.add_argument("--out", default="-", help="Verdicts JSONL path ('-' for stdout)")
+    parser.add_argument("--format", choices=["auto", "jsonl", "text"], default="auto")
+    parser.add_argument("--field", default="prompt", help="Prompt key in JSONL objects")
+    parser.add_argument("--id-field", default="id", help="Key copied to verdicts as id")
+    parser.add_argument("--layers", default="", help="Comma-separated layer names (default: all)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (0 = scan in this process); each gets cpu_count / workers torch threads")
+    parser.add_argument("--chunk-size", type=int, default=256, help="Prompts per task")
+    parser.add_argument("--unordered", action="store_true", help="Write chunks as they finish")
+    parser.add_argument("--cache-size", type=int, default=0, help="Per-worker decision cache entries")
+    parser.add_argument("--include-prompt", action="store_true", help="Copy the prompt into each verdict")
+    parser.add_argument("--checkpoint", default="", help="File recording the next offset to scan")
+    parser.add_argument("--checkpoint-every", type=int, default=10_000, help="Records between checkpoints")
+    parser.add_argument("--resume", action="store_true",
+                        help="Start from --checkpoint; --out is cut back to its checkpointed size and appended to")
+    parser.add_argument("--start", type=int, default=0, help="Skip records before this offset")
+    parser.add_argument("--progress-every", type=float, default=10.0, help="Seconds between progress lines")
+    args = parser.parse_args()
+
+    start = resume_output(args.out, args.checkpoint) if args.resume and args.checkpoint else args.start
+    options = {
+        "layers": [l.strip() for l in args.layers.split(",") if l.strip()] or None,
+        "cache_size": args.cache_size,
+        "include_prompt": args.include_prompt,
+    }
+    out = sys.stdout if args.out == "-" else open(args.out, "a" if args.resume else "w", encoding="utf-8")
+    try:
+        summary = run_scan(args.inputs, out, options, workers=args.workers, chunk_size=args.chunk_size,
+                           ordered=not args.unordered, fmt=args.format, field=args.field,
+                           id_field=args.id_field, start=start, checkpoint=args.checkpoint,
+                           checkpoint_every=args.checkpoint_every, progress_every=args.progress_every)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(json.dumps(summary), file=sys.stderr)
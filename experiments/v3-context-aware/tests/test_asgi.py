@@ -0,0 +1,70 @@
+import pytest
+
+pytest.importorskip("starlette")
+from starlette.testclient import TestClient
+from core.asgi import app
+
+
+def test_api_check_keeps_session_memory():
+    with TestClient(app) as client:
+        res = client.post("/api/check", data={"prompt": "What is the capital of France?", "memory": "on"})
+        assert res.status_code == 200
+        sid = res.headers["X-Session-Id"]
+        assert res.json()["context"]["turns"] == 0
+        res = client.post("/api/check", json={"prompt": "And of Italy?", "memory": True},
+                          headers={"X-Session-Id": sid})
+        assert res.json()["context"]["turns"] == 1
+        assert client.get("/healthz").json() == {"status": "ok"}
+        metrics = client.get("/metrics")
+        assert metrics.headers["content-type"].startswith("text/plain")
+        assert "guard_requests_total" in metrics.text
+
+
+def test_api_check_without_memory():
+    with TestClient(app) as client:
+        res = client.post("/api/check", data={"prompt": "hello"})
+        assert res.json()["context"]["turns"] == 0
+
+
+def test_bad_json_body_is_a_400():
+    with TestClient(app) as client:
+        res = client.post("/api/check", content=b"{not json", headers={"content-type": "application/json"})
+        assert res.status_code == 400 and "error" in res.json()
+        assert client.post("/api/check", json=["a list"]).status_code == 400
+
+
+def test_busy_session_does_not_starve_other_sessions(monkeypatch):
+    import asyncio
+    import time
+    import httpx
+    import core.asgi as asgi
+
+    class SlowPipeline:
+        def __init__(self, session=None, cache=None):
+            self.session = session
+
+        def run(self, prompt):
+            if prompt == "slow":
+                time.sleep(0.3)
+            return {"final": {}, "context": {"turns": len(self.session) if self.session is not None else 0}}
+
+    monkeypatch.setattr(asgi, "ContextAwarePipeline", SlowPipeline)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+            async def post(prompt, sid):
+                await client.post("/api/check", json={"prompt": prompt, "memory": True}, headers={"X-Session-Id": sid})
+                return time.perf_counter()
+
+            t0 = time.perf_counter()
+            busy = [asyncio.create_task(post("slow", "busy")) for _ in range(asgi.DISPATCHER.workers + 2)]
+            await asyncio.sleep(0.05)
+            other = await post("fast", "other")
+            done = await asyncio.gather(*busy)
+            return other - t0, sorted(d - t0 for d in done)
+
+    other, busy = asyncio.run(scenario())
+    assert other < 0.3  # served while the first busy request is still running
+    assert busy[-1] >= 0.3 * len(busy) * 0.9  # same-session requests still ran one at a time
+    assert len(asgi.GATES) == 0
@@ -9,4 +9,13 @@ def test_context_shift_flags_low_similarity():
     mal, reason, sim = context_guard("Tell me a recipe for pasta", "User: summarize this legal contract\nModel: summary...")
     assert mal in (True, False)  # allow either, but if True it should be context_shift
     if mal:
-        assert reason.startswith("context_shift:")
\ No newline at end of file
+        assert reason.startswith("context_shift:")
+
+def test_cached_embeddings_match_history_text_path():
+    from guards.context_guard import embed
+    prev = "summarize this legal contract"
+    new = "Tell me a recipe for pasta"
+    from_text = context_guard(new, f"User: {prev}\nModel: summary...")
+    from_cache = context_guard(new, last_user=prev, last_user_emb=embed(prev), new_emb=embed(new))
+    assert from_cache[0] == from_text[0]
+    assert abs(from_cache[2] - from_text[2]) < 1e-4
@@ -0,0 +1,23 @@
+from core.decision_cache import DecisionCache
+from core.pipeline import ContextAwarePipeline
+from core.session_manager import SessionManager
+
+
+def test_sessionless_calls_are_cached():
+    cache = DecisionCache()
+    first = ContextAwarePipeline(session=None, cache=cache).run("Tell me about London")
+    second = ContextAwarePipeline(session=None, cache=cache).run("Tell me about London")
+    assert first["cached"] is False
+    assert second["cached"] is True
+    assert second["final"] == first["final"]
+
+
+def test_calls_with_a_session_bypass_the_cache():
+    cache = DecisionCache()
+    session = SessionManager(window=3)
+    p = ContextAwarePipeline(session=session, cache=cache)
+    p.run("Tell me about London")
+    res = p.run("Tell me about London")
+    assert "cached" not in res
+    assert len(session.history()) >= 2
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,48 @@
+import numpy as np
+from guards.embedding_cache import EmbeddingCache
+
+
+class CountingEncoder:
+    """Stands in for SentenceTransformer: 4-dim vectors, counts encoded texts."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, convert_to_numpy=True, **kwargs):
+        self.encoded.extend(texts)
+        return np.array([[len(t), 1.0, 2.0, 3.0] for t in texts], dtype=np.float32)
+
+
+def test_cache_hits_skip_the_model():
+    cache = EmbeddingCache()
+    enc = CountingEncoder()
+    first = cache.encode(enc, "m", ["hello", "world", "hello"])
+    second = cache.encode(enc, "m", ["world", "hello"])
+    assert enc.encoded == ["hello", "world"]
+    assert np.array_equal(first[1], second[0])
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 3
+
+
+def test_cache_is_keyed_by_model_name():
+    cache = EmbeddingCache()
+    enc = CountingEncoder()
+    cache.encode(enc, "a", ["same text"])
+    cache.encode(enc, "b", ["same text"])
+    assert enc.encoded == ["same text", "same text"]
+
+
+def test_cache_evicts_lru_under_entry_and_byte_caps():
+    cache = EmbeddingCache(max_entries=2)
+    enc = CountingEncoder()
+    cache.encode(enc, "m", ["a", "b"])
+    cache.encode(enc, "m", ["a"])          # refresh "a"
+    cache.encode(enc, "m", ["c"])          # evicts "b"
+    assert cache.get("m", "b") is None
+    assert cache.get("m", "a") is not None
+    assert cache.stats()["evictions"] == 1
+
+    small = EmbeddingCache(max_bytes=16 * 2)  # room for two float32[4] vectors
+    small.encode(enc, "m", ["x", "y", "z"])
+    assert small.stats()["entries"] == 2
+    assert small.stats()["bytes"] <= 32
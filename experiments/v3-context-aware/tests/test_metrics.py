@@ -0,0 +1,23 @@
+from core.metrics import METRICS, Metrics, render
+from core.pipeline import ContextAwarePipeline
+from core.session_manager import SessionManager
+
+
+def test_histogram_renders_cumulative_buckets():
+    m = Metrics()
+    m.observe("lat_seconds", (("layer", "a"),), 0.0003)
+    m.observe("lat_seconds", (("layer", "a"),), 0.02)
+    text = m.render()
+    assert "# TYPE lat_seconds histogram" in text
+    assert 'lat_seconds_bucket{layer="a",le="0.00025"} 0' in text
+    assert 'lat_seconds_bucket{layer="a",le="0.025"} 2' in text
+    assert 'lat_seconds_count{layer="a"} 2' in text
+
+
+def test_pipeline_run_is_recorded():
+    METRICS.reset()
+    res = ContextAwarePipeline(session=SessionManager(window=3)).run("Tell me about London")
+    text = render()
+    assert f'guard_requests_total{{decision="{res["final"]["status"]}"}} 1' in text
+    assert 'guard_layer_wall_seconds_count{layer="context_guard"} 1' in text
+    assert 'guard_layer_cpu_seconds_count{layer="context_guard"} 1' in text
@@ -0,0 +1,86 @@
+import threading
+import time
+import pytest
+from guards.micro_batcher import MicroBatcher, thread_cpu_ns
+
+
+class _Recorder:
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        return [x * 2 for x in items]
+
+
+def test_concurrent_calls_are_batched_and_fanned_out():
+    fn = _Recorder()
+    b = MicroBatcher(fn, max_batch_size=8, max_wait_ms=200)
+    barrier = threading.Barrier(8)
+    results = {}
+
+    def call(i):
+        barrier.wait()
+        results[i] = b(i)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == {i: i * 2 for i in range(8)}
+    assert len(fn.batches) < 8
+    s = b.stats()
+    assert s["items"] == 8 and s["queue_depth"] == 0
+    assert sum(k * v for k, v in s["batch_size_histogram"].items()) == 8
+    b.close()
+
+
+def test_batch_is_capped_at_max_batch_size():
+    fn = _Recorder()
+    b = MicroBatcher(fn, max_batch_size=3, max_wait_ms=50)
+    futures = [b.submit(i) for i in range(7)]
+    assert [f.result() for f in futures] == [i * 2 for i in range(7)]
+    assert max(len(x) for x in fn.batches) <= 3
+    b.close()
+
+
+def test_lone_calls_do_not_wait_for_max_wait():
+    b = MicroBatcher(lambda items: [x + 1 for x in items], max_batch_size=32, max_wait_ms=2000)
+    t0 = time.perf_counter()
+    assert b(41) == 42
+    assert b(1) == 2  # sequential callers never overlap either
+    assert time.perf_counter() - t0 < 1.0
+    assert b.stats()["batches"] == 2
+    b.close()
+
+
+def test_worker_cpu_time_is_credited_to_the_caller():
+    def busy(items):
+        end = time.thread_time() + 0.05
+        while time.thread_time() < end:
+            pass
+        return items
+    b = MicroBatcher(busy, max_batch_size=8, max_wait_ms=1)
+    c0 = thread_cpu_ns()
+    assert b.gather([1, 2]) == [1, 2]
+    assert thread_cpu_ns() - c0 >= 40_000_000  # the worker's 50 ms, split over both items
+    b.close()
+
+
+def test_errors_reach_every_caller_in_the_batch():
+    def boom(items):
+        raise ValueError("model failed")
+    b = MicroBatcher(boom, max_batch_size=4, max_wait_ms=20)
+    futures = [b.submit(i) for i in range(3)]
+    for f in futures:
+        with pytest.raises(ValueError):
+            f.result()
+    b.close()
+
+
+def test_batching_disabled_runs_inline():
+    fn = _Recorder()
+    b = MicroBatcher(fn, max_batch_size=1)
+    assert b(5) == 10
+    assert fn.batches == [[5]]
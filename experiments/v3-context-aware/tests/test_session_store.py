@@ -0,0 +1,119 @@
+import threading
+from core.session_store import SessionStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sessions_are_isolated_by_id():
+    store = SessionStore(stripes=4)
+    with store.session("alice") as s:
+        s.add_turn("hi from alice", "hello")
+    with store.session("bob") as s:
+        assert len(s) == 0
+    with store.session("alice") as s:
+        assert s.history()[0]["user"] == "hi from alice"
+    assert store.stats()["live_sessions"] == 2
+
+
+def test_idle_sessions_expire_after_ttl():
+    clock = FakeClock()
+    store = SessionStore(ttl_seconds=10, stripes=1, clock=clock)
+    with store.session("a") as s:
+        s.add_turn("x", "y")
+    clock.now = 11
+    assert store.get("a") is None
+    with store.session("a") as s:
+        assert len(s) == 0
+    assert store.stats()["expired"] == 1
+
+
+def test_lru_eviction_under_session_and_byte_budget():
+    clock = FakeClock()
+    store = SessionStore(max_sessions=2, stripes=1, clock=clock)
+    for sid in ("a", "b"):
+        with store.session(sid):
+            pass
+    with store.session("a"):          # "b" is now least recently used
+        pass
+    with store.session("c"):
+        pass
+    assert store.get("b") is None
+    assert store.get("a") is not None
+    assert store.stats()["evicted"] == 1
+
+    tiny = SessionStore(max_bytes=1, stripes=1, clock=clock)
+    with tiny.session("a") as s:
+        s.add_turn("long prompt " * 50, "long answer " * 50)
+    assert len(tiny) == 0
+    assert tiny.stats()["bytes"] == 0
+
+
+def test_same_session_requests_are_serialized():
+    store = SessionStore(window=3)
+    inside, release, order = threading.Event(), threading.Event(), []
+
+    def first():
+        with store.session("u") as s:
+            inside.set()
+            release.wait(5)
+            order.append("first")
+            s.add_turn("one", "a")
+
+    def second():
+        with store.session("u") as s:
+            order.append(("second saw", len(s)))
+
+    t1 = threading.Thread(target=first)
+    t1.start()
+    inside.wait(5)
+    t2 = threading.Thread(target=second)
+    t2.start()
+    t2.join(0.2)
+    assert t2.is_alive()  # blocked behind the first request
+    with store.session("other"):  # other sessions on any stripe are not
+        pass
+    release.set()
+    t1.join(5)
+    t2.join(5)
+    assert order == ["first", ("second saw", 1)]
+
+
+def test_held_session_survives_eviction_mid_request():
+    clock = FakeClock()
+    store = SessionStore(window=3, ttl_seconds=10, max_sessions=1, stripes=1, clock=clock)
+    with store.session("u") as s:
+        s.add_turn("one", "a")
+    inside, release, seen = threading.Event(), threading.Event(), []
+
+    def first():
+        with store.session("u") as s:
+            inside.set()
+            release.wait(5)
+            s.add_turn("two", "b")
+
+    def second():
+        with store.session("u") as s:
+            seen.append(len(s))
+
+    t1 = threading.Thread(target=first)
+    t1.start()
+    inside.wait(5)
+    clock.now = 11                      # "u" is past its TTL and over the budget
+    for sid in ("x", "y"):
+        with store.session(sid):
+            pass
+    t2 = threading.Thread(target=second)
+    t2.start()
+    t2.join(0.2)
+    assert t2.is_alive()                # still the held entry, not a fresh one
+    release.set()
+    t1.join(5)
+    t2.join(5)
+    assert seen == [2]
+    assert store.stats()["created"] == 3
@@ -1,7 +1,15 @@
 from __future__ import annotations
 import logging
-from flask import Flask, request, render_template_string, jsonify
-from core.pipeline import SignatureHeuristicPipeline
+import os
+from flask import Flask, request, render_template_string, jsonify, Response
+from core.pipeline import SignatureHeuristicPipeline, DEFAULT_CONFIG_PATH, warmup
+from core.decision_cache import decision_cache_from_env
+from core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render as render_metrics
+from core.readiness import Readiness
+from core.hot_reload import FileWatcher
+from guards.signature_guard import reload_signatures, signatures_path
+from guards.micro_batcher import batcher_stats
+from guards.model_registry import model_report
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
 log = logging.getLogger("v4-app")
@@ -64,6 +72,7 @@ HTML = """
         {% for layer in result.layers %}
           <li>
             <b>{{ layer.layer }}</b> — risk: {{ "%.2f"|format(layer.risk) }}
+            {% if layer.details.skipped %}<small>(skipped: {{ layer.details.skipped }}, ≤ bound)</small>{% endif %}
             {% if layer.layer == 'signature_guard' and layer.details.matches %}
               <div>Matches:
                 <ul>
@@ -77,7 +86,7 @@ HTML = """
         {% endfor %}
       </ul>
 
-      <small>⏱ {{ result.latency_ms }} ms</small>
+      <small>⏱ {{ result.latency_ms }} ms{% if result.cached %} · cached{% endif %} · rules {{ result.version.signatures }} · config {{ result.version.config }}</small>
     </div>
   {% endif %}
 </body>
@@ -85,7 +94,23 @@ HTML = """
 """
 
 app = Flask(__name__)
-pipeline = SignatureHeuristicPipeline()
+# V4_FULL_EVALUATION=1 runs every layer even when the signature score already decides (auditing);
+# V4_CONCURRENT_LAYERS=1 overlaps the heuristic layer with the signature scan;
+# V4_DECISION_CACHE_SIZE>0 answers repeated prompts from a result cache.
+pipeline = SignatureHeuristicPipeline(config_path=DEFAULT_CONFIG_PATH,
+                                      full_evaluation=os.getenv("V4_FULL_EVALUATION", "") == "1",
+                                      concurrent=os.getenv("V4_CONCURRENT_LAYERS", "") == "1",
+                                      cache=decision_cache_from_env("V4"))
+
+# Pick up edits to signatures.json / pipeline_config.json without a restart.
+watcher = FileWatcher(interval=float(os.getenv("V4_RELOAD_INTERVAL_SECONDS", 2.0)))
+watcher.watch(signatures_path(), reload_signatures)
+watcher.watch(DEFAULT_CONFIG_PATH, pipeline.reload_config)
+watcher.start()
+
+# Load models and run a dummy pass in the background; /readyz flips to 200 after.
+READINESS = Readiness()
+READINESS.start(warmup)
 
 @app.route("/sigheu", methods=["GET", "POST"])
 def demo():
@@ -103,9 +128,39 @@ def demo():
 @app.route("/api/analyze", methods=["POST"])
 def api_analyze():
     prompt = request.form.get("prompt", "")
-    res = pipeline.run(prompt)
+    # full=1 forces every layer for this request (audit trail)
+    res = pipeline.run(prompt, full_evaluation=True if request.form.get("full") == "1" else None)
     return jsonify(res)
 
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    # liveness: the process is up and serving, models may still be loading
+    return jsonify({"status": "ok"})
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    # readiness: only route traffic here once warmup has finished
+    return jsonify(READINESS.status()), (200 if READINESS.is_ready() else 503)
+
+@app.route("/api/models", methods=["GET"])
+def models():
+    return jsonify(model_report())
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    # Prometheus text: decisions, per-layer wall/CPU histograms, model inference counts
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route("/api/batchers", methods=["GET"])
+def batchers():
+    # per-model queue depth, batch-size histogram and queue wait
+    return jsonify(batcher_stats())
+
+@app.route("/api/decision_cache", methods=["GET"])
+def decision_cache():
+    cache = pipeline.cache
+    return jsonify(cache.stats() if cache is not None else {"enabled": False})
+
 if __name__ == "__main__":
     log.info("Starting v4 demo at http://0.0.0.0:8084/sigheu")
     app.run(host="0.0.0.0", port=8084, debug=True)
\ No newline at end of file
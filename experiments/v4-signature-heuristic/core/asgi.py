@@ -0,0 +1,166 @@
+"""
+Async (ASGI) serving mode for the signature + heuristic pipeline.
+
+    uvicorn core.asgi:app --port 8084      # or: make serve-async
+
+Same /api/analyze contract as the Flask app (form or JSON `prompt`,
+optional `full`). Connections are handled on the event loop; the blocking
+guard work runs on a small fixed thread pool with a bounded backlog, so a
+few workers can hold many idle keep-alive connections and overload
+becomes a fast 503. Signature/config hot reload works as in the Flask app.
+"""
+from __future__ import annotations
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from core.pipeline import SignatureHeuristicPipeline, DEFAULT_CONFIG_PATH, warmup
+from core.hot_reload import FileWatcher
+from core.decision_cache import decision_cache_from_env
+from core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render as render_metrics
+from core.readiness import Readiness
+from guards.signature_guard import reload_signatures, signatures_path
+from guards.micro_batcher import batcher_stats
+from guards.model_registry import model_report
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+log = logging.getLogger("v4-asgi")
+
+
+class Overloaded(Exception):
+    pass
+
+
+class BadRequest(Exception):
+    pass
+
+
+class GuardDispatcher:
+    """
+    Runs blocking guard calls off the event loop.
+    At most `workers` calls run at once and up to `max_pending` more may
+    queue; anything beyond that is refused with Overloaded instead of
+    growing an unbounded queue.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pool = None
+        self._in_flight = 0  # only touched from the event loop thread
+
+    async def run(self, fn, *args):
+        if self._in_flight >= self.workers + self.max_pending:
+            raise Overloaded()
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="guard-req")
+        self._in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        finally:
+            self._in_flight -= 1
+
+    def stats(self):
+        return {"workers": self.workers, "max_pending": self.max_pending, "in_flight": self._in_flight}
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+pipeline = SignatureHeuristicPipeline(config_path=DEFAULT_CONFIG_PATH,
+                                      full_evaluation=os.getenv("V4_FULL_EVALUATION", "") == "1",
+                                      concurrent=os.getenv("V4_CONCURRENT_LAYERS", "") == "1",
+                                      cache=decision_cache_from_env("V4"))
+DISPATCHER = GuardDispatcher(workers=int(os.getenv("V4_GUARD_WORKERS", 4)),
+                             max_pending=int(os.getenv("V4_MAX_PENDING", 1024)))
+READINESS = Readiness()
+
+
+async def _payload(request: Request):
+    """(prompt, full_evaluation override) from a JSON or form body."""
+    if request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            data = await request.json()
+            if not isinstance(data, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as e:
+            raise BadRequest(f"invalid JSON body: {e}")
+        full = data.get("full")
+        return str(data.get("prompt", "")), True if full is True or full == "1" else None
+    form = await request.form()
+    return form.get("prompt", ""), True if form.get("full") == "1" else None
+
+
+async def api_analyze(request: Request):
+    try:
+        prompt, full = await _payload(request)
+    except BadRequest as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    try:
+        res = await DISPATCHER.run(pipeline.run, prompt, full)
+    except Overloaded:
+        return JSONResponse({"error": "overloaded"}, status_code=503, headers={"Retry-After": "1"})
+    return JSONResponse(res)
+
+
+async def healthz(request: Request):
+    return JSONResponse({"status": "ok"})
+
+
+async def readyz(request: Request):
+    return JSONResponse(READINESS.status(), status_code=200 if READINESS.is_ready() else 503)
+
+
+async def models(request: Request):
+    return JSONResponse(model_report())
+
+
+async def metrics(request: Request):
+    return Response(render_metrics(), headers={"Content-Type": METRICS_CONTENT_TYPE})
+
+
+async def decision_cache(request: Request):
+    cache = pipeline.cache
+    return JSONResponse(cache.stats() if cache is not None else {"enabled": False})
+
+
+async def batchers(request: Request):
+    return JSONResponse(batcher_stats())
+
+
+async def dispatcher_stats(request: Request):
+    return JSONResponse(DISPATCHER.stats())
+
+
+@asynccontextmanager
+async def lifespan(app):
+    watcher = FileWatcher(interval=float(os.getenv("V4_RELOAD_INTERVAL_SECONDS", 2.0)))
+    watcher.watch(signatures_path(), reload_signatures)
+    watcher.watch(DEFAULT_CONFIG_PATH, pipeline.reload_config)
+    watcher.start()
+    READINESS.start(warmup)
+    yield
+    watcher.stop()
+    DISPATCHER.shutdown()
+
+
+app = Starlette(
+    routes=[
+        Route("/api/analyze", api_analyze, methods=["POST"]),
+        Route("/api/dispatcher/stats", dispatcher_stats, methods=["GET"]),
+        Route("/api/models", models, methods=["GET"]),
+        Route("/api/batchers", batchers, methods=["GET"]),
+        Route("/api/decision_cache", decision_cache, methods=["GET"]),
+        Route("/metrics", metrics, methods=["GET"]),
+        Route("/healthz", healthz, methods=["GET"]),
+        Route("/readyz", readyz, methods=["GET"]),
+    ],
+    lifespan=lifespan,
+)
@@ -0,0 +1,72 @@
+from __future__ import annotations
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+log = logging.getLogger("v4-reload")
+
+DEFAULT_INTERVAL_SECONDS = 2.0
+
+
+class FileWatcher:
+    """
+    Polls files for changes (mtime + size, no inotify needed) on a daemon
+    thread and calls each file's reload callback when it changes.
+    Reloading happens off the request path; a failing callback is logged
+    and the previously loaded state stays in use.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL_SECONDS):
+        self.interval = float(interval)
+        self._watched: List[Tuple[Path, Callable[[Path], object]]] = []
+        self._stamps: Dict[Path, Optional[Tuple[int, int]]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def watch(self, path, callback: Callable[[Path], object]) -> None:
+        path = Path(path)
+        self._watched.append((path, callback))
+        self._stamps[path] = self._stamp(path)
+
+    def check(self) -> int:
+        """Poll once; returns how many reloads succeeded."""
+        reloaded = 0
+        for path, callback in self._watched:
+            stamp = self._stamp(path)
+            if stamp is None or stamp == self._stamps.get(path):
+                continue
+            self._stamps[path] = stamp
+            try:
+                version = callback(path)
+            except Exception:
+                log.exception("Reload of %s failed; keeping previous version", path)
+                continue
+            log.info("Reloaded %s -> version %s", path, version)
+            reloaded += 1
+        return reloaded
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self) -> "FileWatcher":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="file-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
@@ -1,24 +1,128 @@
 from __future__ import annotations
+import hashlib
+import json
 import time
+from pathlib import Path
+from core.decision_cache import DecisionCache, fingerprint
+from core.executor import get_executor
+from core.metrics import observe_layer, observe_request, observe_skipped_layer
 from typing import Dict, Any, Optional, List
-from guards.signature_guard import signature_guard
-from guards.heuristic_guard import heuristic_guard
+from guards.micro_batcher import thread_cpu_ns
+from guards.model_registry import default_backend
+from guards.signature_guard import signature_guard, signature_version
+from guards.heuristic_guard import heuristic_guard, heuristic_bounds, perplexity_enabled, warmup as warmup_heuristic_guard
 
 DEFAULT_LAYERS: List[str] = ["signature_guard", "heuristic_guard"]
 DEFAULT_WEIGHTS = {"signature": 0.6, "heuristic": 0.4}
 DEFAULT_BLOCK_THRESHOLD = 0.6  # final risk over this -> flagged
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parents[1] / "pipeline_config.json"
+
+class PipelineConfig:
+    """Immutable fusion settings; a reload swaps in a whole new instance."""
+    __slots__ = ("weights", "block_threshold", "version")
+
+    def __init__(self, weights: Dict[str, float], block_threshold: float, version: str = "default"):
+        self.weights = dict(weights)
+        self.block_threshold = float(block_threshold)
+        self.version = version
+
+def load_pipeline_config(path: Path = DEFAULT_CONFIG_PATH) -> PipelineConfig:
+    """Read weights/threshold from JSON; version is a hash of the file content."""
+    raw = Path(path).read_bytes()
+    data = json.loads(raw.decode("utf-8"))
+    weights = dict(DEFAULT_WEIGHTS)
+    weights.update({k: float(v) for k, v in data.get("weights", {}).items()})
+    return PipelineConfig(weights,
+                          data.get("block_threshold", DEFAULT_BLOCK_THRESHOLD),
+                          version=hashlib.sha256(raw).hexdigest()[:12])
+
+def warmup(layers: Optional[List[str]] = None) -> None:
+    """Load the models behind `layers` and run one dummy pass through each."""
+    layers = layers or DEFAULT_LAYERS
+    if "signature_guard" in layers:
+        signature_guard("warmup")
+    if "heuristic_guard" in layers:
+        warmup_heuristic_guard()
+
+def _timed(layer: str, fn, prompt: str):
+    """Run one guard, recording its wall and CPU time (thread plus batched model work) for /metrics."""
+    t0, c0 = time.perf_counter_ns(), thread_cpu_ns()
+    out = fn(prompt)
+    observe_layer(layer, time.perf_counter_ns() - t0, thread_cpu_ns() - c0)
+    return out
 
 class SignatureHeuristicPipeline:
     def __init__(self,
                  layers: Optional[List[str]] = None,
                  weights: Optional[Dict[str, float]] = None,
-                 block_threshold: float = DEFAULT_BLOCK_THRESHOLD):
+                 block_threshold: float = DEFAULT_BLOCK_THRESHOLD,
+                 config_path: Optional[Path] = None,
+                 full_evaluation: bool = False,
+                 concurrent: bool = False,
+                 cache: Optional[DecisionCache] = None):
         self.layers = layers or DEFAULT_LAYERS
-        self.weights = weights or DEFAULT_WEIGHTS
-        self.block_threshold = float(block_threshold)
+        # False: skip the heuristic (distilgpt2) layer when the signature score
+        # already decides the outcome. True: always run every layer (auditing).
+        self.full_evaluation = full_evaluation
+        # True: start the heuristic layer on the shared thread pool while the
+        # signature layer runs; results and decisions are the same either way.
+        self.concurrent = concurrent
+        # optional shared cache of final results for repeated prompts
+        self.cache = cache
+        if config_path is not None:
+            self._config = load_pipeline_config(config_path)
+        else:
+            self._config = PipelineConfig(weights or DEFAULT_WEIGHTS, block_threshold)
+
+    @property
+    def weights(self) -> Dict[str, float]:
+        return self._config.weights
+
+    @property
+    def block_threshold(self) -> float:
+        return self._config.block_threshold
 
-    def run(self, prompt: str) -> Dict[str, Any]:
-        start = time.time()
+    @property
+    def config_version(self) -> str:
+        return self._config.version
+
+    def reload_config(self, path: Path = DEFAULT_CONFIG_PATH) -> str:
+        """Swap in weights/threshold from disk; returns the new config version."""
+        self._config = load_pipeline_config(path)
+        return self._config.version
+
+    def _fingerprint(self, cfg: PipelineConfig, full: bool) -> str:
+        # perplexity availability (and the backend computing it) changes heuristic scores
+        return fingerprint(list(self.layers), cfg.weights, cfg.block_threshold, cfg.version,
+                           signature_version(), full, perplexity_enabled(), default_backend())
+
+    def run(self, prompt: str, full_evaluation: Optional[bool] = None) -> Dict[str, Any]:
+        cfg = self._config  # one snapshot for the whole request
+        full = self.full_evaluation if full_evaluation is None else full_evaluation
+        if self.cache is None:
+            return self._evaluate(prompt, cfg, full)
+
+        start = time.perf_counter_ns()
+        fp = self._fingerprint(cfg, full)
+        key = self.cache.key(prompt, fp)
+        hit = self.cache.get(key)
+        if hit is not None:
+            res, age = hit
+            res.update(prompt=prompt, cached=True, cache_age_ms=round(age * 1000, 3))
+            wall = time.perf_counter_ns() - start
+            res["latency_ms"] = wall // 1_000_000
+            observe_request(res["final"]["status"], wall)
+            return res
+        res = self._evaluate(prompt, cfg, full)
+        # a signature reload (or the perplexity model coming up) mid-request
+        # means the result belongs to neither key; don't cache it
+        if self._fingerprint(cfg, full) == fp:
+            self.cache.put(key, res)
+        res["cached"] = False
+        return res
+
+    def _evaluate(self, prompt: str, cfg: PipelineConfig, full: bool) -> Dict[str, Any]:
+        start = time.perf_counter_ns()
         res: Dict[str, Any] = {
             "prompt": prompt,
             "layers": [],
@@ -27,32 +131,69 @@ class SignatureHeuristicPipeline:
 
         sig_score = 0.0
         heu_score = 0.0
+        sig_version = None
+
+        # Concurrent mode: start the model-backed heuristic layer right away;
+        # if the bound check skips it, its result is cancelled/discarded.
+        heu_future = None
+        if self.concurrent and "signature_guard" in self.layers and "heuristic_guard" in self.layers:
+            heu_future = get_executor().submit(_timed, "heuristic_guard", heuristic_guard, prompt)
+
+        try:
+            if "signature_guard" in self.layers:
+                s, details = _timed("signature_guard", signature_guard, prompt)
+                res["layers"].append({
+                    "layer": "signature_guard",
+                    "risk": float(s),
+                    "details": details
+                })
+                sig_score = float(s)
+                sig_version = details.get("signature_version")
+
+            decided = None
+            if "heuristic_guard" in self.layers and not full:
+                # Heuristic risk is bounded (perplexity in [0,1], the rest is cheap),
+                # so the final risk is too; skip the model if the bound settles it.
+                h_lo, h_hi = heuristic_bounds(prompt)
+                r_lo, r_hi = sorted(cfg.weights["signature"] * sig_score + cfg.weights["heuristic"] * h
+                                    for h in (h_lo, h_hi))
+                if r_lo >= cfg.block_threshold or r_hi < cfg.block_threshold:
+                    decided = (r_lo, r_hi)
+                    res["layers"].append({
+                        "layer": "heuristic_guard",
+                        "risk": float(h_hi),
+                        "details": {"skipped": "decided_by_bound", "bounds": [float(h_lo), float(h_hi)]}
+                    })
+                    heu_score = h_hi
+                    observe_skipped_layer("heuristic_guard")
+
+            if "heuristic_guard" in self.layers and decided is None:
+                h, details = (heu_future.result() if heu_future is not None
+                              else _timed("heuristic_guard", heuristic_guard, prompt))
+                res["layers"].append({
+                    "layer": "heuristic_guard",
+                    "risk": float(h),
+                    "details": details
+                })
+                heu_score = float(h)
+        finally:
+            if heu_future is not None:
+                heu_future.cancel()
 
-        if "signature_guard" in self.layers:
-            s, details = signature_guard(prompt)
-            res["layers"].append({
-                "layer": "signature_guard",
-                "risk": float(s),
-                "details": details
-            })
-            sig_score = float(s)
-
-        if "heuristic_guard" in self.layers:
-            h, details = heuristic_guard(prompt)
-            res["layers"].append({
-                "layer": "heuristic_guard",
-                "risk": float(h),
-                "details": details
-            })
-            heu_score = float(h)
-
-        final_risk = self.weights["signature"] * sig_score + self.weights["heuristic"] * heu_score
+        final_risk = cfg.weights["signature"] * sig_score + cfg.weights["heuristic"] * heu_score
+        if decided is not None:
+            # the exact value is unknown; report the worst case and the range
+            final_risk = decided[1]
+            res["risk_bounds"] = [float(decided[0]), float(decided[1])]
         res["risk"] = float(final_risk)
 
-        status = "flagged" if final_risk >= self.block_threshold else "delivered"
+        status = "flagged" if final_risk >= cfg.block_threshold else "delivered"
         res["final"] = {
             "status": status,
             "reason": "high_risk" if status == "flagged" else "ok",
         }
-        res["latency_ms"] = int((time.time() - start) * 1000)
-        return res
\ No newline at end of file
+        res["version"] = {"signatures": sig_version, "config": cfg.version}
+        wall = time.perf_counter_ns() - start
+        res["latency_ms"] = wall // 1_000_000
+        observe_request(status, wall)
+        return res
@@ -1,19 +1,45 @@
 from __future__ import annotations
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, List, Sequence, Tuple
+import logging
 import math
+import threading
 import numpy as np
+from guards.micro_batcher import get_batcher
 
-# Optional perplexity via distilgpt2
-try:
-    import torch
-    from transformers import AutoTokenizer, AutoModelForCausalLM
-    _tok = AutoTokenizer.from_pretrained("distilgpt2")
-    _mdl = AutoModelForCausalLM.from_pretrained("distilgpt2")
-    _HAS_PPL = True
-except Exception:
-    _HAS_PPL = False
-    _tok = None
-    _mdl = None
+log = logging.getLogger("heuristic_guard")
+
+# Optional perplexity via distilgpt2, loaded on first use. Until then (or if
+# transformers/the model is unavailable) _HAS_PPL is False/None.
+_HAS_PPL: bool | None = None
+_scorer = None
+_LOAD_LOCK = threading.Lock()
+
+def perplexity_enabled() -> bool | None:
+    """True/False once the perplexity model load was attempted; None before."""
+    return _HAS_PPL
+
+def _get_scorer():
+    """Shared PerplexityScorer, or None if perplexity is unavailable."""
+    global _HAS_PPL, _scorer
+    if _HAS_PPL is None:
+        with _LOAD_LOCK:
+            if _HAS_PPL is None:
+                try:
+                    from guards.model_registry import causal_lm
+                    from guards.perplexity import scorer_from_env
+                    tok, mdl = causal_lm("distilgpt2")
+                    _scorer = scorer_from_env(mdl, tok, "V4")
+                    _HAS_PPL = True
+                except Exception as e:
+                    log.warning("perplexity disabled: %s", e)
+                    _HAS_PPL = False
+    return _scorer
+
+def warmup() -> None:
+    """Load distilgpt2 (if available) and run one forward pass."""
+    scorer = _get_scorer()
+    if scorer is not None:
+        scorer.token_nll(["warmup forward pass"])
 
 def _char_entropy(text: str) -> float:
     if not text:
@@ -26,22 +52,44 @@ def _char_entropy(text: str) -> float:
     # Normalize by max entropy for len alphabet approx (cap 6 bits ~ typical ASCII subset)
     return float(min(1.0, H / 6.0))
 
-def _ppl_score(text: str) -> float:
-    """
-    Returns normalized perplexity score in [0,1].
-    If model unavailable, returns 0.0 (neutral).
-    """
-    if not _HAS_PPL or not text.strip():
-        return 0.0
-    with torch.no_grad():
-        inputs = _tok(text, return_tensors="pt")
-        loss = _mdl(**inputs, labels=inputs["input_ids"]).loss  # per-token NLL
-        ppl = torch.exp(loss).item()
+def _ppl_to_score(ppl: float) -> float:
     # Map perplexity to 0..1 using a soft curve; clamp at 1000
     ppl_c = min(1000.0, max(0.0, ppl))
     # Convert to 0..1 (log scale), tuneable
     return float(math.log1p(ppl_c) / math.log1p(1000.0))
 
+# past this perplexity the score saturates at 1.0, so long texts stop
+# scoring once they are confidently on one side of it
+_PPL_SATURATION_NLL = math.log(1000.0)
+
+def _ppl_score_batch(texts: Sequence[str]) -> List[Tuple[float, int]]:
+    """
+    (normalized perplexity score in [0,1], tokens scored) per text, from a
+    single batched distilgpt2 pass; long texts are scored on a bounded
+    token budget. Blank texts (or no model) score 0.0 (neutral).
+    """
+    scores = [(0.0, 0)] * len(texts)
+    idx = [i for i, t in enumerate(texts) if t.strip()]
+    scorer = _get_scorer() if idx else None
+    if scorer is None:
+        return scores
+    for i, (nll, _, scored) in zip(idx, scorer.score([texts[i] for i in idx], lambda n: _PPL_SATURATION_NLL)):
+        if not math.isnan(nll):  # single-token text: nothing to predict
+            scores[i] = (_ppl_to_score(math.exp(nll)), scored)
+    return scores
+
+def _ppl_score(text: str) -> Tuple[float, int]:
+    """
+    Returns (normalized perplexity score in [0,1], tokens scored).
+    If model unavailable, returns 0.0 (neutral).
+    """
+    if not text.strip():
+        return 0.0, 0
+    return _PPL_BATCHER(text)
+
+# concurrent _ppl_score() calls share one distilgpt2 forward pass
+_PPL_BATCHER = get_batcher("heuristic_guard.ppl", _ppl_score_batch)
+
 def _length_score(text: str) -> float:
     # very long prompts can carry injection blobs
     n = len(text)
@@ -52,20 +100,13 @@ def _length_score(text: str) -> float:
         return 1.0
     return float((n - 50) / (600 - 50))
 
-def heuristic_guard(text: str, weights: Dict[str, float] | None = None) -> Tuple[float, Dict[str, Any]]:
-    """
-    Combines multiple behavioral signals into a risk score in [0,1].
-    scores:
-      - entropy_score: unusual character distribution
-      - ppl_score: model finds text odd/unpredictable
-      - length_score: longer inputs are riskier (blobs)
-    """
+def _combine(text: str, ppl: float, weights: Dict[str, float] | None,
+             ppl_tokens: int | None = None) -> Tuple[float, Dict[str, Any]]:
     w = {"entropy": 0.30, "ppl": 0.40, "length": 0.30}
     if weights:
         w.update(weights)
 
     ent = _char_entropy(text)
-    ppl = _ppl_score(text)
     ln  = _length_score(text)
 
     risk = w["entropy"] * ent + w["ppl"] * ppl + w["length"] * ln
@@ -75,4 +116,32 @@ def heuristic_guard(text: str, weights: Dict[str, float] | None = None) -> Tuple
         "length_score": float(ln),
         "weights": {k: float(v) for k, v in w.items()}
     }
-    return float(min(1.0, max(0.0, risk))), details
\ No newline at end of file
+    if ppl_tokens is not None:
+        details["ppl_tokens_scored"] = int(ppl_tokens)
+    return float(min(1.0, max(0.0, risk))), details
+
+def heuristic_bounds(text: str, weights: Dict[str, float] | None = None) -> Tuple[float, float]:
+    """
+    (low, high) range heuristic_guard(text) can return, from the cheap
+    features only: perplexity is unknown and may be anywhere in [0,1].
+    """
+    lo, _ = _combine(text, 0.0, weights)
+    hi, _ = _combine(text, 1.0, weights)
+    return min(lo, hi), max(lo, hi)
+
+def heuristic_guard_batch(texts: Sequence[str],
+                          weights: Dict[str, float] | None = None) -> List[Tuple[float, Dict[str, Any]]]:
+    """heuristic_guard for many texts; perplexity runs as one batched forward pass."""
+    return [_combine(t, p, weights, n) for t, (p, n) in zip(texts, _ppl_score_batch(texts))]
+
+def heuristic_guard(text: str, weights: Dict[str, float] | None = None) -> Tuple[float, Dict[str, Any]]:
+    """
+    Combines multiple behavioral signals into a risk score in [0,1].
+    scores:
+      - entropy_score: unusual character distribution
+      - ppl_score: model finds text odd/unpredictable
+      - length_score: longer inputs are riskier (blobs)
+    ppl_tokens_scored says how many tokens the perplexity came from.
+    """
+    ppl, scored = _ppl_score(text)
+    return _combine(text, ppl, weights, scored)
@@ -0,0 +1,296 @@
+from __future__ import annotations
+import logging
+import os
+import threading
+import time
+import warnings
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("model_registry")
+
+CAUSAL_LM = "causal_lm"
+SENTENCE_TRANSFORMER = "sentence_transformer"
+
+# torch: the weights as loaded; int8: dynamically quantized Linear layers
+# (CPU only); onnx: exported once to ONNX_CACHE_DIR and run with ONNX Runtime
+BACKENDS = ("torch", "int8", "onnx")
+ONNX_CACHE_DIR = Path(os.getenv("ONNX_CACHE_DIR", Path.home() / ".cache" / "inj3ctstop" / "onnx"))
+
+
+def default_backend() -> str:
+    """The deployment's inference backend, from INFERENCE_BACKEND (default torch)."""
+    backend = os.getenv("INFERENCE_BACKEND", "").strip().lower() or "torch"
+    if backend not in BACKENDS:
+        raise ValueError(f"INFERENCE_BACKEND must be one of {BACKENDS}, got {backend!r}")
+    return backend
+
+
+def _load_causal_lm(name: str, device: str, dtype: str, **kwargs) -> Tuple[Any, Any]:
+    import torch
+    from transformers import AutoTokenizer, AutoModelForCausalLM
+    tokenizer = AutoTokenizer.from_pretrained(name, **kwargs)
+    model = AutoModelForCausalLM.from_pretrained(name, **kwargs)
+    return model.to(device=device, dtype=getattr(torch, dtype)), tokenizer
+
+
+def _load_sentence_transformer(name: str, device: str, dtype: str, **kwargs) -> Tuple[Any, Any]:
+    import torch
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(name, device=device, **kwargs)
+    return model.to(getattr(torch, dtype)), None
+
+
+def _onnx_export_dir(name: str) -> Path:
+    return ONNX_CACHE_DIR / name.replace("/", "--")
+
+
+def _onnx_bytes(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*.onnx*"))
+
+
+def _load_causal_lm_onnx(name: str, device: str, dtype: str, **kwargs) -> Tuple[Any, Any]:
+    from optimum.onnxruntime import ORTModelForCausalLM
+    from transformers import AutoTokenizer
+    path = _onnx_export_dir(name)
+    provider = "CPUExecutionProvider" if device == "cpu" else "CUDAExecutionProvider"
+    if not (path / "model.onnx").exists():
+        # first use on this node: export and keep it for later processes
+        tokenizer = AutoTokenizer.from_pretrained(name, **kwargs)
+        model = ORTModelForCausalLM.from_pretrained(name, export=True, use_cache=False, provider=provider, **kwargs)
+        model.save_pretrained(path)
+        tokenizer.save_pretrained(path)
+    else:
+        tokenizer = AutoTokenizer.from_pretrained(path)
+        model = ORTModelForCausalLM.from_pretrained(path, use_cache=False, provider=provider)
+    model.onnx_bytes = _onnx_bytes(path)  # weights live in the ORT session, not in torch tensors
+    return model, tokenizer
+
+
+def _load_sentence_transformer_onnx(name: str, device: str, dtype: str, **kwargs) -> Tuple[Any, Any]:
+    from sentence_transformers import SentenceTransformer
+    path = _onnx_export_dir(name)
+    if not path.exists():
+        model = SentenceTransformer(name, device=device, backend="onnx", **kwargs)
+        model.save_pretrained(str(path))
+    else:
+        model = SentenceTransformer(str(path), device=device, backend="onnx")
+    model.onnx_bytes = _onnx_bytes(path)
+    return model, None
+
+
+def _conv1d_to_linear(module) -> None:
+    """Swap GPT-2 style Conv1D projections for equivalent nn.Linear so they can be quantized."""
+    import torch
+    try:
+        from transformers.pytorch_utils import Conv1D
+    except ImportError:
+        return
+    for child_name, child in module.named_children():
+        if isinstance(child, Conv1D):
+            n_in, n_out = child.weight.shape  # Conv1D stores (in, out)
+            linear = torch.nn.Linear(n_in, n_out, dtype=child.weight.dtype)
+            linear.weight = torch.nn.Parameter(child.weight.detach().t().contiguous(), requires_grad=False)
+            linear.bias = torch.nn.Parameter(child.bias.detach().clone(), requires_grad=False)
+            setattr(module, child_name, linear)
+        else:
+            _conv1d_to_linear(child)
+
+
+def quantize_int8(model):
+    """Dynamic int8 quantization of every Linear layer, in place (CPU inference only)."""
+    import torch
+    _conv1d_to_linear(model)
+    with warnings.catch_warnings():
+        # torch.ao.quantization announces its move to torchao; the eager API still works
+        warnings.simplefilter("ignore")
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def _tensors(value):
+    if hasattr(value, "element_size"):
+        yield value
+    elif isinstance(value, (tuple, list)):
+        for v in value:
+            yield from _tensors(v)
+
+
+def _resident_bytes(model) -> int:
+    """
+    Bytes held by a torch module's state (parameters, buffers and quantized
+    packed weights), plus the exported graph for ONNX models.
+    """
+    total = int(getattr(model, "onnx_bytes", 0))
+    if not hasattr(model, "state_dict"):
+        return total
+    seen = set()
+    for value in model.state_dict(keep_vars=True).values():
+        for t in _tensors(value):
+            if id(t) in seen:  # tied weights (e.g. GPT-2 lm_head / wte) count once
+                continue
+            seen.add(id(t))
+            total += t.numel() * t.element_size()
+    return total
+
+
+def _freeze(model) -> None:
+    """Inference-only: eval mode and no autograd bookkeeping on any parameter."""
+    if hasattr(model, "eval"):
+        model.eval()
+    if hasattr(model, "parameters"):
+        for p in model.parameters():
+            p.requires_grad_(False)
+
+
+class ModelHandle:
+    """A loaded model (plus tokenizer, if any) shared by every guard that asked for it."""
+    __slots__ = ("kind", "name", "device", "dtype", "backend", "model", "tokenizer",
+                 "refs", "nbytes", "load_seconds")
+
+    def __init__(self, kind: str, name: str, device: str, dtype: str,
+                 model, tokenizer, load_seconds: float, backend: str = "torch"):
+        self.kind = kind
+        self.name = name
+        self.device = device
+        self.dtype = dtype
+        self.backend = backend
+        self.model = model
+        self.tokenizer = tokenizer
+        self.refs = 0
+        self.nbytes = _resident_bytes(model)
+        self.load_seconds = load_seconds
+
+    @property
+    def key(self) -> Tuple[str, str, str, str, str]:
+        return self.kind, self.name, self.device, self.dtype, self.backend
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of inference models keyed by (kind, name, device,
+    dtype, backend).
+
+    The first acquire() loads the model, puts it in eval mode and turns off
+    requires_grad; later acquires of the same key return the same instance
+    and bump its reference count. release() drops a reference; the weights
+    stay resident unless unload=True and nobody else holds them.
+
+    The int8 backend quantizes whatever the torch loader returns; onnx uses
+    a separate loader per kind.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[..., Tuple[Any, Any]]] = {
+            CAUSAL_LM: _load_causal_lm,
+            SENTENCE_TRANSFORMER: _load_sentence_transformer,
+        }
+        self._onnx_loaders: Dict[str, Callable[..., Tuple[Any, Any]]] = {
+            CAUSAL_LM: _load_causal_lm_onnx,
+            SENTENCE_TRANSFORMER: _load_sentence_transformer_onnx,
+        }
+        self._handles: Dict[Tuple[str, str, str, str, str], ModelHandle] = {}
+        self._loading: Dict[Tuple[str, str, str, str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def register_loader(self, kind: str, loader: Callable[..., Tuple[Any, Any]], backend: str = "torch") -> None:
+        """loader(name, device, dtype, **kwargs) -> (model, tokenizer_or_None)"""
+        with self._lock:
+            (self._onnx_loaders if backend == "onnx" else self._loaders)[kind] = loader
+
+    def _loader(self, kind: str, backend: str) -> Callable[..., Tuple[Any, Any]]:
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown backend: {backend!r}")
+        loader = (self._onnx_loaders if backend == "onnx" else self._loaders).get(kind)
+        if loader is None:
+            raise ValueError(f"unknown model kind: {kind!r}" if kind not in self._loaders
+                             else f"no {backend} loader for {kind!r}")
+        return loader
+
+    def acquire(self, kind: str, name: str, device: str = "cpu",
+                dtype: str = "float32", backend: Optional[str] = None, **load_kwargs) -> ModelHandle:
+        key = (kind, name, str(device), str(dtype), backend or default_backend())
+        if key[4] == "int8" and key[2] != "cpu":
+            raise ValueError("the int8 backend runs on cpu only")
+        with self._lock:
+            self._loader(kind, key[4])
+            handle = self._handles.get(key)
+            if handle is not None:
+                handle.refs += 1
+                return handle
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        # load outside the registry lock so other models can be served meanwhile;
+        # the per-key lock keeps concurrent first callers from loading twice
+        with load_lock:
+            with self._lock:
+                handle = self._handles.get(key)
+                if handle is not None:
+                    handle.refs += 1
+                    return handle
+                loader = self._loader(kind, key[4])
+            t0 = time.perf_counter()
+            model, tokenizer = loader(name, key[2], key[3], **load_kwargs)
+            _freeze(model)
+            if key[4] == "int8":
+                model = quantize_int8(model)
+            handle = ModelHandle(kind, name, key[2], key[3], model, tokenizer,
+                                 time.perf_counter() - t0, backend=key[4])
+            handle.refs = 1
+            with self._lock:
+                self._handles[key] = handle
+                self._loading.pop(key, None)
+            logger.info("loaded %s %s on %s/%s/%s (%.1f MiB, %.2fs)", kind, name, key[2], key[3], key[4],
+                        handle.nbytes / 2**20, handle.load_seconds)
+            return handle
+
+    def release(self, handle: ModelHandle, unload: bool = False) -> None:
+        with self._lock:
+            current = self._handles.get(handle.key)
+            if current is not handle or handle.refs <= 0:
+                return
+            handle.refs -= 1
+            if unload and handle.refs == 0:
+                del self._handles[handle.key]
+
+    def get(self, kind: str, name: str, device: str = "cpu",
+            dtype: str = "float32", backend: Optional[str] = None) -> Optional[ModelHandle]:
+        """The resident handle for a key, without taking a reference."""
+        with self._lock:
+            return self._handles.get((kind, name, str(device), str(dtype), backend or default_backend()))
+
+    def report(self) -> Dict[str, Any]:
+        """Resident models and their memory, largest first."""
+        with self._lock:
+            handles = sorted(self._handles.values(), key=lambda h: h.nbytes, reverse=True)
+            models: List[Dict[str, Any]] = [{
+                "kind": h.kind,
+                "name": h.name,
+                "device": h.device,
+                "dtype": h.dtype,
+                "backend": h.backend,
+                "refs": h.refs,
+                "bytes": h.nbytes,
+                "load_seconds": round(h.load_seconds, 3),
+            } for h in handles]
+        return {"models": models, "total_bytes": sum(m["bytes"] for m in models)}
+
+
+# one registry per process; guards share weights through it
+REGISTRY = ModelRegistry()
+
+
+def causal_lm(name: str, device: str = "cpu", dtype: str = "float32",
+              backend: Optional[str] = None, **load_kwargs) -> Tuple[Any, Any]:
+    """(tokenizer, model) for a causal LM, loaded once per (name, device, dtype, backend)."""
+    h = REGISTRY.acquire(CAUSAL_LM, name, device, dtype, backend, **load_kwargs)
+    return h.tokenizer, h.model
+
+
+def sentence_transformer(name: str, device: str = "cpu", dtype: str = "float32",
+                         backend: Optional[str] = None, **load_kwargs):
+    """Shared SentenceTransformer instance, loaded once per (name, device, dtype, backend)."""
+    return REGISTRY.acquire(SENTENCE_TRANSFORMER, name, device, dtype, backend, **load_kwargs).model
+
+
+def model_report() -> Dict[str, Any]:
+    return REGISTRY.report()
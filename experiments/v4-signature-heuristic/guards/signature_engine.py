@@ -0,0 +1,202 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Set, Tuple
+import re as _stdlib_re
+import warnings
+import regex as re
+
+try:  # stdlib regex parser, used only to pull literal anchors out of patterns
+    from re import _parser as _sre_parse, _constants as _sre_c  # Python 3.11+
+except ImportError:  # pragma: no cover
+    import sre_parse as _sre_parse
+    import sre_constants as _sre_c
+
+# Anchors shorter than this fire on almost every prompt; such signatures are
+# simply always evaluated.
+MIN_ANCHOR_LEN = 3
+
+# Below this many signatures, folding + prefilter scanning costs more than
+# just running every regex (see runner/bench_signatures.py).
+PREFILTER_MIN_SIGNATURES = 32
+
+# Fold text so a case-insensitive ASCII literal always appears verbatim.
+# Besides A-Z, these are the only code points `regex`'s IGNORECASE treats
+# as equal to an ASCII letter (plus dotless i, harmlessly).
+_FOLD_TABLE = {c: c + 32 for c in range(ord("A"), ord("Z") + 1)}
+_FOLD_TABLE.update({0x130: ord("i"), 0x131: ord("i"), 0x17F: ord("s"), 0x212A: ord("k")})
+
+
+# `regex`-only constructs the stdlib parser would misread as literal text:
+# fuzzy constraints ({e<=1}, {1<=s<=2}, {i}), POSIX classes ([[:alpha:]]),
+# and the b/e/f/p/r/w/V0/V1 flags (V1 turns on nested sets and set
+# operations). Patterns using any of them get no anchors.
+_REGEX_ONLY = _stdlib_re.compile(
+    r"\{[\d\s<=+,]*[eisd](?:[\s<=+,:}\d]|$)"
+    r"|\[:\^?\w+:\]"
+    r"|\(\?[aiLmsux]*(?:-[aiLmsux]*)?[befprwV]"
+)
+
+# Literal text a signature can only contain by escaping, or that the stdlib
+# parser yields from `regex` syntax it does not understand; never anchored on.
+_UNANCHORED_CHARS = frozenset("{}[]")
+
+
+def _fold(text: str) -> str:
+    return text.lower() if text.isascii() else text.translate(_FOLD_TABLE)
+
+
+def _better(a: Set[str], b: Optional[Set[str]]) -> bool:
+    """Prefer anchor sets whose shortest member is longest, then fewer alternatives."""
+    if b is None:
+        return True
+    ka, kb = min(map(len, a)), min(map(len, b))
+    return ka > kb or (ka == kb and len(a) < len(b))
+
+
+def _required_literals(items) -> Optional[Set[str]]:
+    """
+    A set of ASCII strings such that every match of `items` contains at least
+    one of them (lowercased), or None if no useful set exists.
+    """
+    best: Optional[Set[str]] = None
+    run: List[str] = []
+
+    def consider(cand: Optional[Set[str]]) -> None:
+        nonlocal best
+        if cand and _better(cand, best):
+            best = cand
+
+    def flush() -> None:
+        if run:
+            consider({"".join(run).lower()})
+            run.clear()
+
+    for op, av in items:
+        if op is _sre_c.LITERAL and av < 128 and chr(av) not in _UNANCHORED_CHARS:
+            run.append(chr(av))
+            continue
+        flush()
+        if op is _sre_c.SUBPATTERN:
+            consider(_required_literals(av[-1]))
+        elif op is _sre_c.BRANCH:
+            alts = [_required_literals(a) for a in av[1]]
+            if all(alts):
+                consider(set().union(*alts))
+        elif op in (_sre_c.MAX_REPEAT, _sre_c.MIN_REPEAT) or op is getattr(_sre_c, "POSSESSIVE_REPEAT", None):
+            if av[0] >= 1:
+                consider(_required_literals(av[2]))
+        elif op is getattr(_sre_c, "ATOMIC_GROUP", None):
+            consider(_required_literals(av))
+        # anything else (classes, assertions, backrefs, ...) just ends the run
+    flush()
+    return best
+
+
+def extract_anchors(pattern: str) -> Optional[Set[str]]:
+    """
+    Literal anchors for a signature pattern: at least one of them occurs in
+    the folded text whenever the pattern matches. None means "no usable
+    anchor", including patterns that use `regex`-only syntax.
+    """
+    if _REGEX_ONLY.search(pattern):
+        return None
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # "possible nested set" and friends
+            parsed = _sre_parse.parse(pattern)
+    except Exception:
+        return None
+    anchors = _required_literals(parsed)
+    if not anchors or min(map(len, anchors)) < MIN_ANCHOR_LEN:
+        return None
+    return anchors
+
+
+def _trie_pattern(words: Set[str]) -> str:
+    """Regex source for a prefix trie of words; at a given position it matches the longest word."""
+    trie: Dict[str, Any] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, Any]) -> str:
+        branches = [_stdlib_re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+
+class SignatureEngine:
+    """
+    Compiled signature set with a literal prefilter.
+
+    Each pattern's literal anchors go into one trie regex; a single scan of
+    the (case-folded) text finds every anchor present, and only signatures
+    whose anchors occur - plus those without anchors - run their full regex.
+    Hits are counted without materialising match lists.
+
+    An engine is immutable once built, so a reload can swap in a new one
+    while requests keep using the old instance they already hold.
+    """
+
+    def __init__(self, signatures: List[Dict[str, Any]], version: str = ""):
+        self.version = version
+        self.signatures = list(signatures)
+        self.compiled = [re.compile(s["pattern"]) for s in self.signatures]
+        self._always: List[int] = []
+        self._by_anchor: Dict[str, List[int]] = {}
+        for i, sig in enumerate(self.signatures):
+            anchors = extract_anchors(sig["pattern"])
+            if anchors is None:
+                self._always.append(i)
+                continue
+            for a in anchors:
+                self._by_anchor.setdefault(a, []).append(i)
+
+        # The trie reports only the longest anchor starting at each position,
+        # so remember which shorter anchors are prefixes of each one.
+        words = set(self._by_anchor)
+        self._implied: Dict[str, Tuple[str, ...]] = {
+            w: tuple(w[:k] for k in range(MIN_ANCHOR_LEN, len(w) + 1) if w[:k] in words)
+            for w in words
+        }
+        # Anchors are plain folded ASCII, so the stdlib engine (noticeably
+        # faster than `regex` on a big literal trie) gives the same answer.
+        self._prefilter = None
+        if words and len(self.signatures) >= PREFILTER_MIN_SIGNATURES:
+            self._prefilter = _stdlib_re.compile(_trie_pattern(words))
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def candidates(self, text: str) -> List[int]:
+        """Indices (ascending) of signatures that could match text."""
+        if self._prefilter is None:
+            return list(range(len(self.signatures)))
+        folded = _fold(text)
+        search = self._prefilter.search
+        seen: Set[str] = set()
+        m = search(folded)
+        while m is not None:
+            # anchors may overlap, so resume one character after each hit
+            longest = m.group()
+            if longest not in seen:
+                seen.update(self._implied[longest])
+            m = search(folded, m.start() + 1)
+        idx = set(self._always)
+        for a in seen:
+            idx.update(self._by_anchor[a])
+        return sorted(idx)
+
+    def scan(self, text: str) -> List[Tuple[int, int]]:
+        """(signature index, hit count) for every signature that matches text."""
+        hits = []
+        for i in self.candidates(text):
+            n = sum(1 for _ in self.compiled[i].finditer(text))
+            if n:
+                hits.append((i, n))
+        return hits
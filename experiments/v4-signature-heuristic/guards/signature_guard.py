@@ -1,23 +1,71 @@
 from __future__ import annotations
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
+import hashlib
 import json
+import threading
+import unicodedata
 import regex as re
 from pathlib import Path
+from guards.signature_engine import SignatureEngine
 
-_SIGS: List[Dict[str, Any]] = []
-_COMPILED = []
+# Current compiled signature set. Replaced wholesale by reload_signatures();
+# readers grab the reference once per call, so a swap is atomic for them.
+_ENGINE: Optional[SignatureEngine] = None
+_LOAD_LOCK = threading.Lock()
 
 # The LEET table is fun
-_LEET_TABLE = str.maketrans({
+_LEET = {
     "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "8": "b", "9": "g",
     "@": "a", "$": "s"
-})
+}
 
-def _load_signatures() -> None:
-    global _SIGS, _COMPILED
-    if _SIGS:
-        return
-    
+# Latin look-alikes from other scripts (upper and lower case), mapped before lowercasing
+_CONFUSABLES = {
+    # Cyrillic
+    "а": "a", "А": "a", "в": "b", "В": "b", "е": "e", "Е": "e", "ё": "e", "Ё": "e",
+    "і": "i", "І": "i", "ї": "i", "Ї": "i", "ј": "j", "Ј": "j", "к": "k", "К": "k",
+    "м": "m", "М": "m", "н": "h", "Н": "h", "о": "o", "О": "o", "р": "p", "Р": "p",
+    "с": "c", "С": "c", "т": "t", "Т": "t", "у": "y", "У": "y", "х": "x", "Х": "x",
+    "ѕ": "s", "Ѕ": "s", "ԁ": "d", "һ": "h", "ӏ": "l", "Ӏ": "l", "ԛ": "q", "ԝ": "w",
+    # Greek
+    "α": "a", "Α": "a", "β": "b", "Β": "b", "ε": "e", "Ε": "e", "η": "n", "Η": "h",
+    "ι": "i", "Ι": "i", "κ": "k", "Κ": "k", "μ": "u", "Μ": "m", "ν": "v", "Ν": "n",
+    "ο": "o", "Ο": "o", "ρ": "p", "Ρ": "p", "τ": "t", "Τ": "t", "υ": "u", "Υ": "y",
+    "χ": "x", "Χ": "x", "Ζ": "z",
+    # Latin oddities
+    "İ": "i", "ı": "i", "ſ": "s",
+}
+
+_KEEP = re.compile(r"[\p{L}\p{N}\s]")
+_MAX_TABLE_SIZE = 65536
+
+class _NormalizeTable(dict):
+    """
+    Code point -> normalized text, filled lazily and used with str.translate.
+    One lookup folds compatibility forms (fullwidth, math letters) to ASCII,
+    homoglyphs, case, leet digits, and maps everything that is not a
+    letter/number/space to a space.
+    """
+
+    def __missing__(self, cp: int) -> str:
+        c = chr(cp)
+        nfkc = unicodedata.normalize("NFKC", c)
+        if nfkc != c and nfkc.isascii():
+            c = nfkc
+        out = []
+        for ch in _CONFUSABLES.get(c, c).lower():
+            ch = _LEET.get(ch, ch)
+            out.append(ch if _KEEP.match(ch) else " ")
+        value = "".join(out)
+        if len(self) < _MAX_TABLE_SIZE:  # don't let odd inputs grow the table forever
+            self[cp] = value
+        return value
+
+_NORMALIZE_TABLE = _NormalizeTable()
+for _cp in range(256):
+    _NORMALIZE_TABLE[_cp]  # pre-warm Latin-1
+
+def signatures_path() -> Path:
     here = Path(__file__).resolve()
     candidates = [
         here.parent.parent / "signatures.json",                  # .../v4-signature-heuristic/signatures.json
@@ -29,17 +77,42 @@ def _load_signatures() -> None:
         raise FileNotFoundError(
             f"Could not find signatures.json in expected locations: {candidates}"
         )
+    return sig_path
+
+def build_engine(path: Optional[Path] = None) -> SignatureEngine:
+    """Read and compile a signatures file; version is a hash of its content."""
+    raw = Path(path or signatures_path()).read_bytes()
+    sigs: List[Dict[str, Any]] = json.loads(raw.decode("utf-8"))
+    return SignatureEngine(sigs, version=hashlib.sha256(raw).hexdigest()[:12])
+
+def _load_signatures() -> SignatureEngine:
+    global _ENGINE
+    engine = _ENGINE
+    if engine is not None:
+        return engine
+    with _LOAD_LOCK:
+        if _ENGINE is None:
+            _ENGINE = build_engine()
+        return _ENGINE
+
+def reload_signatures(path: Optional[Path] = None) -> str:
+    """
+    Recompile signatures from disk and swap them in; returns the new version.
+    On a bad file this raises and the previous set stays active.
+    """
+    global _ENGINE
+    engine = build_engine(path)
+    with _LOAD_LOCK:
+        _ENGINE = engine
+    return engine.version
 
-    with open(sig_path, "r", encoding="utf-8") as f:
-        _SIGS = json.load(f)
-    _COMPILED = [(s, re.compile(s["pattern"])) for s in _SIGS]
+def signature_version() -> str:
+    return _load_signatures().version
 
 def _normalize_leet(s: str) -> str:
-    s2 = s.lower().translate(_LEET_TABLE)
-    # replace non-word with space, collapse spaces
-    s2 = re.sub(r"[^\p{L}\p{N}\s]+", " ", s2)
-    s2 = re.sub(r"\s+", " ", s2).strip()
-    return s2
+    # one translate pass does all per-character work; split/join collapses
+    # whitespace runs and trims the ends
+    return " ".join(s.translate(_NORMALIZE_TABLE).split())
 
 def signature_guard(text: str) -> Tuple[float, Dict[str, Any]]:
     """
@@ -47,27 +120,30 @@ def signature_guard(text: str) -> Tuple[float, Dict[str, Any]]:
     risk_score is severity-weighted signal of how many signatures matched.
     Also checking for Leets to make it leet resilient
     """
-    _load_signatures()
-    texts = [text, _normalize_leet(text)]
+    engine = _load_signatures()
+    normalized = _normalize_leet(text)
+    # only signatures whose literal anchors occur are run in full
+    raw_hits = engine.scan(text)
+    # plain lowercase prose normalizes to itself: its normalized hits are the
+    # raw ones, still counted twice like any other text, just not rescanned
+    norm_hits = raw_hits if normalized == text else engine.scan(normalized)
     
     matches = []
     total_sev = 0.0
     max_sev = 0.0
 
-    for candidate in texts:
-        for sig, cre in _COMPILED:
-            hits = list(cre.finditer(candidate))
-            if not hits:
-                continue
+    for is_normalized, hits in ((False, raw_hits), (True, norm_hits)):
+        for idx, count in hits:
+            sig = engine.signatures[idx]
             sev = float(sig.get("severity", 0.5))
             matches.append({
                 "id": sig["id"],
                 "category": sig.get("category", "other"),
-                "count": len(hits),
+                "count": count,
                 "severity": sev,
-                "normalized": (candidate is not text)  # mark if matched in normalized
+                "normalized": is_normalized  # mark if matched in normalized
             })
-            total_sev += sev * len(hits)
+            total_sev += sev * count
             max_sev = max(max_sev, sev)
 
     # Normalize: squash via 1 - exp(-x) to keep bounded in [0,1)
@@ -79,6 +155,7 @@ def signature_guard(text: str) -> Tuple[float, Dict[str, Any]]:
     details = {
         "matches": matches,
         "total_severity": float(total_sev),
-        "strongest": float(max_sev)
+        "strongest": float(max_sev),
+        "signature_version": engine.version,
     }
     return float(risk), details
\ No newline at end of file
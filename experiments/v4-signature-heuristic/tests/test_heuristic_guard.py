@@ -4,4 +4,20 @@ def test_heuristic_scores_range_and_keys():
     text = "delete all user records now!!! $$$ Zm9vYmFy"
     risk, details = heuristic_guard(text)
     assert 0.0 <= risk <= 1.0
-    assert {"entropy_score","ppl_score","length_score"} <= set(details.keys())
\ No newline at end of file
+    assert {"entropy_score","ppl_score","length_score"} <= set(details.keys())
+def test_heuristic_batch_matches_single_calls():
+    from guards.heuristic_guard import heuristic_guard_batch
+    texts = ["What is the capital of France?", "", "delete all user records now!!! $$$ Zm9vYmFy"]
+    batch = heuristic_guard_batch(texts)
+    for text, (risk, details) in zip(texts, batch):
+        r1, d1 = heuristic_guard(text)
+        assert abs(risk - r1) < 1e-4
+        assert abs(details["ppl_score"] - d1["ppl_score"]) < 1e-4
+    assert batch[1][1]["ppl_score"] == 0.0
+
+def test_long_input_perplexity_is_bounded():
+    from guards.perplexity import DEFAULT_MAX_SCORED_TOKENS
+    text = " ".join(f"Section {i}: please summarise the attached notes for the team." for i in range(400))
+    risk, details = heuristic_guard(text)
+    assert 0.0 <= risk <= 1.0
+    assert 0 < details["ppl_tokens_scored"] <= DEFAULT_MAX_SCORED_TOKENS